@@ -2,31 +2,137 @@
 Base class for agents in the multi-agent system.
 """
 from abc import ABC, abstractmethod
+import asyncio
 import logging
+import threading
+from typing import Any, Coroutine, Optional, TypeVar
+
+from knexgpt.communication.async_base_queue import AsyncBaseQueue
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
+# Message fields placing a batch within its source: stream position, end
+# marker, and the source path and entity ids of incremental ingests.
+STREAM_FIELDS = ("stream_id", "seq", "eos", "error", "source", "ids")
+
+def stream_fields(message: dict) -> dict:
+    """Return a message's stream fields, to carry onto follow-up messages."""
+    return {key: message[key] for key in STREAM_FIELDS if key in message}
+
 class BaseAgent(ABC):
     """Abstract base class for all agents."""
-    
+
     def __init__(self, name: str):
         """Initialize the agent with a name.
-        
+
         Args:
             name: Name of the agent
         """
         self.name = name
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_lock = threading.Lock()
         logger.info(f"Initialized agent: {self.name}")
-    
+
     @abstractmethod
     async def perform_task(self, *args, **kwargs):
         """Perform the agent's designated task."""
         pass
 
+    async def handle_message_async(self, message: dict) -> None:
+        """Handle an incoming message.
+
+        Args:
+            message: Decoded message
+        """
+        pass
+
+    def handle_message(self, message: dict) -> None:
+        """Handle an incoming message from a synchronous queue.
+
+        Runs ``handle_message_async`` on the agent's persistent event loop,
+        so async resources like database drivers outlive single messages.
+        Safe to call from several consumer threads at once.
+
+        Args:
+            message: Decoded message
+        """
+        self.run_coroutine(self.handle_message_async(message))
+
+    def run_coroutine(self, coro: Coroutine[Any, Any, T]) -> T:
+        """Run a coroutine on the agent's persistent event loop and wait for it.
+
+        The loop runs in a background thread started on first use.
+
+        Args:
+            coro: Coroutine to run
+
+        Returns:
+            The coroutine's result
+        """
+        with self._loop_lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(
+                    target=self._loop.run_forever,
+                    name=f"{self.name}-loop",
+                    daemon=True
+                ).start()
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result()
+
+    def stop_loop(self) -> None:
+        """Stop the persistent event loop started by ``run_coroutine``."""
+        with self._loop_lock:
+            if self._loop is not None:
+                self._loop.call_soon_threadsafe(self._loop.stop)
+                self._loop = None
+
+    async def run(self, queue: AsyncBaseQueue, max_concurrency: int = 16) -> None:
+        """Consume messages from an async queue until it ends or is cancelled.
+
+        Up to ``max_concurrency`` messages are handled at once; the next
+        message is only fetched when a slot is free. Each message is acked
+        once ``handle_message_async`` returns and nacked if it raises.
+
+        Args:
+            queue: Connected async queue
+            max_concurrency: Maximum messages handled concurrently
+        """
+        slots = asyncio.Semaphore(max_concurrency)
+        tasks = set()
+
+        async def process(delivery) -> None:
+            try:
+                await self.handle_message_async(delivery.body)
+            except Exception as e:
+                self.log(f"Failed to handle message: {e!r}")
+                await delivery.nack()
+            else:
+                await delivery.ack()
+            finally:
+                slots.release()
+
+        deliveries = queue.__aiter__()
+        try:
+            while True:
+                await slots.acquire()
+                try:
+                    delivery = await deliveries.__anext__()
+                except StopAsyncIteration:
+                    slots.release()
+                    break
+                task = asyncio.create_task(process(delivery))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        finally:
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+
     def log(self, message: str) -> None:
         """Log a message with the agent's name.
-        
+
         Args:
             message: Message to log
         """
-        logger.info(f"[{self.name}] {message}") 
\ No newline at end of file
+        logger.info(f"[{self.name}] {message}")
@@ -1,31 +1,78 @@
-from .base import BaseAgent
+from typing import Dict, Optional
+
+from .base import BaseAgent, stream_fields
 from knexgpt.communication.message_queue import MessageQueueClient
-import asyncio
+from knexgpt.db.graph_loader import GraphLoader, RecordMapping
+from knexgpt.db.registry import get_shared_adapter, registry
 
 class DataEnrichmentAgent(BaseAgent):
-    """Agent responsible for data enrichment tasks."""
+    """Agent responsible for data enrichment tasks.
+    
+    Given a graph database and record mappings, the agent also loads the
+    extracted records it receives into the graph with a ``GraphLoader``,
+    storing the entity ids of incremental ingests on their nodes, before
+    enriching them.
+    """
     
-    def __init__(self):
+    def __init__(
+        self,
+        db_type: Optional[str] = None,
+        db_config: Optional[dict] = None,
+        mappings: Optional[Dict[str, RecordMapping]] = None,
+        label_field: Optional[str] = None
+    ):
+        """Initialize the agent.
+        
+        Args:
+            db_type: Graph database type to load records into
+            db_config: Graph database settings
+            mappings: Record mappings by class name; records are only
+                loaded when given
+            label_field: Record field naming each record's class; see
+                ``GraphLoader``
+        """
         super().__init__(name="DataEnrichmentAgent")
         self.mq_client = MessageQueueClient(queue_name="data_enrichment")
+        self.adapter = get_shared_adapter(db_type, **(db_config or {})) if db_type and mappings else None
+        self.mappings = mappings
+        self.label_field = label_field
     
-    async def perform_task(self, data: dict, *args, **kwargs):
+    async def perform_task(self, data: dict, *args, stream: Optional[dict] = None, **kwargs):
         """Enhance the knowledge graph with additional relationships.
         
         Args:
             data: Data to enrich
+            stream: Stream fields of the batch, passed on downstream
         """
         self.log("Enriching data")
+        if self.adapter is not None:
+            await self.load({"data": data, **(stream or {})})
         enriched_data = self.enrich_data(data)
-        self.mq_client.send_message({"task": "validate", "data": enriched_data})
+        self.mq_client.send_message({"task": "validate", "data": enriched_data, **(stream or {})})
         return enriched_data
     
+    async def load(self, message: dict) -> None:
+        """Write an extraction message's records to the graph.
+        
+        Args:
+            message: Message with the records under ``"data"`` and, from
+                incremental ingests, their entity ids under ``"ids"``
+        """
+        if self.adapter is None or self.mappings is None:
+            return
+        adapter = await registry.connect(self.adapter)
+        # A loader per message: its duplicate index must not outlive
+        # retractions, and the rows are written before the message is acked.
+        loader = GraphLoader(adapter, self.mappings, label_field=self.label_field)
+        await loader.load_message(message)
+        await loader.close()
+    
     def enrich_data(self, data: dict) -> dict:
         """Enrich data with additional relationships.
         
         Args:
             data: Data to enrich
-            
+        
         Returns:
             Enriched data
         """
@@ -35,11 +82,15 @@ class DataEnrichmentAgent(BaseAgent):
     def start_listening(self):
         """Start listening for incoming messages."""
         self.mq_client.receive_messages(self.handle_message)
-
-    def handle_message(self, message: dict):
+    
+    async def handle_message_async(self, message: dict):
         """Handle incoming messages."""
         self.log(f"Received message: {message}")
         if message.get("task") == "enrich":
+            if message.get("eos"):
+                # End of a streamed source; pass the marker downstream.
+                self.mq_client.send_message({"task": "validate", **stream_fields(message)})
+                return
             data = message.get("data")
             if data:
-                asyncio.run(self.perform_task(data)) 
\ No newline at end of file
+                await self.perform_task(data, stream=stream_fields(message))
@@ -3,14 +3,31 @@ Data Extraction Agent for parsing structured and unstructured data.
 """
 
 import asyncio
-import csv
-import json
-from typing import Union
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
+import os
+from typing import Dict, Iterable, List, Optional, Sequence, Union
+import uuid
 
 from knexgpt.communication.message_queue import MessageQueueClient
+from knexgpt.db.registry import get_shared_adapter, registry
 from knexgpt.db.adapter import GraphQuery
-from knexgpt.db.adapter_factory import create_adapter
+from knexgpt.db.graph_loader import ENTITY_ID_PROPERTY
 from knexgpt.db.query_translator import QueryTranslator
+from knexgpt.data_processing.ingest import (
+    IngestCheckpoint,
+    extract_file,
+    file_signature,
+    resolve_sources,
+)
+from knexgpt.data_processing.source_index import (
+    RecordDiff,
+    SourceIndex,
+    diff_records,
+    entity_key,
+    extract_if_changed,
+    file_digest,
+)
+from knexgpt.data_processing.streaming import read_batches
 
 from .base import BaseAgent
 
@@ -18,65 +35,378 @@ from .base import BaseAgent
 class DataExtractionAgent(BaseAgent):
     """Agent responsible for data extraction tasks."""
 
-    def __init__(self, db_type: str, db_config: dict):
+    def __init__(
+        self,
+        db_type: str,
+        db_config: dict,
+        batch_size: int = 1000,
+        span_size: int = 1 << 16,
+        stream_threshold: int = 64 * 1024 * 1024
+    ):
+        """Initialize the agent.
+
+        Args:
+            db_type: Graph database type
+            db_config: Graph database settings
+            batch_size: Records per message when streaming
+            span_size: Characters per message when streaming text
+            stream_threshold: File size in bytes from which files are
+                streamed rather than read whole
+        """
         super().__init__(name="DataExtractionAgent")
-        self.adapter = create_adapter(db_type, **db_config)
+        self.adapter = get_shared_adapter(db_type, **db_config)
         self.translator = QueryTranslator()
+        self.batch_size = batch_size
+        self.span_size = span_size
+        self.stream_threshold = stream_threshold
         self.mq_client = MessageQueueClient(queue_name="data_extraction")
 
-    async def perform_task(self, data_source: Union[str, dict], *args, **kwargs):
+    async def perform_task(
+        self,
+        data_source: Union[str, dict],
+        *args,
+        stream: Optional[bool] = None,
+        **kwargs
+    ):
         """Perform data extraction from the given source.
 
         Args:
             data_source: Source of the data to extract
+            stream: Stream the file in batches; by default files of at
+                least ``stream_threshold`` bytes are streamed
         """
         self.log(f"Extracting data from {data_source}")
-        extracted_data = self.extract_data(data_source)
-        # Translate and execute a query
-        sparql_query = "SELECT ?s WHERE { ?s ?p ?o }"
-        cypher_query = self.translator.translate(sparql_query, "cypher")
-        if cypher_query:
-            result = await self.adapter.execute_query(GraphQuery(query=cypher_query))
-            self.log(f"Query result: {result.data}")
+        if stream is None:
+            stream = isinstance(data_source, str) and self._is_large(data_source)
+        elif stream and not isinstance(data_source, str):
+            raise ValueError("Only files can be streamed")
+        extracted_data = None if stream else self.extract_data(data_source)
+        await self.probe()
+        if stream and isinstance(data_source, str):
+            return self.stream_data(data_source)
         self.mq_client.send_message({"task": "enrich", "data": extracted_data})
         return extracted_data
 
-    def extract_data(self, data_source: Union[str, dict]) -> dict:
+    async def probe(self) -> None:
+        """Translate and run a sample query against the graph.
+
+        Skipped for backends whose language SPARQL can't be compiled to,
+        so extraction works on every backend.
+        """
+        sparql_query = "SELECT ?s WHERE { ?s ?p ?o }"
+        language = self.adapter.query_language
+        if language == "sparql":
+            query = GraphQuery(query=sparql_query)
+        elif self.translator.supports(language):
+            query = self.translator.compile(sparql_query, language)
+        else:
+            self.log(f"Skipping sample query: SPARQL can't be translated to {language}")
+            return
+        adapter = await registry.connect(self.adapter)
+        result = await adapter.execute_query(query)
+        self.log(f"Query result: {result.data}")
+
+    def stream_data(self, data_source: str, diff: Optional[RecordDiff] = None) -> dict:
+        """Send a file to enrichment in batches.
+
+        Each batch is its own enrich message carrying the stream's id and
+        a sequence number. A final message with ``"eos": True`` and the
+        batch count marks the end of the stream. Only one batch is held in
+        memory at a time. If reading fails, the end message carries the
+        error.
+
+        Args:
+            data_source: Path of the file to stream
+            diff: Diff against the source's last ingest; each batch then
+                sends only its new and changed records, with their entity
+                ids under ``"ids"``, and batches with none are skipped
+
+        Returns:
+            The stream id, number of batches sent and any read error
+        """
+        stream_id = uuid.uuid4().hex
+        seq = 0
+        end = {"task": "enrich", "stream_id": stream_id, "eos": True}
+        try:
+            for batch in read_batches(data_source, self.batch_size, self.span_size):
+                message = {"task": "enrich", "data": batch, "stream_id": stream_id, "seq": seq}
+                if diff is not None:
+                    changed, ids = diff.add(batch)
+                    if not changed:
+                        continue
+                    message.update(data=changed, ids=ids, source=data_source)
+                self.mq_client.send_message(message)
+                seq += 1
+        except Exception as e:
+            self.log(f"Failed to stream data after {seq} batches: {e}")
+            end["error"] = str(e)
+        self.mq_client.send_message({**end, "seq": seq})
+        result = {"stream_id": stream_id, "batches": seq}
+        if "error" in end:
+            result["error"] = end["error"]
+        return result
+
+    def _is_large(self, path: str) -> bool:
+        try:
+            return os.path.getsize(path) >= self.stream_threshold
+        except OSError:
+            return False
+
+    def extract_data(self, data_source: Union[str, dict]) -> Union[dict, list]:
         """Extract data from the source.
 
         Args:
             data_source: Source of the data to extract (file path or dictionary)
 
         Returns:
-            Extracted data as a dictionary
+            Extracted data: a dictionary, or a list of records
         """
         if isinstance(data_source, dict):
             return data_source
 
         try:
-            with open(data_source, "r") as file:
-                if data_source.endswith(".json"):
-                    return json.load(file)
-                elif data_source.endswith(".csv"):
-                    reader = csv.DictReader(file)
-                    return [row for row in reader]
-                else:
-                    return {"text": file.read()}
+            return extract_file(data_source)
         except Exception as e:
             self.log(f"Failed to extract data: {e}")
             return {}
 
+    def ingest(
+        self,
+        source: Union[str, Iterable[str]],
+        manifest: bool = False,
+        checkpoint: Optional[str] = None,
+        workers: Optional[int] = None,
+        index: Optional[str] = None,
+        key_field: Optional[str] = None,
+        loop: Optional[asyncio.AbstractEventLoop] = None
+    ) -> Dict[str, int]:
+        """Extract many files in parallel and send each to enrichment.
+
+        Files are parsed in a process pool, largest first so big files
+        don't finish last, and each is sent as soon as it's parsed, with
+        at most two files per worker in flight. Files of at least
+        ``stream_threshold`` bytes are streamed in batches from this
+        process instead, on a separate thread so the pool keeps getting
+        work meanwhile.
+
+        With an ``index`` the run is incremental: files whose size,
+        modification time or content hash are unchanged are skipped, a
+        changed file sends only its new and changed records (with their
+        entity ids under ``"ids"``), and once everything is sent the graph
+        entities of removed records and deleted files are retracted.
+        Retraction needs a ``key_field``: without one a record is known
+        only by its content hash, so an edited record can't be told apart
+        from a removed one. Entities whose key is still indexed under
+        another file are kept, as the graph merges them on that key.
+        Streamed files are diffed batch by batch the same way.
+
+        Args:
+            source: Directory, glob pattern, manifest or list of paths; see
+                ``resolve_sources``
+            manifest: Treat ``source`` as a manifest file
+            checkpoint: Progress file; files recorded there and unchanged
+                since are skipped, so an interrupted run can be resumed
+            workers: Worker processes, defaults to the number of cores
+            index: SQLite source index enabling incremental ingestion
+            key_field: Record field holding a stable key, used for entity
+                ids and retraction in incremental mode; see ``RecordDiff``
+            loop: Running event loop, on another thread, to retract
+                entities on so they use that loop's adapter; defaults to
+                the agent's persistent loop
+
+        Returns:
+            Counts of files sent, skipped as unchanged or already ingested,
+            and failed, and of entities retracted
+        """
+        progress = IngestCheckpoint(checkpoint) if checkpoint else None
+        sources = SourceIndex(index) if index else None
+        stats = {"sent": 0, "skipped": 0, "failed": 0, "retracted": 0}
+        jobs = []
+        for path in resolve_sources(source, manifest=manifest):
+            if progress is not None and path in progress:
+                stats["skipped"] += 1
+                continue
+            try:
+                signature = file_signature(path)
+            except OSError as e:
+                self.log(f"Failed to stat {path}: {e}")
+                stats["failed"] += 1
+                continue
+            state = sources.get(path) if sources is not None else None
+            if state is not None and (state.size, state.mtime_ns) == signature:
+                stats["skipped"] += 1
+                continue
+            jobs.append((path, signature, state.digest if state else None))
+        jobs.sort(key=lambda job: job[1][0], reverse=True)
+        large = [job for job in jobs if job[1][0] >= self.stream_threshold]
+        small = iter(job for job in jobs if job[1][0] < self.stream_threshold)
+        self.log(f"Ingesting {len(jobs)} files, skipping {stats['skipped']}")
+
+        # (path, entity ids) to retract once every file has been sent.
+        retractions: List[tuple] = []
+
+        def retract(ids: List[str]) -> None:
+            if loop is None:
+                self.run_coroutine(self.retract(ids))
+            else:
+                asyncio.run_coroutine_threadsafe(self.retract(ids), loop).result()
+            stats["retracted"] += len(ids)
+
+        def done(
+            path: str,
+            signature,
+            digest: Optional[str] = None,
+            entities: Optional[Dict[str, str]] = None,
+            retracted: Sequence[str] = ()
+        ) -> None:
+            # ``entities`` None means the content is unchanged.
+            if sources is not None and digest is not None:
+                if retracted:
+                    retractions.append((path, retracted))
+                sources.update(path, signature, digest, entities)
+            if progress is not None:
+                progress.mark(path, signature)
+
+        def stream_large() -> Dict[str, int]:
+            # Counted apart from ``stats``, which the main thread updates.
+            counts = {"sent": 0, "skipped": 0, "failed": 0}
+            for path, signature, previous in large:
+                digest = file_digest(path) if sources is not None else None
+                if digest is not None and digest == previous:
+                    counts["skipped"] += 1
+                    done(path, signature, digest)
+                    continue
+                diff = RecordDiff(path, sources.entities(path), key_field) if sources is not None else None
+                result = self.stream_data(path, diff)
+                if result.get("error"):
+                    counts["failed"] += 1
+                elif diff is None:
+                    counts["sent"] += 1
+                    done(path, signature)
+                else:
+                    counts["sent"] += 1
+                    done(path, signature, digest, diff.entities, diff.retracted())
+            return counts
+
+        workers = workers or os.cpu_count() or 1
+        pending: Dict[Future, tuple] = {}
+        try:
+            with ProcessPoolExecutor(max_workers=workers) as pool, \
+                    ThreadPoolExecutor(max_workers=1) as streamer:
+                def submit() -> None:
+                    for job in small:
+                        future: Future
+                        if sources is not None:
+                            future = pool.submit(extract_if_changed, job[0], job[2])
+                        else:
+                            future = pool.submit(extract_file, job[0])
+                        pending[future] = job
+                        if len(pending) >= 2 * workers:
+                            return
+
+                submit()
+                # ``done`` touches just the thread-safe index and
+                # checkpoint, and a list append, from the streaming thread.
+                streaming = streamer.submit(stream_large)
+                while pending:
+                    finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        path, signature, _ = pending.pop(future)
+                        try:
+                            result = future.result()
+                        except Exception as e:
+                            self.log(f"Failed to extract {path}: {e}")
+                            stats["failed"] += 1
+                            continue
+                        if sources is None:
+                            self.mq_client.send_message({"task": "enrich", "data": result, "source": path})
+                            stats["sent"] += 1
+                            done(path, signature)
+                            continue
+                        digest, data = result
+                        if data is None:
+                            stats["skipped"] += 1
+                            done(path, signature, digest)
+                            continue
+                        delta = diff_records(path, data, sources.entities(path), key_field)
+                        if delta.ids:
+                            self.mq_client.send_message(
+                                {"task": "enrich", "data": delta.data, "ids": delta.ids, "source": path}
+                            )
+                        stats["sent"] += 1
+                        done(path, signature, digest, delta.entities, delta.retracted)
+                    submit()
+                for key, count in streaming.result().items():
+                    stats[key] += count
+            if sources is not None:
+                for path in sources.missing():
+                    retractions.append((path, sources.remove(path)))
+                keys = sources.keys()
+                ids = [
+                    entity_id for path, retracted in retractions for entity_id in retracted
+                    if entity_key(path, entity_id) not in keys
+                ]
+                if ids:
+                    retract(ids)
+        finally:
+            if progress is not None:
+                progress.close()
+            if sources is not None:
+                sources.close()
+        self.log(f"Ingest finished: {stats}")
+        return stats
+
+    async def retract(self, entity_ids: List[str]) -> None:
+        """Delete the graph entities produced from records that are gone.
+
+        Entities are matched on their ``entity_id`` property, which
+        requires a Cypher backend.
+
+        Args:
+            entity_ids: Entity ids from the source index
+        """
+        if self.adapter.query_language != "cypher":
+            self.log(f"Cannot retract {len(entity_ids)} entities from a {self.adapter.query_language} backend")
+            return
+        query = GraphQuery(
+            query=f"MATCH (n) WHERE n.{ENTITY_ID_PROPERTY} IN $ids DETACH DELETE n",
+            parameters={"ids": entity_ids}
+        )
+        await self._execute(query)
+
+    async def _execute(self, query: GraphQuery):
+        adapter = await registry.connect(self.adapter)
+        return await adapter.execute_query(query)
+
     def start_listening(self):
         """Start listening for incoming messages."""
         self.mq_client.receive_messages(self.handle_message)
 
-    def handle_message(self, message: dict):
+    async def handle_message_async(self, message: dict):
         """Handle incoming messages."""
         self.log(f"Received message: {message}")
         if message.get("task") == "extract":
             data_source = message.get("data_source")
             if data_source:
-                asyncio.run(self.perform_task(data_source))
+                await self.perform_task(data_source, stream=message.get("stream"))
+        elif message.get("task") == "ingest":
+            source = message.get("source")
+            if source:
+                # Parsing happens in worker processes; keep this loop free,
+                # and retract on it so the adapter stays on one loop.
+                loop = asyncio.get_running_loop()
+                await loop.run_in_executor(
+                    None,
+                    lambda: self.ingest(
+                        source,
+                        manifest=message.get("manifest", False),
+                        checkpoint=message.get("checkpoint"),
+                        workers=message.get("workers"),
+                        index=message.get("index"),
+                        key_field=message.get("key_field"),
+                        loop=loop
+                    )
+                )
 
     def process_json_output(self, json_output: dict) -> dict:
         """Process the JSON output from the PDF upload.
@@ -0,0 +1,132 @@
+"""
+Fused single-process pipeline of the extraction, enrichment, validation and
+query processing agents.
+"""
+import threading
+from typing import Any, Dict, List, Optional, Union
+
+from knexgpt.communication.inprocess_queue import InProcessBroker
+from knexgpt.communication.message_queue import pipeline_mode
+from knexgpt.db.graph_loader import RecordMapping
+
+from .data_enrichment import DataEnrichmentAgent
+from .data_extraction import DataExtractionAgent
+from .query_processing import QueryProcessingAgent
+from .validation import ValidationAgent
+
+# (queue name, task handled there) for each stage, in pipeline order.
+STAGES = [
+    ("data_extraction", "extract"),
+    ("data_enrichment", "enrich"),
+    ("validation", "validate"),
+    ("query_processing", "process_query"),
+]
+
+Stage = Union[DataExtractionAgent, DataEnrichmentAgent, ValidationAgent, QueryProcessingAgent]
+
+class FusedPipeline:
+    """Runs the agents in one process, connected by in-process queues.
+
+    The agents are created in the 'fused' pipeline mode, so their message
+    queue clients are ``InProcessQueue``s on a private broker and messages
+    move between stages by reference. Each stage consumes on its own
+    thread, and a full inter-stage buffer blocks the stage feeding it.
+
+    Usage::
+
+        with FusedPipeline("neo4j", db_config) as pipeline:
+            pipeline.extract("/data/inbox/report.csv")
+            pipeline.join()
+    """
+
+    def __init__(
+        self,
+        db_type: str,
+        db_config: dict,
+        buffer_size: int = 1000,
+        mappings: Optional[Dict[str, RecordMapping]] = None,
+        label_field: Optional[str] = None
+    ):
+        """Create the agents.
+
+        Args:
+            db_type: Graph database type for the extraction agent
+            db_config: Graph database settings
+            buffer_size: Capacity of each inter-stage buffer
+            mappings: Record mappings by class name; when given the
+                enrichment stage loads extracted records into the graph
+            label_field: Record field naming each record's class
+        """
+        self.broker = InProcessBroker(
+            maxsize=buffer_size,
+            routes={task: queue_name for queue_name, task in STAGES}
+        )
+        with pipeline_mode("fused", self.broker):
+            self.agents: List[Stage] = [
+                DataExtractionAgent(db_type, db_config),
+                DataEnrichmentAgent(db_type, db_config, mappings, label_field),
+                ValidationAgent(),
+                QueryProcessingAgent(),
+            ]
+        self._threads: List[threading.Thread] = []
+
+    def __enter__(self) -> "FusedPipeline":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def start(self) -> None:
+        """Start a consumer thread per stage."""
+        for agent in self.agents:
+            thread = threading.Thread(
+                target=agent.start_listening,
+                name=f"{agent.name}-consumer",
+                daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def submit(self, message: Dict[str, Any], timeout: Optional[float] = None) -> None:
+        """Feed a message into the stage handling its task.
+
+        Args:
+            message: Task message, e.g. ``{"task": "extract", ...}``
+            timeout: Seconds to wait for buffer room, or None to wait
+                indefinitely
+        """
+        self.broker.publish(STAGES[0][0], message, timeout=timeout)
+
+    def extract(self, data_source: Union[str, dict]) -> None:
+        """Feed a data source into the extraction stage.
+
+        Args:
+            data_source: File path or dictionary to extract
+        """
+        self.submit({"task": "extract", "data_source": data_source})
+
+    def lag(self) -> Dict[str, int]:
+        """Return the number of messages waiting at each stage."""
+        return {queue_name: self.broker.lag(queue_name) for queue_name, _ in STAGES}
+
+    def join(self) -> None:
+        """Wait until every submitted message has passed through all stages."""
+        # A stage only feeds later ones, so once a stage is drained nothing
+        # new can reach it.
+        for queue_name, _ in STAGES:
+            self.broker.join(queue_name)
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Stop the stages once they finish the messages already queued.
+
+        Args:
+            timeout: Seconds to wait for each consumer thread
+        """
+        # Closing in order lets upstream stages finish feeding each one.
+        for (queue_name, _), thread in zip(STAGES, self._threads):
+            self.broker.close(queue_name)
+            thread.join(timeout)
+        self._threads = []
+        for agent in self.agents:
+            agent.stop_loop()
@@ -1,6 +1,5 @@
 from .base import BaseAgent
 from knexgpt.communication.message_queue import MessageQueueClient
-import asyncio
 
 class QueryProcessingAgent(BaseAgent):
     """Agent responsible for query processing tasks."""
@@ -35,10 +34,13 @@ class QueryProcessingAgent(BaseAgent):
         """Start listening for incoming messages."""
         self.mq_client.receive_messages(self.handle_message)
 
-    def handle_message(self, message: dict):
+    async def handle_message_async(self, message: dict):
         """Handle incoming messages."""
         self.log(f"Received message: {message}")
         if message.get("task") == "process_query":
+            if message.get("eos"):
+                self.log(f"Finished stream {message.get('stream_id')} after {message.get('seq')} batches")
+                return
             query = message.get("data")
             if query:
-                asyncio.run(self.perform_task(query)) 
\ No newline at end of file
+                await self.perform_task(query) 
\ No newline at end of file
@@ -0,0 +1,352 @@
+"""
+Worker pool runtime for agents.
+"""
+import asyncio
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+import inspect
+import logging
+import signal
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from knexgpt.communication.async_base_queue import AsyncBaseQueue, Delivery
+
+from .base import BaseAgent
+
+logger = logging.getLogger(__name__)
+
+EXECUTION_MODES = ("async", "thread", "process")
+
+_thread_state = threading.local()
+_process_agent: Optional[BaseAgent] = None
+_process_loop: Optional[asyncio.AbstractEventLoop] = None
+
+def _handle_in_thread(
+    loops: List[asyncio.AbstractEventLoop],
+    agent: BaseAgent,
+    message: dict
+) -> None:
+    """Run an agent's handler on the calling pool thread's own event loop.
+
+    New loops are appended to ``loops`` so the runtime can close them.
+    """
+    loop = getattr(_thread_state, "loop", None)
+    if loop is None or loop.is_closed():
+        loop = _thread_state.loop = asyncio.new_event_loop()
+        loops.append(loop)
+    loop.run_until_complete(agent.handle_message_async(message))
+
+def _close_thread_loop(loop: asyncio.AbstractEventLoop) -> None:
+    """Disconnect the shared adapters a pool thread's loop used, then close it."""
+    from knexgpt.db.registry import registry
+
+    try:
+        loop.run_until_complete(registry.release_loop())
+    finally:
+        loop.close()
+
+def _default_factory(agent: BaseAgent) -> Optional[Callable[[], BaseAgent]]:
+    """Return the agent's class if it can be built without arguments."""
+    try:
+        inspect.signature(type(agent)).bind()
+    except TypeError:
+        return None
+    return type(agent)
+
+def _init_process(agent_factory: Callable[[], BaseAgent]) -> None:
+    """Create the worker process's agent and event loop."""
+    global _process_agent, _process_loop
+    _process_agent = agent_factory()
+    _process_loop = asyncio.new_event_loop()
+
+def _handle_in_process(message: dict) -> None:
+    if _process_loop is None or _process_agent is None:
+        raise RuntimeError("Worker process was not initialized")
+    _process_loop.run_until_complete(_process_agent.handle_message_async(message))
+
+class AgentRuntime:
+    """Runs an agent's message handler in a pool of concurrent task slots.
+
+    Handlers run as asyncio tasks (``mode='async'``, for I/O-bound agents),
+    in a thread pool (``'thread'``, for blocking code) or in a process pool
+    (``'process'``, for CPU-bound work; each process builds its own agent
+    with ``agent_factory``). In a thread pool each thread runs handlers on
+    its own event loop and so gets its own connected instance of shared
+    database adapters (see ``AdapterRegistry``); they are disconnected and
+    the loops closed when the runtime stops.
+
+    The number of slots adapts between ``min_concurrency`` and
+    ``max_concurrency``: it grows while the queue has a backlog and task
+    latency stays within ``latency_tolerance`` times the best latency seen,
+    shrinks when latency degrades past that, and decays when idle. Pulling
+    stops while any ``downstream`` queue's backlog exceeds
+    ``max_downstream_lag`` and resumes once it halves. On SIGTERM or
+    SIGINT the runtime stops pulling, finishes in-flight messages and
+    returns.
+    """
+
+    def __init__(
+        self,
+        agent: BaseAgent,
+        queue: AsyncBaseQueue,
+        mode: str = "async",
+        min_concurrency: int = 1,
+        max_concurrency: int = 32,
+        latency_tolerance: float = 2.0,
+        downstream: Sequence[AsyncBaseQueue] = (),
+        max_downstream_lag: int = 10000,
+        adjust_interval: float = 5.0,
+        drain_timeout: Optional[float] = 30.0,
+        agent_factory: Optional[Callable[[], BaseAgent]] = None
+    ):
+        """Initialize the runtime.
+
+        Args:
+            agent: Agent whose ``handle_message_async`` processes messages
+            queue: Queue to consume from
+            mode: 'async', 'thread' or 'process'
+            min_concurrency: Lower bound on task slots
+            max_concurrency: Upper bound on task slots
+            latency_tolerance: Allowed ratio of current to best task latency
+                before concurrency is reduced
+            downstream: Queues this agent feeds, checked for backpressure
+            max_downstream_lag: Downstream backlog that pauses pulling
+            adjust_interval: Seconds between concurrency adjustments
+            drain_timeout: Seconds to wait for in-flight messages on
+                shutdown, or None to wait indefinitely
+            agent_factory: Picklable callable building the agent in worker
+                processes; defaults to the agent's class, and is required
+                in process mode for agents that take arguments
+
+        Raises:
+            ValueError: For an unknown mode, bad concurrency bounds, or
+                process mode without a usable agent factory
+        """
+        if mode not in EXECUTION_MODES:
+            raise ValueError(f"Unsupported execution mode: {mode}")
+        if not 1 <= min_concurrency <= max_concurrency:
+            raise ValueError("Expected 1 <= min_concurrency <= max_concurrency")
+        self.agent = agent
+        self.queue = queue
+        self.mode = mode
+        self.min_concurrency = min_concurrency
+        self.max_concurrency = max_concurrency
+        self.latency_tolerance = latency_tolerance
+        self.downstream = list(downstream)
+        self.max_downstream_lag = max_downstream_lag
+        self.adjust_interval = adjust_interval
+        self.drain_timeout = drain_timeout
+        self.agent_factory = agent_factory or _default_factory(agent)
+        if mode == "process" and self.agent_factory is None:
+            raise ValueError(
+                f"{type(agent).__name__} can't be built without arguments; "
+                "process mode needs an agent_factory"
+            )
+
+        self.limit = min_concurrency
+        self.active = 0
+        self.processed = 0
+        self.failed = 0
+        self.paused = False
+        self.lag: Optional[int] = None
+        self.latency: Optional[float] = None
+        self.best_latency: Optional[float] = None
+        self._executor: Optional[Executor] = None
+        self._thread_loops: List[asyncio.AbstractEventLoop] = []
+        self._changed: Optional[asyncio.Condition] = None
+        self._stopping: Optional[asyncio.Event] = None
+
+    def stats(self) -> Dict[str, Any]:
+        """Return current concurrency, backlog and throughput counters."""
+        return {
+            "mode": self.mode,
+            "limit": self.limit,
+            "active": self.active,
+            "paused": self.paused,
+            "lag": self.lag,
+            "latency": self.latency,
+            "processed": self.processed,
+            "failed": self.failed,
+        }
+
+    def stop(self) -> None:
+        """Stop pulling messages and drain; must be called on the runtime's loop."""
+        if self._stopping is not None and not self._stopping.is_set():
+            self._stopping.set()
+            asyncio.get_running_loop().create_task(self._wake())
+
+    def _signals(self) -> Tuple[asyncio.Condition, asyncio.Event]:
+        """Return the slot condition and stop event of the current run."""
+        if self._changed is None or self._stopping is None:
+            raise RuntimeError("AgentRuntime is not running")
+        return self._changed, self._stopping
+
+    async def _wake(self) -> None:
+        changed, _ = self._signals()
+        async with changed:
+            changed.notify_all()
+
+    def serve(self) -> None:
+        """Connect the queue and run until SIGTERM or SIGINT, then drain."""
+        asyncio.run(self._serve())
+
+    async def _serve(self) -> None:
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            loop.add_signal_handler(sig, self.stop)
+        await self.queue.connect()
+        try:
+            await self.run()
+        finally:
+            await self.queue.close()
+
+    async def run(self) -> None:
+        """Consume from the connected queue until stopped, then drain."""
+        self._changed = asyncio.Condition()
+        self._stopping = stop_event = asyncio.Event()
+        if self.mode == "thread":
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_concurrency,
+                thread_name_prefix=f"{self.agent.name}-worker"
+            )
+        elif self.mode == "process":
+            if self.agent_factory is None:
+                raise ValueError("process mode needs an agent_factory")
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_concurrency,
+                initializer=partial(_init_process, self.agent_factory)
+            )
+        tasks = set()
+        controller = asyncio.create_task(self._control())
+        deliveries = self.queue.__aiter__()
+        stopping = asyncio.create_task(stop_event.wait())
+        try:
+            while not stop_event.is_set():
+                if not await self._acquire():
+                    break
+                fetch = asyncio.ensure_future(deliveries.__anext__())
+                await asyncio.wait({fetch, stopping}, return_when=asyncio.FIRST_COMPLETED)
+                if not fetch.done():
+                    fetch.cancel()
+                    await self._release()
+                    break
+                try:
+                    delivery = fetch.result()
+                except StopAsyncIteration:
+                    await self._release()
+                    break
+                task = asyncio.create_task(self._process(delivery))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        finally:
+            controller.cancel()
+            stopping.cancel()
+            if tasks:
+                logger.info(f"[{self.agent.name}] Draining {len(tasks)} in-flight messages")
+                _, pending = await asyncio.wait(tasks, timeout=self.drain_timeout)
+                for task in pending:
+                    task.cancel()
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+                self._executor = None
+            await self._close_thread_loops()
+
+    async def _close_thread_loops(self) -> None:
+        loops, self._thread_loops = self._thread_loops, []
+        for loop in loops:
+            if loop.is_running():
+                # A handler that outlived the drain timeout still runs on it.
+                logger.warning(f"[{self.agent.name}] Leaving a busy worker loop open")
+                continue
+            try:
+                await asyncio.get_running_loop().run_in_executor(None, _close_thread_loop, loop)
+            except Exception as e:
+                logger.warning(f"[{self.agent.name}] Failed to close a worker loop: {e!r}")
+
+    async def _acquire(self) -> bool:
+        """Wait for a free slot while not paused; False if stopping."""
+        changed, stop_event = self._signals()
+        async with changed:
+            await changed.wait_for(
+                lambda: stop_event.is_set() or (not self.paused and self.active < self.limit)
+            )
+            if stop_event.is_set():
+                return False
+            self.active += 1
+            return True
+
+    async def _release(self) -> None:
+        changed, _ = self._signals()
+        async with changed:
+            self.active -= 1
+            changed.notify_all()
+
+    async def _process(self, delivery: Delivery) -> None:
+        start = time.monotonic()
+        try:
+            if self.mode == "async":
+                await self.agent.handle_message_async(delivery.body)
+            else:
+                loop = asyncio.get_running_loop()
+                if self.mode == "thread":
+                    await loop.run_in_executor(
+                        self._executor, _handle_in_thread, self._thread_loops, self.agent, delivery.body
+                    )
+                else:
+                    await loop.run_in_executor(self._executor, _handle_in_process, delivery.body)
+        except Exception as e:
+            self.failed += 1
+            self.agent.log(f"Failed to handle message: {e!r}")
+            await delivery.nack()
+        else:
+            self.processed += 1
+            self._observe(time.monotonic() - start)
+            await delivery.ack()
+        finally:
+            await self._release()
+
+    def _observe(self, elapsed: float) -> None:
+        self.latency = elapsed if self.latency is None else 0.8 * self.latency + 0.2 * elapsed
+        if self.best_latency is None or self.latency < self.best_latency:
+            self.best_latency = self.latency
+
+    async def _control(self) -> None:
+        """Periodically adjust concurrency and apply downstream backpressure."""
+        changed, _ = self._signals()
+        while True:
+            await asyncio.sleep(self.adjust_interval)
+            try:
+                self.lag = await self.queue.lag()
+                downstream_lags = [await queue.lag() or 0 for queue in self.downstream]
+            except Exception as e:
+                logger.warning(f"[{self.agent.name}] Failed to read queue lag: {e!r}")
+                continue
+            async with changed:
+                self._adjust(max(downstream_lags, default=0))
+                changed.notify_all()
+
+    def _adjust(self, downstream_lag: int) -> None:
+        if self.paused:
+            self.paused = downstream_lag > self.max_downstream_lag // 2
+        else:
+            self.paused = downstream_lag > self.max_downstream_lag
+        if self.paused:
+            return
+
+        degraded = (
+            self.latency is not None
+            and self.best_latency is not None
+            and self.latency > self.best_latency * self.latency_tolerance
+        )
+        saturated = self.active >= self.limit
+        if degraded:
+            self.limit = max(self.min_concurrency, int(self.limit * 0.75))
+            # Forget the old baseline so a slower steady state can settle.
+            self.best_latency = self.latency
+        elif saturated and (self.lag is None or self.lag > 0):
+            # Without a lag reading, full slots are the backlog signal.
+            self.limit = min(self.max_concurrency, self.limit + max(1, self.limit // 4))
+        elif not self.lag and self.active < self.limit // 2:
+            self.limit = max(self.min_concurrency, self.limit - 1)
@@ -1,6 +1,7 @@
-from .base import BaseAgent
+from typing import Optional
+
+from .base import BaseAgent, stream_fields
 from knexgpt.communication.message_queue import MessageQueueClient
-import asyncio
 
 class ValidationAgent(BaseAgent):
     """Agent responsible for validation tasks."""
@@ -9,15 +10,16 @@ class ValidationAgent(BaseAgent):
         super().__init__(name="ValidationAgent")
         self.mq_client = MessageQueueClient(queue_name="validation")
     
-    async def perform_task(self, data: dict, *args, **kwargs):
+    async def perform_task(self, data: dict, *args, stream: Optional[dict] = None, **kwargs):
         """Validate the data for consistency.
         
         Args:
             data: Data to validate
+            stream: Stream fields of the batch, passed on downstream
         """
         self.log("Validating data")
         validation_results = self.validate_data(data)
-        self.mq_client.send_message({"task": "process_query", "data": validation_results})
+        self.mq_client.send_message({"task": "process_query", "data": validation_results, **(stream or {})})
         return validation_results
     
     def validate_data(self, data: dict) -> dict:
@@ -36,10 +38,14 @@ class ValidationAgent(BaseAgent):
         """Start listening for incoming messages."""
         self.mq_client.receive_messages(self.handle_message)
 
-    def handle_message(self, message: dict):
+    async def handle_message_async(self, message: dict):
         """Handle incoming messages."""
         self.log(f"Received message: {message}")
         if message.get("task") == "validate":
+            if message.get("eos"):
+                # End of a streamed source; pass the marker downstream.
+                self.mq_client.send_message({"task": "process_query", **stream_fields(message)})
+                return
             data = message.get("data")
             if data:
-                asyncio.run(self.perform_task(data)) 
\ No newline at end of file
+                await self.perform_task(data, stream=stream_fields(message)) 
\ No newline at end of file
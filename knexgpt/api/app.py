@@ -1,21 +1,103 @@
+from contextlib import asynccontextmanager
+import logging
+import os
+import threading
+
 from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel
 from knexgpt.querying.rag import RAG
 from knexgpt.querying.nl_to_cypher import NLToCypher
 
-app = FastAPI()
+logger = logging.getLogger(__name__)
+
+# Set to 0 to load models on the first query instead of at startup.
+WARMUP_ENV = "KNEXGPT_WARMUP"
+# Consecutive failed loads of a model after which /health fails, so the
+# pod is restarted.
+MAX_LOAD_FAILURES_ENV = "KNEXGPT_MAX_LOAD_FAILURES"
+
+WARMUP = os.environ.get(WARMUP_ENV, "1") != "0"
+MAX_LOAD_FAILURES = int(os.environ.get(MAX_LOAD_FAILURES_ENV, "5"))
+
+# Models are loaded on first use; constructing these is cheap.
 rag = RAG()
 nl_to_cypher = NLToCypher()
 
+MODELS = {"rag": rag.generator, "nl_to_cypher": nl_to_cypher.translator}
+
+_stopping = threading.Event()
+
+def gave_up(model) -> bool:
+    return model.state == "failed" and model.failures >= MAX_LOAD_FAILURES
+
+def warm_up() -> None:
+    """Load every model, retrying failed loads until all are loaded.
+
+    Stops early once a model has failed ``MAX_LOAD_FAILURES`` times, as
+    /health then fails and the pod is restarted.
+    """
+    while not _stopping.is_set():
+        pending = [model for model in MODELS.values() if model.state != "ready"]
+        if not pending or any(gave_up(model) for model in pending):
+            return
+        for model in pending:
+            try:
+                model.load()
+            except Exception:
+                # Logged by the model; retried after its delay.
+                pass
+        waits = [model.retry_in() for model in pending if model.state != "ready"]
+        if waits:
+            _stopping.wait(max(min(waits), 0.1))
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Load in the background so the server accepts connections meanwhile.
+    if WARMUP:
+        _stopping.clear()
+        threading.Thread(target=warm_up, name="model-warm-up", daemon=True).start()
+    yield
+    _stopping.set()
+
+app = FastAPI(lifespan=lifespan)
+
 class QueryRequest(BaseModel):
     query: str
 
+@app.get("/health")
+async def health():
+    """Liveness: 503 once a model has failed to load too many times."""
+    failed = [name for name, model in MODELS.items() if gave_up(model)]
+    if failed:
+        return JSONResponse({"status": "failed", "models": failed}, status_code=503)
+    return {"status": "ok"}
+
+@app.get("/ready")
+async def ready():
+    """Readiness: 200 once every model is loaded, 503 until then.
+
+    Without warm-up, models only load on the first query, so not-yet-loaded
+    (or failed but retrying) models don't hold the pod back.
+    """
+    models = {name: model.status() for name, model in MODELS.items()}
+    if WARMUP:
+        is_ready = all(model.state == "ready" for model in MODELS.values())
+    else:
+        is_ready = not any(gave_up(model) for model in MODELS.values())
+    return JSONResponse(
+        {"status": "ready" if is_ready else "not_ready", "models": models},
+        status_code=200 if is_ready else 503
+    )
+
 @app.post("/query")
 async def query_knowledge_graph(request: QueryRequest):
+    # Model calls block (and may load the model), so keep them off the event loop.
     # Translate natural language to Cypher
-    cypher_query = nl_to_cypher.translate(request.query)
+    cypher_query = await run_in_threadpool(nl_to_cypher.translate, request.query)
     # Retrieve context from the knowledge graph (mocked for now)
     context = "Sample context from the knowledge graph."
     # Generate a response using RAG
-    response = rag.generate_response(context, request.query)
-    return {"response": response} 
\ No newline at end of file
+    response = await run_in_threadpool(rag.generate_response, context, request.query)
+    return {"response": response}
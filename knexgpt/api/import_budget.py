@@ -0,0 +1,67 @@
+"""
+Import-time budget check for the API app.
+
+Imports a module in a fresh interpreter, times it and checks that no
+heavy module (``torch``, ``transformers``) was pulled in. Exits non-zero
+when either check fails, so it can gate CI or a container build::
+
+    python -m knexgpt.api.import_budget --budget 1.5
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+from typing import Any, Dict, Sequence
+
+IMPORT_BUDGET_ENV = "KNEXGPT_IMPORT_BUDGET"
+DEFAULT_BUDGET = 2.0
+HEAVY_MODULES = ("torch", "transformers")
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+seconds = time.perf_counter() - start
+heavy = [name for name in {heavy!r} if name in sys.modules]
+print(json.dumps({{"seconds": seconds, "heavy": heavy}}))
+"""
+
+def measure_import(module: str = "knexgpt.api.app", heavy: Sequence[str] = HEAVY_MODULES) -> Dict[str, Any]:
+    """Import a module in a fresh interpreter.
+
+    Args:
+        module: Module to import
+        heavy: Modules that must not be imported along with it
+
+    Returns:
+        ``seconds`` taken and the ``heavy`` modules that were imported
+    """
+    env = {**os.environ, "KNEXGPT_WARMUP": "0"}
+    output = subprocess.run(
+        [sys.executable, "-c", _PROBE.format(module=module, heavy=tuple(heavy))],
+        check=True, capture_output=True, text=True, env=env
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--module", default="knexgpt.api.app")
+    parser.add_argument(
+        "--budget", type=float,
+        default=float(os.environ.get(IMPORT_BUDGET_ENV, DEFAULT_BUDGET)),
+        help="Seconds the import may take"
+    )
+    parser.add_argument("--runs", type=int, default=3, help="Imports to time; the fastest counts")
+    args = parser.parse_args(argv)
+
+    results = [measure_import(args.module) for _ in range(args.runs)]
+    seconds = min(result["seconds"] for result in results)
+    heavy = sorted({name for result in results for name in result["heavy"]})
+    print(f"import {args.module}: {seconds:.3f}s (budget {args.budget:.3f}s)")
+    if heavy:
+        print(f"Heavy modules imported: {', '.join(heavy)}")
+    return 0 if seconds <= args.budget and not heavy else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,88 @@
+from abc import ABC, abstractmethod
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterable, Optional
+
+class Delivery:
+    """A received message, settled with ``ack`` or ``nack`` once processed."""
+
+    __slots__ = ("body", "_ack", "_nack")
+
+    def __init__(
+        self,
+        body: Dict[str, Any],
+        ack: Callable[[], Awaitable[None]],
+        nack: Callable[[bool], Awaitable[None]]
+    ):
+        self.body = body
+        self._ack = ack
+        self._nack = nack
+
+    async def ack(self) -> None:
+        """Mark the message as processed."""
+        await self._ack()
+
+    async def nack(self, requeue: bool = True) -> None:
+        """Reject the message.
+
+        Args:
+            requeue: Deliver the message again instead of dropping it
+        """
+        await self._nack(requeue)
+
+class AsyncBaseQueue(ABC):
+    """Abstract base class for asyncio message queue communication.
+
+    Iterating the queue yields ``Delivery`` objects; several can be in
+    flight at once, and each must be acked or nacked::
+
+        async with queue:
+            async for delivery in queue:
+                ...
+                await delivery.ack()
+    """
+
+    @abstractmethod
+    async def connect(self) -> None:
+        """Open the connection."""
+        pass
+
+    @abstractmethod
+    async def send_message(self, message: Dict[str, Any]) -> None:
+        """Send a message to the queue."""
+        pass
+
+    async def send_messages(self, messages: Iterable[Dict[str, Any]]) -> int:
+        """Send several messages to the queue.
+
+        Returns:
+            Number of messages sent
+        """
+        count = 0
+        for message in messages:
+            await self.send_message(message)
+            count += 1
+        return count
+
+    async def lag(self) -> Optional[int]:
+        """Return the number of messages waiting to be delivered.
+
+        Returns:
+            Backlog size, or None if the backend can't tell
+        """
+        return None
+
+    @abstractmethod
+    def __aiter__(self) -> AsyncIterator[Delivery]:
+        """Receive messages from the queue."""
+        pass
+
+    @abstractmethod
+    async def close(self) -> None:
+        """Close the connection."""
+        pass
+
+    async def __aenter__(self) -> "AsyncBaseQueue":
+        await self.connect()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
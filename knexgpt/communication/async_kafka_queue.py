@@ -0,0 +1,137 @@
+from aiokafka import AIOKafkaConsumer, AIOKafkaProducer, TopicPartition
+import asyncio
+import time
+from collections import OrderedDict
+from functools import partial
+from typing import Any, AsyncIterator, Dict, Iterable, Optional
+from .async_base_queue import AsyncBaseQueue, Delivery
+from .codec import CodecSpec, get_codec
+
+class AsyncKafkaQueue(AsyncBaseQueue):
+    """asyncio Kafka client for message queue communication.
+
+    Messages can be acked out of order. For each partition, offsets are
+    committed up to the oldest message still being processed, at most
+    every ``commit_interval`` seconds and on ``close``. A nack with
+    ``requeue`` rewinds the partition to that message, so messages after
+    it may be delivered again.
+    """
+
+    def __init__(
+        self,
+        topic: str,
+        bootstrap_servers: str = 'localhost:9092',
+        group_id: str = 'mygroup',
+        linger_ms: int = 5,
+        compression: Optional[str] = 'lz4',
+        commit_interval: float = 1.0,
+        codec: CodecSpec = None
+    ):
+        """Initialize the Kafka client.
+
+        Args:
+            topic: Topic to produce to and consume from
+            bootstrap_servers: Kafka bootstrap servers
+            group_id: Consumer group id
+            linger_ms: Milliseconds the producer waits to fill a batch
+            compression: Batch compression codec, or None
+            commit_interval: Minimum seconds between offset commits
+            codec: Message codec, defaults to plain JSON
+        """
+        self.topic = topic
+        self.commit_interval = commit_interval
+        self.codec = get_codec(codec)
+        self.producer = AIOKafkaProducer(
+            bootstrap_servers=bootstrap_servers,
+            linger_ms=linger_ms,
+            compression_type=compression
+        )
+        self.consumer = AIOKafkaConsumer(
+            topic,
+            bootstrap_servers=bootstrap_servers,
+            group_id=group_id,
+            auto_offset_reset='earliest',
+            enable_auto_commit=False
+        )
+        # Offsets delivered but not yet committed, per partition, mapped
+        # to whether they've been processed.
+        self._pending: Dict[TopicPartition, "OrderedDict[int, bool]"] = {}
+        self._committable: Dict[TopicPartition, int] = {}
+        self._last_commit = 0.0
+
+    async def connect(self) -> None:
+        await self.producer.start()
+        await self.consumer.start()
+
+    async def send_message(self, message: Dict[str, Any]) -> None:
+        await self.producer.send_and_wait(self.topic, self.codec.encode(message))
+
+    async def send_messages(self, messages: Iterable[Dict[str, Any]]) -> int:
+        """Send several messages, batched by the producer.
+
+        Returns:
+            Number of messages sent
+        """
+        futures = [
+            await self.producer.send(self.topic, self.codec.encode(message))
+            for message in messages
+        ]
+        await asyncio.gather(*futures)
+        return len(futures)
+
+    async def lag(self) -> Optional[int]:
+        """Return how far this consumer is behind the end of its partitions."""
+        partitions = list(self.consumer.assignment())
+        if not partitions:
+            return None
+        end_offsets = await self.consumer.end_offsets(partitions)
+        lag = 0
+        for tp in partitions:
+            lag += max(0, end_offsets[tp] - await self.consumer.position(tp))
+        return lag
+
+    async def __aiter__(self) -> AsyncIterator[Delivery]:
+        async for msg in self.consumer:
+            tp = TopicPartition(msg.topic, msg.partition)
+            self._pending.setdefault(tp, OrderedDict())[msg.offset] = False
+            yield Delivery(
+                self.codec.decode(msg.value),
+                partial(self._ack, tp, msg.offset),
+                partial(self._nack, tp, msg.offset)
+            )
+
+    async def _ack(self, tp: TopicPartition, offset: int) -> None:
+        pending = self._pending.get(tp)
+        if pending is None or offset not in pending:
+            return
+        pending[offset] = True
+        # Advance the partition's watermark past every processed offset.
+        while pending:
+            first = next(iter(pending))
+            if not pending[first]:
+                break
+            del pending[first]
+            self._committable[tp] = first + 1
+        if time.monotonic() - self._last_commit >= self.commit_interval:
+            await self.commit()
+
+    async def _nack(self, tp: TopicPartition, offset: int, requeue: bool) -> None:
+        if not requeue:
+            await self._ack(tp, offset)
+            return
+        pending = self._pending.get(tp, OrderedDict())
+        for later in [o for o in pending if o >= offset]:
+            del pending[later]
+        self.consumer.seek(tp, offset)
+
+    async def commit(self) -> None:
+        """Commit the offsets of all contiguously processed messages."""
+        self._last_commit = time.monotonic()
+        if self._committable:
+            offsets, self._committable = self._committable, {}
+            await self.consumer.commit(offsets)
+
+    async def close(self) -> None:
+        await self.producer.stop()
+        await self.commit()
+        await self.consumer.stop()
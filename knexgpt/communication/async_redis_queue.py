@@ -0,0 +1,160 @@
+import os
+import socket
+import time
+from functools import partial
+from typing import Any, AsyncIterator, Dict, Iterable, Optional
+
+from redis import asyncio as aioredis
+from redis.exceptions import ResponseError
+
+from .async_base_queue import AsyncBaseQueue, Delivery
+from .codec import CodecSpec, get_codec
+
+class AsyncRedisQueue(AsyncBaseQueue):
+    """asyncio Redis Streams client for message queue communication.
+
+    Same stream layout and consumer-group semantics as ``RedisStreamQueue``,
+    so sync and async agents can share a queue. A nack with ``requeue``
+    leaves the entry pending until it's reclaimed after ``claim_idle_ms``.
+    """
+
+    def __init__(
+        self,
+        queue_name: str,
+        host: str = 'localhost',
+        port: int = 6379,
+        group: str = 'agents',
+        consumer: Optional[str] = None,
+        batch_size: int = 100,
+        block_ms: int = 5000,
+        claim_idle_ms: int = 60000,
+        maxlen: Optional[int] = None,
+        codec: CodecSpec = None
+    ):
+        """Initialize the Redis Streams client.
+
+        Args:
+            queue_name: Stream key
+            host: Redis host
+            port: Redis port
+            group: Consumer group name
+            consumer: Consumer name, unique per replica; defaults to
+                host name and process id
+            batch_size: Entries read per call and sends per pipeline
+            block_ms: Milliseconds a read blocks waiting for entries
+            claim_idle_ms: Milliseconds before another consumer's pending
+                entry is reclaimed
+            maxlen: Optional approximate stream length cap
+            codec: Message codec, defaults to plain JSON
+        """
+        self.queue_name = queue_name
+        self.group = group
+        self.consumer = consumer or f"{socket.gethostname()}-{os.getpid()}"
+        self.batch_size = batch_size
+        self.block_ms = block_ms
+        self.claim_idle_ms = claim_idle_ms
+        self.maxlen = maxlen
+        self.codec = get_codec(codec)
+        self._next_claim = 0.0
+        self.client = aioredis.StrictRedis(host=host, port=port)
+
+    async def connect(self) -> None:
+        try:
+            await self.client.xgroup_create(self.queue_name, self.group, id='0', mkstream=True)
+        except ResponseError as e:
+            if 'BUSYGROUP' not in str(e):
+                raise
+
+    async def send_message(self, message: Dict[str, Any]) -> None:
+        await self.client.xadd(
+            self.queue_name,
+            {'data': self.codec.encode(message)},
+            maxlen=self.maxlen,
+            approximate=True
+        )
+
+    async def send_messages(self, messages: Iterable[Dict[str, Any]]) -> int:
+        """Send several messages, pipelining ``batch_size`` per round trip.
+
+        Returns:
+            Number of messages sent
+        """
+        count = 0
+        pipe = self.client.pipeline(transaction=False)
+        for message in messages:
+            pipe.xadd(
+                self.queue_name,
+                {'data': self.codec.encode(message)},
+                maxlen=self.maxlen,
+                approximate=True
+            )
+            count += 1
+            if count % self.batch_size == 0:
+                await pipe.execute()
+        await pipe.execute()
+        return count
+
+    async def lag(self) -> Optional[int]:
+        """Return the number of entries not yet delivered to the group.
+
+        Needs Redis 7, which reports consumer group lag.
+        """
+        for info in await self.client.xinfo_groups(self.queue_name):
+            name = info['name']
+            if (name.decode() if isinstance(name, bytes) else name) == self.group:
+                return info.get('lag')
+        return None
+
+    async def __aiter__(self) -> AsyncIterator[Delivery]:
+        while True:
+            entries = await self._reclaim()
+            if not entries:
+                response = await self.client.xreadgroup(
+                    self.group,
+                    self.consumer,
+                    {self.queue_name: '>'},
+                    count=self.batch_size,
+                    block=self.block_ms
+                )
+                entries = response[0][1] if response else []
+            for entry_id, fields in entries:
+                if not fields:
+                    # Deleted or trimmed while pending; drop it from the
+                    # pending list.
+                    await self._ack(entry_id)
+                else:
+                    yield Delivery(
+                        self.codec.decode(fields[b'data']),
+                        partial(self._ack, entry_id),
+                        partial(self._nack, entry_id)
+                    )
+
+    async def _reclaim(self):
+        """Claim entries stuck with dead consumers, at most once per ``claim_idle_ms``."""
+        now = time.monotonic()
+        if now < self._next_claim:
+            return []
+        self._next_claim = now + self.claim_idle_ms / 1000
+        response = await self.client.xautoclaim(
+            self.queue_name,
+            self.group,
+            self.consumer,
+            min_idle_time=self.claim_idle_ms,
+            start_id='0-0',
+            count=self.batch_size
+        )
+        entries = response[1]
+        if len(entries) == self.batch_size:
+            # More may be stuck; check again on the next read.
+            self._next_claim = now
+        return entries
+
+    async def _ack(self, entry_id: str) -> None:
+        await self.client.xack(self.queue_name, self.group, entry_id)
+
+    async def _nack(self, entry_id: str, requeue: bool) -> None:
+        if not requeue:
+            await self._ack(entry_id)
+
+    async def close(self) -> None:
+        await self.client.close()
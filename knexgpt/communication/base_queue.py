@@ -3,6 +3,9 @@ from typing import Any, Dict
 
 class BaseQueue(ABC):
     """Abstract base class for message queue communication."""
+
+    # Whether a message whose callback raised is delivered again.
+    redelivers_failed: bool = True
     
     @abstractmethod
     def send_message(self, message: Dict[str, Any]) -> None:
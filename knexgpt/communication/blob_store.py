@@ -0,0 +1,364 @@
+"""
+Claim-check offloading of large message payloads.
+
+Large message values are written once to a content-addressed blob store on
+local disk and replaced in the message by a small reference. Consumers get
+a ``LazyBlob`` that memory-maps the blob and decodes it only when its value
+is used, and forwarding a ``LazyBlob`` in another message sends the
+reference again instead of the payload.
+
+Each blob counts the messages in flight that reference it. A consumer
+releases a message's references once its callback succeeds, or fails on a
+queue that won't deliver the message again, and ``gc`` deletes blobs that
+are no longer referenced.
+"""
+from contextlib import contextmanager
+import hashlib
+import mmap
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from .base_queue import BaseQueue
+from .codec import Codec, CodecSpec, get_codec
+
+# Directory of the default store; claim checks are off when unset.
+BLOB_STORE_ENV = "KNEXGPT_BLOB_STORE"
+# Smallest encoded value, in bytes, offloaded by the default claim check.
+CLAIM_CHECK_THRESHOLD_ENV = "KNEXGPT_CLAIM_CHECK_THRESHOLD"
+
+# Key marking a blob reference inside a message.
+REF_KEY = "$blob"
+
+class BlobRef(NamedTuple):
+    digest: str
+    size: int
+
+class BlobStore:
+    """Content-addressed blob files with reference counts.
+
+    Blobs are stored under ``root`` by SHA-256 digest, so identical payloads
+    are written once. Reference counts live in an SQLite database next to
+    them, so producers and consumers in several processes on the same host
+    can share a store.
+    """
+
+    def __init__(self, root: str):
+        """Open or create a store.
+
+        Args:
+            root: Directory holding the blobs
+        """
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(
+            os.path.join(root, "refs.sqlite"),
+            timeout=30,
+            isolation_level=None,
+            check_same_thread=False
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS refs (digest TEXT PRIMARY KEY, count INTEGER NOT NULL)"
+        )
+
+    def path(self, ref: BlobRef) -> str:
+        return os.path.join(self.root, ref.digest[:2], ref.digest[2:])
+
+    def put(self, data: bytes) -> BlobRef:
+        """Store a payload, or reference the identical blob already stored.
+
+        Args:
+            data: Encoded payload
+
+        Returns:
+            Reference to the blob, counted once
+        """
+        ref = BlobRef(hashlib.sha256(data).hexdigest(), len(data))
+        path = self.path(ref)
+        # Write outside the lock when the blob looks new; the check that
+        # counts is the one under the lock below.
+        tmp = _write_temp(path, data) if not os.path.exists(path) else None
+        try:
+            with self._transaction():
+                self._db.execute(
+                    "INSERT INTO refs VALUES (?, 1) "
+                    "ON CONFLICT(digest) DO UPDATE SET count = count + 1",
+                    (ref.digest,)
+                )
+                # gc deletes files under the same lock, so a file present
+                # here stays until this reference is released.
+                if not os.path.exists(path):
+                    if tmp is None:
+                        tmp = _write_temp(path, data)
+                    os.replace(tmp, path)
+                    tmp = None
+        finally:
+            if tmp is not None:
+                # Another writer published the same blob first.
+                os.remove(tmp)
+        return ref
+
+    def incref(self, ref: BlobRef, count: int = 1) -> None:
+        """Add references to a stored blob."""
+        with self._transaction():
+            updated = self._db.execute(
+                "UPDATE refs SET count = count + ? WHERE digest = ?", (count, ref.digest)
+            ).rowcount
+            if not updated or not os.path.exists(self.path(ref)):
+                raise KeyError(f"Blob {ref.digest} is not stored")
+
+    def release(self, ref: BlobRef, count: int = 1) -> None:
+        """Drop references to a blob; unreferenced blobs are deleted by ``gc``."""
+        with self._transaction():
+            self._db.execute(
+                "UPDATE refs SET count = count - ? WHERE digest = ?", (count, ref.digest)
+            )
+
+    def refcount(self, ref: BlobRef) -> int:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT count FROM refs WHERE digest = ?", (ref.digest,)
+            ).fetchone()
+        return row[0] if row else 0
+
+    def open(self, ref: BlobRef) -> mmap.mmap:
+        """Memory-map a blob read-only.
+
+        Args:
+            ref: Blob reference
+
+        Returns:
+            Read-only map of the blob; close it when done
+        """
+        with open(self.path(ref), "rb") as file:
+            return mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def gc(self, tmp_age: float = 3600) -> int:
+        """Delete unreferenced blobs and abandoned partial writes.
+
+        Args:
+            tmp_age: Seconds after which a partial write is abandoned
+
+        Returns:
+            Number of blobs deleted
+        """
+        with self._transaction():
+            digests = [
+                row[0] for row in self._db.execute("SELECT digest FROM refs WHERE count <= 0")
+            ]
+            self._db.execute("DELETE FROM refs WHERE count <= 0")
+            for digest in digests:
+                try:
+                    os.remove(self.path(BlobRef(digest, 0)))
+                except FileNotFoundError:
+                    pass
+        cutoff = time.time() - tmp_age
+        for directory, _, files in os.walk(self.root):
+            for name in files:
+                path = os.path.join(directory, name)
+                if name.endswith(".tmp") and os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+        return len(digests)
+
+    def close(self) -> None:
+        self._db.close()
+
+    @contextmanager
+    def _transaction(self) -> Iterator[None]:
+        # The thread lock guards the shared connection; BEGIN IMMEDIATE
+        # serializes writers in other processes.
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                yield
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+            self._db.execute("COMMIT")
+
+def _write_temp(path: str, data: bytes) -> str:
+    """Write data to a temporary file next to ``path`` and return its path."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    with os.fdopen(fd, "wb") as file:
+        file.write(data)
+    return tmp
+
+class LazyBlob:
+    """A message value held in the blob store, decoded on first use."""
+
+    def __init__(self, store: BlobStore, ref: BlobRef):
+        self.store = store
+        self.ref = ref
+        self._value: Any = None
+        self._loaded = False
+
+    def __repr__(self) -> str:
+        return f"LazyBlob({self.ref.digest[:12]}, {self.ref.size} bytes)"
+
+    @property
+    def value(self) -> Any:
+        """The decoded value."""
+        if not self._loaded:
+            with self.store.open(self.ref) as blob:
+                view = memoryview(blob)
+                try:
+                    self._value = _decoder.decode(view)
+                finally:
+                    view.release()
+            self._loaded = True
+        return self._value
+
+    def buffer(self) -> mmap.mmap:
+        """Memory-map the encoded blob without copying it; close when done."""
+        return self.store.open(self.ref)
+
+# Decodes blobs written with any codec.
+_decoder = Codec()
+
+class ClaimCheck:
+    """Swaps large message values for blob references and back.
+
+    Args:
+        store: Blob store shared by producers and consumers
+        threshold: Smallest encoded value, in bytes, to offload
+        codec: Codec for offloaded values, defaults to plain JSON
+    """
+
+    def __init__(self, store: BlobStore, threshold: int = 256 * 1024, codec: CodecSpec = None):
+        self.store = store
+        self.threshold = threshold
+        self.codec = get_codec(codec)
+
+    @classmethod
+    def from_env(cls) -> Optional["ClaimCheck"]:
+        """Build the claim check configured by ``KNEXGPT_BLOB_STORE``, if any."""
+        root = os.environ.get(BLOB_STORE_ENV)
+        if not root:
+            return None
+        threshold = os.environ.get(CLAIM_CHECK_THRESHOLD_ENV)
+        if threshold:
+            return cls(BlobStore(root), threshold=int(threshold))
+        return cls(BlobStore(root))
+
+    def check_in(self, message: Dict[str, Any]) -> Dict[str, Any]:
+        """Prepare a message for sending.
+
+        ``LazyBlob`` values anywhere in the message are sent as references,
+        and top-level values encoding to at least ``threshold`` bytes are
+        offloaded. Each reference sent is counted.
+
+        Args:
+            message: Message to send
+
+        Returns:
+            Message with references in place of large values
+        """
+        checked = {}
+        for key, value in message.items():
+            value, refs = self._refer(value)
+            if not refs and isinstance(value, (dict, list, str)):
+                data = self.codec.encode(value)
+                if len(data) >= self.threshold:
+                    value = _marker(self.store.put(data))
+            checked[key] = value
+        return checked
+
+    def check_out(self, message: Any) -> Tuple[Any, List[BlobRef]]:
+        """Replace references in a received message with ``LazyBlob``s.
+
+        Args:
+            message: Decoded message
+
+        Returns:
+            The message and the references it carried, to ``release`` once
+            it has been processed
+        """
+        refs: List[BlobRef] = []
+        return self._resolve(message, refs), refs
+
+    def release(self, refs: List[BlobRef]) -> None:
+        for ref in refs:
+            self.store.release(ref)
+
+    def wrap(
+        self,
+        callback: Callable[[Any], None],
+        release_on_failure: bool = False
+    ) -> Callable[[Any], None]:
+        """Wrap a message callback to check messages out and release them.
+
+        References are released once the callback succeeds. When it raises
+        they are kept, so a redelivered message still finds its blobs,
+        unless ``release_on_failure`` says the queue won't deliver a failed
+        message again.
+
+        Args:
+            callback: Message callback
+            release_on_failure: Also release references when the callback
+                raises, for queues that drop or dead-letter failed messages
+        """
+        def process(message: Any) -> None:
+            message, refs = self.check_out(message)
+            try:
+                callback(message)
+            except BaseException:
+                if release_on_failure:
+                    self.release(refs)
+                raise
+            self.release(refs)
+
+        return process
+
+    def _refer(self, value: Any) -> Tuple[Any, bool]:
+        """Replace ``LazyBlob``s with counted references, copying only
+        containers that hold one."""
+        if isinstance(value, LazyBlob):
+            self.store.incref(value.ref)
+            return _marker(value.ref), True
+        if isinstance(value, dict):
+            entries = [(k, self._refer(v)) for k, v in value.items()]
+            if any(found for _, (_, found) in entries):
+                return {k: v for k, (v, _) in entries}, True
+        elif isinstance(value, list):
+            items = [self._refer(v) for v in value]
+            if any(found for _, found in items):
+                return [v for v, _ in items], True
+        return value, False
+
+    def _resolve(self, value: Any, refs: List[BlobRef]) -> Any:
+        if isinstance(value, dict):
+            if len(value) == 2 and REF_KEY in value:
+                ref = BlobRef(value[REF_KEY], value["size"])
+                refs.append(ref)
+                return LazyBlob(self.store, ref)
+            return {k: self._resolve(v, refs) for k, v in value.items()}
+        if isinstance(value, list):
+            return [self._resolve(v, refs) for v in value]
+        return value
+
+def _marker(ref: BlobRef) -> Dict[str, Any]:
+    return {REF_KEY: ref.digest, "size": ref.size}
+
+class ClaimCheckQueue(BaseQueue):
+    """Wraps a queue so large payloads travel through a blob store."""
+
+    def __init__(self, queue: BaseQueue, claim_check: ClaimCheck):
+        self.queue = queue
+        self.claim_check = claim_check
+
+    def send_message(self, message: Dict[str, Any]) -> None:
+        self.queue.send_message(self.claim_check.check_in(message))
+
+    def receive_messages(self, callback) -> None:
+        self.queue.receive_messages(
+            self.claim_check.wrap(callback, release_on_failure=not self.queue.redelivers_failed)
+        )
+
+    def close(self) -> None:
+        self.queue.close()
+        self.claim_check.store.gc()
@@ -0,0 +1,184 @@
+"""
+Message codecs for queue payloads.
+
+Encoded messages start with a three byte header: a marker byte (``0xC1``,
+which begins neither valid JSON nor valid MessagePack), the wire format and
+the compression. Plain JSON without compression is written without a
+header, so it stays readable by consumers that predate codecs, and
+headerless payloads are decoded as JSON. Any consumer can therefore decode
+messages from producers using any codec.
+"""
+import json
+from typing import Any, Callable, Dict, Optional, Tuple, Union
+
+MARKER = 0xC1
+
+# Wire format ids. 'json' and 'orjson' share the JSON wire format.
+WIRE_FORMATS = {"json": 1, "orjson": 1, "msgpack": 2}
+COMPRESSIONS = {None: 0, "zstd": 1, "lz4": 2}
+
+# Payloads are decoded from any of these without copying.
+BytesLike = Union[bytes, bytearray, memoryview]
+
+def _require(module: str, feature: str):
+    try:
+        return __import__(module, fromlist=["_"])
+    except ImportError as e:
+        raise ImportError(f"{module} is required for {feature}") from e
+
+def _json_codec(name: str) -> Tuple[Callable[[Any], bytes], Callable[[BytesLike], Any]]:
+    if name == "orjson":
+        orjson = _require("orjson", "the orjson codec")
+        return (
+            lambda obj: orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS),
+            orjson.loads
+        )
+    try:
+        # Decode with orjson when it's installed, whichever encoder was used.
+        import orjson
+        loads = orjson.loads
+    except ImportError:
+        def loads(data):
+            return json.loads(bytes(data) if isinstance(data, memoryview) else data)
+    return (lambda obj: json.dumps(obj).encode("utf-8"), loads)
+
+def _msgpack_codec() -> Tuple[Callable[[Any], bytes], Callable[[BytesLike], Any]]:
+    msgpack = _require("msgpack", "the msgpack codec")
+    return (
+        lambda obj: msgpack.packb(obj, use_bin_type=True),
+        lambda data: msgpack.unpackb(data, raw=False)
+    )
+
+def _compressor(name: str, level: Optional[int]) -> Tuple[Callable[[bytes], bytes], Callable[[BytesLike], bytes]]:
+    if name == "zstd":
+        zstandard = _require("zstandard", "zstd compression")
+        compressor = zstandard.ZstdCompressor(level=3 if level is None else level)
+        decompressor = zstandard.ZstdDecompressor()
+        # Frames written by compress() record their size, so decompress()
+        # needs no output bound.
+        return compressor.compress, decompressor.decompress
+    lz4_frame = _require("lz4.frame", "lz4 compression")
+    return (
+        lambda data: lz4_frame.compress(data, compression_level=level or 0),
+        lz4_frame.decompress
+    )
+
+class Codec:
+    """Encodes messages to bytes and decodes messages from any codec.
+
+    Args:
+        format: 'json', 'orjson' (faster, same wire format) or 'msgpack'
+        compression: None, 'zstd' or 'lz4'
+        threshold: Payloads smaller than this many bytes aren't compressed
+        level: Optional compression level
+    """
+
+    def __init__(
+        self,
+        format: str = "json",
+        compression: Optional[str] = None,
+        threshold: int = 1024,
+        level: Optional[int] = None
+    ):
+        if format not in WIRE_FORMATS:
+            raise ValueError(f"Unsupported codec format: {format}")
+        if compression not in COMPRESSIONS:
+            raise ValueError(f"Unsupported compression: {compression}")
+        self.format = format
+        self.compression = compression
+        self.threshold = threshold
+        self.level = level
+        self._wire = WIRE_FORMATS[format]
+        if format == "msgpack":
+            self._dumps, _ = _msgpack_codec()
+        else:
+            self._dumps, _ = _json_codec(format)
+        self._compress = _compressor(compression, level)[0] if compression else None
+        # Decoders are created on first use, for whatever producers send.
+        self._loads: Dict[int, Callable[[BytesLike], Any]] = {}
+        self._decompress: Dict[int, Callable[[BytesLike], bytes]] = {}
+
+    def __repr__(self) -> str:
+        return f"Codec(format={self.format!r}, compression={self.compression!r})"
+
+    def encode(self, message: Any) -> bytes:
+        """Encode a message.
+
+        Args:
+            message: JSON- or MessagePack-serializable message
+
+        Returns:
+            Encoded bytes, with a header unless plain uncompressed JSON
+        """
+        payload = self._dumps(message)
+        compression = 0
+        if self._compress is not None and len(payload) >= self.threshold:
+            compressed = self._compress(payload)
+            # Incompressible payloads are sent as they are.
+            if len(compressed) < len(payload):
+                payload = compressed
+                compression = COMPRESSIONS[self.compression]
+        if self._wire == 1 and compression == 0:
+            return payload
+        return bytes((MARKER, self._wire, compression)) + payload
+
+    def decode(self, data: Union[BytesLike, str]) -> Any:
+        """Decode a message encoded by any codec, or legacy plain JSON.
+
+        Args:
+            data: Encoded message
+
+        Returns:
+            Decoded message
+        """
+        if isinstance(data, str):
+            return json.loads(data)
+        if not data or data[0] != MARKER:
+            return self._decoder(1)(data)
+        wire, compression = data[1], data[2]
+        payload: BytesLike = memoryview(data)[3:]
+        if compression:
+            payload = self._decompressor(compression)(payload)
+        return self._decoder(wire)(payload)
+
+    def _decoder(self, wire: int) -> Callable[[BytesLike], Any]:
+        loads = self._loads.get(wire)
+        if loads is None:
+            if wire == 1:
+                loads = _json_codec("json")[1]
+            elif wire == 2:
+                loads = _msgpack_codec()[1]
+            else:
+                raise ValueError(f"Unknown message format id: {wire}")
+            self._loads[wire] = loads
+        return loads
+
+    def _decompressor(self, compression: int) -> Callable[[BytesLike], bytes]:
+        decompress = self._decompress.get(compression)
+        if decompress is None:
+            names = {value: name for name, value in COMPRESSIONS.items() if name is not None}
+            if compression not in names:
+                raise ValueError(f"Unknown compression id: {compression}")
+            decompress = self._decompress[compression] = _compressor(names[compression], None)[1]
+        return decompress
+
+# A codec, format name or ``Codec`` settings, as accepted by queue clients.
+CodecSpec = Union[None, str, Dict[str, Any], Codec]
+
+def get_codec(codec: CodecSpec) -> Codec:
+    """Build a codec from a format name, settings dict or existing codec.
+
+    Args:
+        codec: None for plain JSON, a format name, ``Codec`` keyword
+            arguments, or a ``Codec``
+
+    Returns:
+        Codec instance
+    """
+    if codec is None:
+        return Codec()
+    if isinstance(codec, Codec):
+        return codec
+    if isinstance(codec, str):
+        return Codec(format=codec)
+    return Codec(**codec)
@@ -0,0 +1,124 @@
+"""
+Micro-benchmark of message codecs on representative agent payloads.
+
+Run with ``python -m knexgpt.communication.codec_benchmark``. Codecs whose
+optional libraries aren't installed are skipped.
+"""
+import argparse
+from functools import lru_cache
+import random
+import string
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from .codec import Codec
+
+CODECS = [
+    ("json", None),
+    ("orjson", None),
+    ("msgpack", None),
+    ("json", "zstd"),
+    ("orjson", "zstd"),
+    ("msgpack", "zstd"),
+    ("orjson", "lz4"),
+    ("msgpack", "lz4"),
+]
+
+@lru_cache(maxsize=None)
+def _vocabulary() -> Tuple[str, ...]:
+    rng = random.Random(1)
+    return tuple(
+        "".join(rng.choices(string.ascii_lowercase, k=rng.randint(2, 10)))
+        for _ in range(2000)
+    )
+
+def _words(rng: random.Random, count: int) -> str:
+    # Draw from a fixed vocabulary so text compresses like natural language.
+    return " ".join(rng.choices(_vocabulary(), k=count))
+
+def sample_payloads(seed: int = 0) -> Dict[str, Dict[str, Any]]:
+    """Build payloads shaped like the agents' messages.
+
+    Returns:
+        Payloads by name: a small task message, an extracted CSV document
+        and an extracted text document
+    """
+    rng = random.Random(seed)
+    return {
+        "task": {"task": "extract", "data_source": "/data/inbox/report-2024-01.csv"},
+        "csv_rows": {
+            "task": "enrich",
+            "data": [
+                {
+                    "id": str(i),
+                    "name": _words(rng, 2),
+                    "category": rng.choice(["person", "organization", "place"]),
+                    "score": str(round(rng.random(), 4)),
+                    "description": _words(rng, 12),
+                }
+                for i in range(500)
+            ],
+        },
+        "document": {
+            "task": "enrich",
+            "data": {
+                "text": _words(rng, 20000),
+                "metadata": {"title": _words(rng, 6), "author": _words(rng, 2), "pages": 42},
+            },
+        },
+    }
+
+def benchmark(
+    payloads: Optional[Dict[str, Dict[str, Any]]] = None,
+    repeat: int = 200
+) -> List[Dict[str, Any]]:
+    """Time each available codec on each payload.
+
+    Args:
+        payloads: Payloads by name, defaults to ``sample_payloads()``
+        repeat: Encode/decode round trips per measurement
+
+    Returns:
+        One row per codec and payload with encoded size and mean encode
+        and decode times in microseconds
+    """
+    payloads = payloads or sample_payloads()
+    rows = []
+    for format, compression in CODECS:
+        try:
+            codec = Codec(format=format, compression=compression)
+        except ImportError:
+            continue
+        for name, payload in payloads.items():
+            encoded = codec.encode(payload)
+            start = time.perf_counter()
+            for _ in range(repeat):
+                codec.encode(payload)
+            encode_time = (time.perf_counter() - start) / repeat
+            start = time.perf_counter()
+            for _ in range(repeat):
+                codec.decode(encoded)
+            decode_time = (time.perf_counter() - start) / repeat
+            rows.append({
+                "codec": format + (f"+{compression}" if compression else ""),
+                "payload": name,
+                "bytes": len(encoded),
+                "encode_us": encode_time * 1e6,
+                "decode_us": decode_time * 1e6,
+            })
+    return rows
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=200, help="round trips per measurement")
+    args = parser.parse_args()
+    rows = benchmark(repeat=args.repeat)
+    print(f"{'payload':<10} {'codec':<16} {'bytes':>10} {'encode us':>11} {'decode us':>11}")
+    for row in sorted(rows, key=lambda row: (row["payload"], row["codec"])):
+        print(
+            f"{row['payload']:<10} {row['codec']:<16} {row['bytes']:>10} "
+            f"{row['encode_us']:>11.1f} {row['decode_us']:>11.1f}"
+        )
+
+if __name__ == "__main__":
+    main()
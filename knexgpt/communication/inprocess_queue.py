@@ -0,0 +1,138 @@
+import logging
+import queue
+import threading
+from typing import Any, Dict, Iterable, Optional
+
+from .base_queue import BaseQueue
+
+logger = logging.getLogger(__name__)
+
+# Put on a channel to stop its consumers.
+_CLOSED = object()
+
+class InProcessBroker:
+    """Named, bounded in-memory channels shared by queues in one process.
+
+    Messages are passed by reference: nothing is serialized or copied, so
+    producers must not mutate a message after sending it. A full channel
+    blocks senders until its consumer catches up, which gives backpressure
+    between pipeline stages.
+
+    ``routes`` maps a message's ``task`` to the channel that handles it,
+    overriding the queue it was sent on. Agents publish follow-up tasks on
+    their own queue, and routes deliver them to the next stage instead.
+    """
+
+    def __init__(self, maxsize: int = 1000, routes: Optional[Dict[str, str]] = None):
+        """Initialize the broker.
+
+        Args:
+            maxsize: Capacity of each channel, or 0 for unbounded
+            routes: Channel name by message task
+        """
+        self.maxsize = maxsize
+        self.routes = dict(routes or {})
+        self._channels: Dict[str, queue.Queue] = {}
+        self._lock = threading.Lock()
+
+    def channel(self, name: str) -> queue.Queue:
+        """Return the named channel, creating it on first use."""
+        with self._lock:
+            channel = self._channels.get(name)
+            if channel is None:
+                channel = self._channels[name] = queue.Queue(self.maxsize)
+            return channel
+
+    def publish(self, queue_name: str, message: Any, timeout: Optional[float] = None) -> None:
+        """Put a message on a channel, following the task routes.
+
+        Args:
+            queue_name: Channel the message was sent on
+            message: Message object, passed by reference
+            timeout: Seconds to wait for room, or None to wait indefinitely
+        """
+        if isinstance(message, dict) and message.get("task") in self.routes:
+            queue_name = self.routes[message["task"]]
+        self.channel(queue_name).put(message, timeout=timeout)
+
+    def lag(self, queue_name: str) -> int:
+        """Return the number of messages waiting on a channel."""
+        return self.channel(queue_name).qsize()
+
+    def join(self, queue_name: str) -> None:
+        """Wait until every message put on a channel has been processed."""
+        self.channel(queue_name).join()
+
+    def close(self, queue_name: str) -> None:
+        """Stop the channel's consumer once it reaches the messages queued so far."""
+        self.channel(queue_name).put(_CLOSED)
+
+default_broker = InProcessBroker()
+
+class InProcessQueue(BaseQueue):
+    """In-process client for message queue communication.
+
+    Sends and receives Python objects through an ``InProcessBroker``
+    without serializing them. Thread-safe: any number of threads may send,
+    and each receiving thread takes messages one at a time.
+    """
+
+    redelivers_failed = False
+
+    def __init__(self, queue_name: str, broker: Optional[InProcessBroker] = None, **kwargs):
+        """Initialize the in-process client.
+
+        Args:
+            queue_name: Channel to send to and receive from
+            broker: Broker holding the channels, defaults to the process-wide
+                ``default_broker``
+            **kwargs: Ignored, so the client accepts other backends' settings
+        """
+        self.queue_name = queue_name
+        self.broker = broker or default_broker
+
+    def send_message(self, message: Dict[str, Any]) -> None:
+        self.broker.publish(self.queue_name, message)
+
+    def send_messages(self, messages: Iterable[Dict[str, Any]]) -> int:
+        """Send several messages.
+
+        Args:
+            messages: Messages to send
+
+        Returns:
+            Number of messages sent
+        """
+        count = 0
+        for message in messages:
+            self.broker.publish(self.queue_name, message)
+            count += 1
+        return count
+
+    def lag(self) -> int:
+        """Return the number of messages waiting to be received."""
+        return self.broker.lag(self.queue_name)
+
+    def receive_messages(self, callback) -> None:
+        """Receive messages until the queue is closed.
+
+        A message whose callback raises is logged and dropped.
+
+        Args:
+            callback: Function to call with each received message
+        """
+        channel = self.broker.channel(self.queue_name)
+        while True:
+            message = channel.get()
+            try:
+                if message is _CLOSED:
+                    return
+                callback(message)
+            except Exception:
+                logger.exception(f"Failed to process message from {self.queue_name}")
+            finally:
+                channel.task_done()
+
+    def close(self) -> None:
+        """Stop one consumer of this queue after the messages already queued."""
+        self.broker.close(self.queue_name)
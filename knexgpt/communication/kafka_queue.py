@@ -1,37 +1,215 @@
-from confluent_kafka import Producer, Consumer, KafkaError
-import json
-from typing import Any, Dict
+from confluent_kafka import Producer, Consumer, KafkaError, KafkaException, TopicPartition
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
 from .base_queue import BaseQueue
+from .codec import CodecSpec, get_codec
+
+# Called with (error, message) once the broker acknowledges or rejects a send.
+DeliveryCallback = Callable[[Optional[KafkaError], Dict[str, Any]], None]
 
 class KafkaQueue(BaseQueue):
-    """Kafka client for message queue communication."""
-    
-    def __init__(self, topic: str, bootstrap_servers: str = 'localhost:9092'):
+    """Kafka client for message queue communication.
+
+    Sends are batched by the producer: messages are queued locally and
+    delivered in compressed batches once ``linger_ms`` passes or a batch
+    fills up, instead of flushing after every message. Offsets are
+    committed manually once a batch has been processed, and the consumer
+    seeks back to a batch that failed so it's fetched again.
+    """
+
+    def __init__(
+        self,
+        topic: str,
+        bootstrap_servers: str = 'localhost:9092',
+        group_id: str = 'mygroup',
+        linger_ms: int = 5,
+        batch_size: int = 64 * 1024,
+        compression: str = 'lz4',
+        on_delivery: Optional[DeliveryCallback] = None,
+        producer_config: Optional[Dict[str, Any]] = None,
+        consumer_config: Optional[Dict[str, Any]] = None,
+        codec: CodecSpec = None
+    ):
+        """Initialize the Kafka client.
+
+        Args:
+            topic: Topic to produce to and consume from
+            bootstrap_servers: Kafka bootstrap servers
+            group_id: Consumer group id
+            linger_ms: Milliseconds the producer waits to fill a batch
+            batch_size: Maximum producer batch size in bytes
+            compression: Batch compression codec ('none', 'gzip', 'snappy',
+                'lz4' or 'zstd')
+            on_delivery: Optional callback reporting each message's delivery
+            producer_config: Extra producer settings
+            consumer_config: Extra consumer settings
+            codec: Message codec, defaults to plain JSON
+        """
         self.topic = topic
-        self.producer = Producer({'bootstrap.servers': bootstrap_servers})
+        self.codec = get_codec(codec)
+        self.on_delivery = on_delivery
+        self.delivered = 0
+        self.failed = 0
+        self.producer = Producer({
+            'bootstrap.servers': bootstrap_servers,
+            'linger.ms': linger_ms,
+            'batch.size': batch_size,
+            'compression.type': compression,
+            **(producer_config or {})
+        })
         self.consumer = Consumer({
             'bootstrap.servers': bootstrap_servers,
-            'group.id': 'mygroup',
-            'auto.offset.reset': 'earliest'
+            'group.id': group_id,
+            'auto.offset.reset': 'earliest',
+            'enable.auto.commit': False,
+            **(consumer_config or {})
         })
         self.consumer.subscribe([self.topic])
-    
+        # First and last offset consumed but not yet committed, per
+        # (topic, partition).
+        self._uncommitted: Dict[Tuple[str, int], Tuple[int, int]] = {}
+
     def send_message(self, message: Dict[str, Any]) -> None:
-        self.producer.produce(self.topic, json.dumps(message))
-        self.producer.flush()
-    
-    def receive_messages(self, callback) -> None:
+        """Queue a message for batched delivery without waiting for the broker."""
+        self._produce(message)
+        # Serve delivery callbacks for earlier sends.
+        self.producer.poll(0)
+
+    def send_messages(self, messages: Iterable[Dict[str, Any]]) -> int:
+        """Queue several messages for batched delivery.
+
+        Args:
+            messages: Messages to send
+
+        Returns:
+            Number of messages queued
+        """
+        count = 0
+        for message in messages:
+            self._produce(message)
+            count += 1
+            if count % 1000 == 0:
+                self.producer.poll(0)
+        self.producer.poll(0)
+        return count
+
+    def flush(self, timeout: Optional[float] = None) -> int:
+        """Wait for queued messages to be delivered.
+
+        Args:
+            timeout: Maximum seconds to wait, or None to wait indefinitely
+
+        Returns:
+            Number of messages still undelivered
+        """
+        if timeout is None:
+            return self.producer.flush()
+        return self.producer.flush(timeout)
+
+    def _produce(self, message: Dict[str, Any]) -> None:
+        payload = self.codec.encode(message)
+        callback = lambda err, msg: self._delivery_report(err, message)
         while True:
-            msg = self.consumer.poll(1.0)
-            if msg is None:
+            try:
+                self.producer.produce(self.topic, payload, on_delivery=callback)
+                return
+            except BufferError:
+                # The local queue is full; wait for deliveries to drain it.
+                self.producer.poll(0.1)
+
+    def _delivery_report(self, err: Optional[KafkaError], message: Dict[str, Any]) -> None:
+        if err is None:
+            self.delivered += 1
+        else:
+            self.failed += 1
+        if self.on_delivery is not None:
+            self.on_delivery(err, message)
+
+    def consume(self, num_messages: int = 100, timeout: float = 1.0) -> List[Dict[str, Any]]:
+        """Fetch a batch of messages without committing their offsets.
+
+        Call ``commit`` once the batch has been processed, or ``rewind`` if
+        it failed. If fetching or decoding fails, the consumer is rewound
+        before the error is raised, so no message of the batch is lost.
+
+        Args:
+            num_messages: Maximum number of messages to return
+            timeout: Maximum seconds to wait for messages
+
+        Returns:
+            Decoded messages, possibly fewer than requested
+        """
+        try:
+            raw = []
+            for msg in self.consumer.consume(num_messages, timeout):
+                if msg.error():
+                    if msg.error().code() == KafkaError._PARTITION_EOF:
+                        continue
+                    raise KafkaException(msg.error())
+                key = (msg.topic(), msg.partition())
+                first, _ = self._uncommitted.get(key, (msg.offset(), msg.offset()))
+                self._uncommitted[key] = (first, msg.offset())
+                raw.append(msg)
+            return [self.codec.decode(msg.value()) for msg in raw]
+        except Exception:
+            self.rewind()
+            raise
+
+    def commit(self) -> None:
+        """Commit the offsets of the messages returned by ``consume``."""
+        if not self._uncommitted:
+            return
+        offsets = [
+            TopicPartition(topic, partition, last + 1)
+            for (topic, partition), (_, last) in self._uncommitted.items()
+        ]
+        self.consumer.commit(offsets=offsets, asynchronous=False)
+        self._uncommitted = {}
+
+    def rewind(self) -> None:
+        """Seek back to the first uncommitted message of each partition.
+
+        The messages returned by ``consume`` since the last commit are then
+        fetched again.
+        """
+        uncommitted, self._uncommitted = self._uncommitted, {}
+        for (topic, partition), (first, _) in uncommitted.items():
+            self.consumer.seek(TopicPartition(topic, partition, first))
+
+    def receive_batches(
+        self,
+        callback: Callable[[List[Dict[str, Any]]], None],
+        num_messages: int = 100,
+        timeout: float = 1.0
+    ) -> None:
+        """Receive messages in batches, committing after each succeeds.
+
+        If the callback raises, the batch's offsets aren't committed and
+        the consumer seeks back to the batch before the error propagates,
+        so its messages are fetched again.
+
+        Args:
+            callback: Function to call with each batch of messages
+            num_messages: Maximum messages per batch
+            timeout: Maximum seconds to wait for a batch
+        """
+        while True:
+            messages = self.consume(num_messages, timeout)
+            if not messages:
                 continue
-            if msg.error():
-                if msg.error().code() == KafkaError._PARTITION_EOF:
-                    continue
-                else:
-                    break
-            message = json.loads(msg.value().decode('utf-8'))
-            callback(message)
-    
+            try:
+                callback(messages)
+            except Exception:
+                self.rewind()
+                raise
+            self.commit()
+
+    def receive_messages(self, callback) -> None:
+        def process(messages: List[Dict[str, Any]]) -> None:
+            for message in messages:
+                callback(message)
+
+        self.receive_batches(process)
+
     def close(self) -> None:
-        self.consumer.close() 
\ No newline at end of file
+        self.flush()
+        self.consumer.close()
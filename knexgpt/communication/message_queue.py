@@ -1,15 +1,71 @@
-import pika
-import json
-from typing import Any, Dict
+from contextlib import contextmanager
+import os
+import threading
+from typing import Any, Dict, Iterator, Optional
+from .blob_store import ClaimCheck
+from .inprocess_queue import InProcessBroker, InProcessQueue
+from .rabbitmq_queue import RabbitMQQueue
 
-class MessageQueueClient:
-    """Client for message queue communication using RabbitMQ."""
+PIPELINE_MODES = ("distributed", "fused")
+
+# Default mode for clients created outside ``pipeline_mode``.
+PIPELINE_MODE_ENV = "KNEXGPT_PIPELINE_MODE"
+
+_mode = threading.local()
+
+def get_pipeline_mode() -> str:
+    """Return the current pipeline mode, 'distributed' or 'fused'."""
+    mode = getattr(_mode, "value", None) or os.environ.get(PIPELINE_MODE_ENV, "distributed")
+    if mode not in PIPELINE_MODES:
+        raise ValueError(f"Unsupported pipeline mode: {mode}")
+    return mode
+
+@contextmanager
+def pipeline_mode(mode: str, broker: Optional[InProcessBroker] = None) -> Iterator[None]:
+    """Select the pipeline mode for clients created in this thread.
+
+    Args:
+        mode: 'distributed' for RabbitMQ or 'fused' for in-process queues
+        broker: Broker for fused clients, defaults to the process-wide one
+    """
+    if mode not in PIPELINE_MODES:
+        raise ValueError(f"Unsupported pipeline mode: {mode}")
+    previous = getattr(_mode, "value", None), getattr(_mode, "broker", None)
+    _mode.value, _mode.broker = mode, broker
+    try:
+        yield
+    finally:
+        _mode.value, _mode.broker = previous
+
+class MessageQueueClient(RabbitMQQueue):
+    """Client for message queue communication using RabbitMQ.
+
+    Consumes with prefetch, manual acks and a worker pool, and publishes
+    with publisher confirms, each send waiting for its own; see
+    ``RabbitMQQueue``. ``AsyncRabbitMQQueue`` confirms sends in batches.
+
+    Large payloads are offloaded to a blob store when ``claim_check`` is
+    given or ``KNEXGPT_BLOB_STORE`` is set; see ``ClaimCheck``.
+
+    In the 'fused' pipeline mode (see ``pipeline_mode``) an
+    ``InProcessQueue`` is returned instead, so agents run in one process
+    without a broker.
+    """
+
+    def __new__(cls, queue_name: str, host: str = 'localhost', **kwargs):
+        if get_pipeline_mode() == "fused":
+            return InProcessQueue(queue_name, broker=getattr(_mode, "broker", None))
+        return super().__new__(cls)
     
-    def __init__(self, queue_name: str, host: str = 'localhost'):
-        self.queue_name = queue_name
-        self.connection = pika.BlockingConnection(pika.ConnectionParameters(host=host))
-        self.channel = self.connection.channel()
-        self.channel.queue_declare(queue=queue_name)
+    def __init__(
+        self,
+        queue_name: str,
+        host: str = 'localhost',
+        claim_check: Optional[ClaimCheck] = None,
+        **kwargs
+    ):
+        super().__init__(queue_name, host=host, **kwargs)
+        self.claim_check = claim_check or ClaimCheck.from_env()
     
     def send_message(self, message: Dict[str, Any]) -> None:
         """Send a message to the queue.
@@ -17,31 +73,25 @@ class MessageQueueClient:
         Args:
             message: Message to send
         """
-        self.channel.basic_publish(
-            exchange='',
-            routing_key=self.queue_name,
-            body=json.dumps(message)
-        )
+        if self.claim_check is not None:
+            message = self.claim_check.check_in(message)
+        super().send_message(message)
         print(f"Sent message: {message}")
     
     def receive_messages(self, callback) -> None:
         """Receive messages from the queue.
         
+        Each message is acknowledged once the callback returns.
+        
         Args:
             callback: Function to call with each received message
         """
-        def on_message(ch, method, properties, body):
-            message = json.loads(body)
-            callback(message)
-        
-        self.channel.basic_consume(
-            queue=self.queue_name,
-            on_message_callback=on_message,
-            auto_ack=True
-        )
         print(f"Waiting for messages in {self.queue_name}. To exit press CTRL+C")
-        self.channel.start_consuming()
-    
+        if self.claim_check is not None:
+            callback = self.claim_check.wrap(callback, release_on_failure=not self.redelivers_failed)
+        super().receive_messages(callback)
+
     def close(self) -> None:
-        """Close the connection."""
-        self.connection.close() 
\ No newline at end of file
+        super().close()
+        if self.claim_check is not None:
+            self.claim_check.store.gc()
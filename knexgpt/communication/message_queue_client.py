@@ -1,19 +1,37 @@
 from typing import Any, Dict
+from .async_base_queue import AsyncBaseQueue
 from .base_queue import BaseQueue
+from .inprocess_queue import InProcessQueue
 from .kafka_queue import KafkaQueue
 from .rabbitmq_queue import RabbitMQQueue
 from .redis_queue import RedisQueue
+from .redis_stream_queue import RedisStreamQueue
 
 class MessageQueueClient:
     """Client for message queue communication."""
     
     def __init__(self, queue_type: str, **kwargs):
+        """Initialize the client.
+
+        Args:
+            queue_type: 'kafka', 'rabbitmq', 'redis' or 'inprocess'. Redis
+                uses a list unless ``mode='stream'`` selects Redis Streams
+                with consumer groups. 'inprocess' passes messages by
+                reference between threads of one process.
+            **kwargs: Arguments for the queue implementation
+        """
+        self.queue: BaseQueue
         if queue_type == 'kafka':
-            self.queue: BaseQueue = KafkaQueue(**kwargs)
+            self.queue = KafkaQueue(**kwargs)
         elif queue_type == 'rabbitmq':
-            self.queue: BaseQueue = RabbitMQQueue(**kwargs)
+            self.queue = RabbitMQQueue(**kwargs)
         elif queue_type == 'redis':
-            self.queue: BaseQueue = RedisQueue(**kwargs)
+            if kwargs.pop('mode', 'list') == 'stream':
+                self.queue = RedisStreamQueue(**kwargs)
+            else:
+                self.queue = RedisQueue(**kwargs)
+        elif queue_type == 'inprocess':
+            self.queue = InProcessQueue(**kwargs)
         else:
             raise ValueError(f"Unsupported queue type: {queue_type}")
     
@@ -24,4 +42,28 @@ class MessageQueueClient:
         self.queue.receive_messages(callback)
     
     def close(self) -> None:
-        self.queue.close() 
\ No newline at end of file
+        self.queue.close() 
+
+def create_async_queue(queue_type: str, **kwargs) -> AsyncBaseQueue:
+    """Create an asyncio queue client.
+
+    The async client libraries (aiokafka, aio-pika, redis.asyncio) are
+    imported only for the selected queue type.
+
+    Args:
+        queue_type: 'kafka', 'rabbitmq' or 'redis' (Redis Streams)
+        **kwargs: Arguments for the queue implementation
+
+    Returns:
+        An unconnected queue; use ``async with`` or ``connect()``
+    """
+    if queue_type == 'kafka':
+        from .async_kafka_queue import AsyncKafkaQueue
+        return AsyncKafkaQueue(**kwargs)
+    elif queue_type == 'rabbitmq':
+        from .async_rabbitmq_queue import AsyncRabbitMQQueue
+        return AsyncRabbitMQQueue(**kwargs)
+    elif queue_type == 'redis':
+        from .async_redis_queue import AsyncRedisQueue
+        return AsyncRedisQueue(**kwargs)
+    raise ValueError(f"Unsupported queue type: {queue_type}")
@@ -1,35 +1,155 @@
 import pika
-import json
-from typing import Any, Dict
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Set, TypeVar
 from .base_queue import BaseQueue
+from .codec import CodecSpec, get_codec
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
 
 class RabbitMQQueue(BaseQueue):
-    """RabbitMQ client for message queue communication."""
-    
-    def __init__(self, queue_name: str, host: str = 'localhost'):
+    """RabbitMQ client for message queue communication.
+
+    Consumers use a ``basic_qos`` prefetch window and acknowledge each
+    message only after its callback succeeds; failed messages are rejected
+    and requeued. Callbacks run on a pool of ``workers`` threads. pika
+    connections aren't thread-safe, so acks and sends from worker threads
+    are handed to the consuming thread.
+
+    Publishing goes through a dedicated channel with publisher confirms,
+    so a send returns once the broker has accepted the message and raises
+    ``pika.exceptions.NackError`` if it refused it. The blocking channel
+    waits for each message's confirm in turn; ``AsyncRabbitMQQueue``
+    confirms a batch of sends together.
+    """
+
+    def __init__(
+        self,
+        queue_name: str,
+        host: str = 'localhost',
+        prefetch: int = 32,
+        workers: int = 4,
+        requeue_on_failure: bool = True,
+        confirm: bool = True,
+        codec: CodecSpec = None
+    ):
+        """Initialize the RabbitMQ client.
+
+        Args:
+            queue_name: Queue to publish to and consume from
+            host: RabbitMQ host
+            prefetch: Maximum unacknowledged messages delivered to this
+                consumer
+            workers: Threads running message callbacks
+            requeue_on_failure: Requeue messages whose callback raised,
+                instead of dropping or dead-lettering them
+            confirm: Wait for the broker to accept published messages
+            codec: Message codec, defaults to plain JSON
+        """
         self.queue_name = queue_name
+        self.prefetch = prefetch
+        self.workers = workers
+        self.requeue_on_failure = requeue_on_failure
+        self.redelivers_failed = requeue_on_failure
+        self.confirm = confirm
+        self.codec = get_codec(codec)
         self.connection = pika.BlockingConnection(pika.ConnectionParameters(host=host))
         self.channel = self.connection.channel()
         self.channel.queue_declare(queue=queue_name)
-    
+        self._publish_channel = self.connection.channel()
+        if confirm:
+            self._publish_channel.confirm_delivery()
+        self._owner = threading.get_ident()
+        self._consuming = False
+        self._lock = threading.Lock()
+
     def send_message(self, message: Dict[str, Any]) -> None:
-        self.channel.basic_publish(
-            exchange='',
-            routing_key=self.queue_name,
-            body=json.dumps(message)
-        )
-    
+        self.send_messages([message])
+
+    def send_messages(self, messages: Iterable[Dict[str, Any]]) -> int:
+        """Publish several messages, each confirmed when ``confirm`` is set.
+
+        Args:
+            messages: Messages to send
+
+        Returns:
+            Number of messages sent
+        """
+        bodies = [self.codec.encode(message) for message in messages]
+
+        def publish() -> None:
+            for body in bodies:
+                self._publish_channel.basic_publish(
+                    exchange='',
+                    routing_key=self.queue_name,
+                    body=body
+                )
+
+        self._call(publish)
+        return len(bodies)
+
+    def _call(self, fn: Callable[[], T]) -> T:
+        """Run a channel operation on the thread that owns the connection."""
+        if not self._consuming or threading.get_ident() == self._owner:
+            with self._lock:
+                return fn()
+        future: Future = Future()
+
+        def run() -> None:
+            try:
+                future.set_result(fn())
+            except Exception as e:
+                future.set_exception(e)
+
+        self.connection.add_callback_threadsafe(run)
+        return future.result()
+
     def receive_messages(self, callback) -> None:
+        self.channel.basic_qos(prefetch_count=self.prefetch)
+        pool = ThreadPoolExecutor(max_workers=self.workers)
+        in_flight: Set[Future] = set()
+
+        def process(ch, delivery_tag: int, body: bytes) -> None:
+            try:
+                callback(self.codec.decode(body))
+            except Exception:
+                logger.exception(f"Failed to process message from {self.queue_name}")
+                settle = lambda: ch.basic_nack(
+                    delivery_tag=delivery_tag, requeue=self.requeue_on_failure
+                )
+            else:
+                settle = lambda: ch.basic_ack(delivery_tag=delivery_tag)
+            self.connection.add_callback_threadsafe(settle)
+
         def on_message(ch, method, properties, body):
-            message = json.loads(body)
-            callback(message)
-        
+            # At most ``prefetch`` messages are in flight, which bounds the
+            # pool's backlog.
+            in_flight.difference_update([future for future in in_flight if future.done()])
+            in_flight.add(pool.submit(process, ch, method.delivery_tag, body))
+
         self.channel.basic_consume(
             queue=self.queue_name,
             on_message_callback=on_message,
-            auto_ack=True
+            auto_ack=False
         )
-        self.channel.start_consuming()
-    
+        self._owner = threading.get_ident()
+        self._consuming = True
+        try:
+            self.channel.start_consuming()
+        finally:
+            # Let running callbacks finish, serving their acks and sends.
+            while any(not future.done() for future in in_flight):
+                self.connection.process_data_events(time_limit=0.1)
+            pool.shutdown()
+            self._consuming = False
+            self.connection.process_data_events(time_limit=0)
+
+    def stop_consuming(self) -> None:
+        """Stop ``receive_messages``; safe to call from any thread."""
+        self.connection.add_callback_threadsafe(self.channel.stop_consuming)
+
     def close(self) -> None:
-        self.connection.close() 
\ No newline at end of file
+        self.connection.close()
@@ -1,22 +1,29 @@
 import redis
-import json
 from typing import Any, Dict
 from .base_queue import BaseQueue
+from .codec import CodecSpec, get_codec
 
 class RedisQueue(BaseQueue):
     """Redis client for message queue communication."""
     
-    def __init__(self, queue_name: str, host: str = 'localhost', port: int = 6379):
+    def __init__(
+        self,
+        queue_name: str,
+        host: str = 'localhost',
+        port: int = 6379,
+        codec: CodecSpec = None
+    ):
         self.queue_name = queue_name
-        self.client = redis.StrictRedis(host=host, port=port, decode_responses=True)
+        self.codec = get_codec(codec)
+        self.client = redis.StrictRedis(host=host, port=port)
     
     def send_message(self, message: Dict[str, Any]) -> None:
-        self.client.rpush(self.queue_name, json.dumps(message))
+        self.client.rpush(self.queue_name, self.codec.encode(message))
     
     def receive_messages(self, callback) -> None:
         while True:
             _, message = self.client.blpop(self.queue_name)
-            callback(json.loads(message))
+            callback(self.codec.decode(message))
     
     def close(self) -> None:
         self.client.close() 
\ No newline at end of file
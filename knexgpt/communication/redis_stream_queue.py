@@ -0,0 +1,173 @@
+import os
+import socket
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import redis
+
+from .base_queue import BaseQueue
+from .codec import CodecSpec, get_codec
+
+class RedisStreamQueue(BaseQueue):
+    """Redis Streams client for message queue communication.
+
+    Messages are appended with ``XADD`` and read through a consumer group
+    with ``XREADGROUP``, so several agent replicas share one stream and
+    each message goes to one of them. Messages are acknowledged with
+    ``XACK`` only after the callback succeeds; entries left pending by a
+    crashed consumer for longer than ``claim_idle_ms`` are claimed by the
+    next consumer that reads.
+    """
+
+    def __init__(
+        self,
+        queue_name: str,
+        host: str = 'localhost',
+        port: int = 6379,
+        group: str = 'agents',
+        consumer: Optional[str] = None,
+        batch_size: int = 100,
+        block_ms: int = 5000,
+        claim_idle_ms: int = 60000,
+        maxlen: Optional[int] = None,
+        codec: CodecSpec = None
+    ):
+        """Initialize the Redis Streams client.
+
+        Args:
+            queue_name: Stream key
+            host: Redis host
+            port: Redis port
+            group: Consumer group name
+            consumer: Consumer name, unique per replica; defaults to
+                host name and process id
+            batch_size: Entries read per call and sends per pipeline
+            block_ms: Milliseconds a read blocks waiting for entries
+            claim_idle_ms: Milliseconds before another consumer's pending
+                entry is reclaimed
+            maxlen: Optional approximate stream length cap
+            codec: Message codec, defaults to plain JSON
+        """
+        self.queue_name = queue_name
+        self.group = group
+        self.consumer = consumer or f"{socket.gethostname()}-{os.getpid()}"
+        self.batch_size = batch_size
+        self.block_ms = block_ms
+        self.claim_idle_ms = claim_idle_ms
+        self.maxlen = maxlen
+        self.codec = get_codec(codec)
+        self._next_claim = 0.0
+        self.client = redis.StrictRedis(host=host, port=port)
+        try:
+            self.client.xgroup_create(queue_name, group, id='0', mkstream=True)
+        except redis.ResponseError as e:
+            if 'BUSYGROUP' not in str(e):
+                raise
+
+    def send_message(self, message: Dict[str, Any]) -> None:
+        self.client.xadd(
+            self.queue_name,
+            {'data': self.codec.encode(message)},
+            maxlen=self.maxlen,
+            approximate=True
+        )
+
+    def send_messages(self, messages: Iterable[Dict[str, Any]]) -> int:
+        """Send several messages, pipelining ``batch_size`` per round trip.
+
+        Args:
+            messages: Messages to send
+
+        Returns:
+            Number of messages sent
+        """
+        count = 0
+        pipe = self.client.pipeline(transaction=False)
+        for message in messages:
+            pipe.xadd(
+                self.queue_name,
+                {'data': self.codec.encode(message)},
+                maxlen=self.maxlen,
+                approximate=True
+            )
+            count += 1
+            if count % self.batch_size == 0:
+                pipe.execute()
+        pipe.execute()
+        return count
+
+    def read_batch(
+        self,
+        count: Optional[int] = None,
+        block_ms: Optional[int] = None
+    ) -> List[Tuple[bytes, Dict[str, Any]]]:
+        """Read a batch of entries for this consumer.
+
+        Stuck entries from other consumers are reclaimed first, at most
+        once per ``claim_idle_ms``. Entries must be acknowledged with
+        ``ack`` once processed.
+
+        Args:
+            count: Maximum entries to read, defaults to ``batch_size``
+            block_ms: Milliseconds to block, defaults to ``block_ms``
+
+        Returns:
+            (entry id, message) pairs
+        """
+        count = count or self.batch_size
+        entries = self._reclaim(count)
+        if not entries:
+            response = self.client.xreadgroup(
+                self.group,
+                self.consumer,
+                {self.queue_name: '>'},
+                count=count,
+                block=self.block_ms if block_ms is None else block_ms
+            )
+            entries = response[0][1] if response else []
+        # Entries deleted or trimmed from the stream while pending come
+        # back without fields; ack them so they leave the pending list.
+        self.ack([entry_id for entry_id, fields in entries if not fields])
+        return [(entry_id, self.codec.decode(fields[b'data'])) for entry_id, fields in entries if fields]
+
+    def ack(self, entry_ids: List[bytes]) -> None:
+        """Acknowledge processed entries.
+
+        Args:
+            entry_ids: Ids returned by ``read_batch``
+        """
+        if entry_ids:
+            self.client.xack(self.queue_name, self.group, *entry_ids)
+
+    def _reclaim(self, count: int) -> List[Tuple[bytes, Dict[bytes, bytes]]]:
+        now = time.monotonic()
+        if now < self._next_claim:
+            return []
+        self._next_claim = now + self.claim_idle_ms / 1000
+        response = self.client.xautoclaim(
+            self.queue_name,
+            self.group,
+            self.consumer,
+            min_idle_time=self.claim_idle_ms,
+            start_id='0-0',
+            count=count
+        )
+        entries = response[1]
+        if len(entries) == count:
+            # More may be stuck; check again on the next read.
+            self._next_claim = now
+        return entries
+
+    def receive_messages(self, callback) -> None:
+        while True:
+            done = []
+            try:
+                for entry_id, message in self.read_batch():
+                    callback(message)
+                    done.append(entry_id)
+            finally:
+                # A failed entry stays pending and is reclaimed later.
+                self.ack(done)
+
+    def close(self) -> None:
+        self.client.close()
@@ -1,19 +1,338 @@
-from chunkr import Chunkr
+"""
+Text chunking: a native streaming engine, with the Chunkr library as an
+optional alternative.
+"""
+from concurrent.futures import ProcessPoolExecutor
+import os
+import re
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Generator,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    TextIO,
+    Tuple,
+    Union,
+)
+
+BOUNDARIES = ("char", "sentence", "token")
+
+# Returns (start, end) character offsets of each token in a text.
+Tokenizer = Callable[[str], Sequence[Tuple[int, int]]]
+
+_WHITESPACE: Dict[type, re.Pattern] = {str: re.compile(r"\s+"), bytes: re.compile(rb"\s+")}
+_SENTENCE_END: Dict[type, re.Pattern] = {
+    str: re.compile(r"[.!?][\"')\]]*\s+|\n\s*\n"),
+    bytes: re.compile(rb"[.!?][\"')\]]*\s+|\n\s*\n"),
+}
+_WORD_TOKEN = re.compile(r"\w+|[^\w\s]")
+
+def word_tokenizer(text: str) -> List[Tuple[int, int]]:
+    """Default tokenizer: words and individual punctuation marks."""
+    return [match.span() for match in _WORD_TOKEN.finditer(text)]
+
+def hf_tokenizer(tokenizer) -> Tokenizer:
+    """Adapt a Hugging Face fast tokenizer to chunk on its tokens."""
+    def tokenize(text: str) -> Sequence[Tuple[int, int]]:
+        encoding = tokenizer(text, add_special_tokens=False, return_offsets_mapping=True)
+        return encoding["offset_mapping"]
+
+    return tokenize
+
+class Span(NamedTuple):
+    """A chunk as offsets into its source, sliced only on demand.
+
+    ``source`` is the document (a ``str``, or a ``memoryview`` of bytes),
+    or for streamed files the buffer the chunk was found in; ``offset`` is
+    the position of ``source[0]`` in the whole document.
+    """
+
+    source: Union[str, memoryview]
+    start: int
+    end: int
+    offset: int = 0
+
+    @property
+    def text(self) -> str:
+        """The chunk's text, copied out of the source."""
+        data = self.source[self.start:self.end]
+        return data if isinstance(data, str) else str(data, "utf-8")
+
+    @property
+    def view(self) -> memoryview:
+        """The chunk's bytes without copying; bytes sources only."""
+        if isinstance(self.source, str):
+            raise TypeError("Only chunks of bytes sources have a view")
+        return self.source[self.start:self.end]
+
+    @property
+    def document_span(self) -> Tuple[int, int]:
+        """Start and end offsets in the whole document."""
+        return self.offset + self.start, self.offset + self.end
+
+class Chunker:
+    """Streaming text chunker.
+
+    ``boundary`` selects where chunks end:
+
+    * ``'char'``: at most ``chunk_size`` characters, ending at whitespace
+      when there is any in the second half of the window
+    * ``'sentence'``: as ``'char'``, but preferring the end of a sentence
+      or paragraph
+    * ``'token'``: ``chunk_size`` tokens from ``tokenizer``
+
+    Consecutive chunks share about ``overlap`` characters (or tokens),
+    starting at a word boundary. Bytes input is chunked by bytes without
+    splitting UTF-8 characters.
+    """
+
+    def __init__(
+        self,
+        chunk_size: int = 1000,
+        overlap: int = 0,
+        boundary: str = "char",
+        tokenizer: Optional[Tokenizer] = None
+    ):
+        """Initialize the chunker.
+
+        Args:
+            chunk_size: Maximum characters (or tokens) per chunk
+            overlap: Characters (or tokens) repeated from the previous chunk
+            boundary: 'char', 'sentence' or 'token'
+            tokenizer: Token offsets function for 'token' boundaries,
+                defaults to ``word_tokenizer``; see ``hf_tokenizer``
+        """
+        if boundary not in BOUNDARIES:
+            raise ValueError(f"Unsupported boundary: {boundary}")
+        if not 0 <= overlap < chunk_size:
+            raise ValueError("Expected 0 <= overlap < chunk_size")
+        self.chunk_size = chunk_size
+        self.overlap = overlap
+        self.boundary = boundary
+        self.tokenizer = tokenizer or word_tokenizer
+
+    def iter_spans(self, text: Union[str, bytes, bytearray, memoryview, Any]) -> Iterator[Span]:
+        """Chunk a whole document.
+
+        Args:
+            text: A string, or a bytes-like object such as an ``mmap``
+
+        Yields:
+            Spans referencing ``text`` (or a ``memoryview`` of it)
+        """
+        source = text if isinstance(text, str) else memoryview(text)
+        for start, end in self._chunks(source, 0, final=True):
+            yield Span(source, start, end)
+
+    def iter_file(self, file: TextIO, read_size: int = 1 << 20) -> Iterator[Span]:
+        """Chunk a text stream, holding about ``read_size`` characters.
+
+        Args:
+            file: Open text file or stream
+            read_size: Characters per read
+
+        Yields:
+            Spans into the buffer they were found in, with its offset
+        """
+        read_size = max(read_size, 2 * self.chunk_size)
+        buffer = ""
+        offset = 0
+        eof = False
+        while not eof:
+            chunk = file.read(read_size)
+            eof = not chunk
+            buffer += chunk
+            chunks = self._chunks(buffer, 0, final=eof)
+            while True:
+                try:
+                    start, end = next(chunks)
+                except StopIteration as stop:
+                    resume = stop.value
+                    break
+                yield Span(buffer, start, end, offset)
+            buffer = buffer[resume:]
+            offset += resume
+
+    def chunk_documents(
+        self,
+        texts: Sequence[str],
+        processes: Optional[int] = None
+    ) -> List[List[Span]]:
+        """Chunk many documents in a process pool.
+
+        Workers return only offsets, so chunk text isn't copied back; the
+        spans reference the input strings. The chunker (and tokenizer) must
+        be picklable.
+
+        Args:
+            texts: Documents
+            processes: Worker processes, defaults to the number of cores
+
+        Returns:
+            Spans for each document, in input order
+        """
+        processes = processes or os.cpu_count() or 1
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            offsets = pool.map(
+                _chunk_offsets,
+                [self] * len(texts),
+                texts,
+                chunksize=max(1, len(texts) // (4 * processes))
+            )
+            return [
+                [Span(text, start, end) for start, end in spans]
+                for text, spans in zip(texts, offsets)
+            ]
+
+    def _chunks(
+        self,
+        source: Union[str, memoryview],
+        pos: int,
+        final: bool
+    ) -> Generator[Tuple[int, int], None, int]:
+        """Yield (start, end) chunks from ``pos``.
+
+        Without ``final``, stops before chunks that could still grow with
+        more input.
+
+        Returns:
+            Offset to resume from once more input is appended
+        """
+        if self.boundary == "token":
+            return (yield from self._token_chunks(source, pos, final))
+        length = len(source)
+        kind = str if isinstance(source, str) else bytes
+        while pos < length:
+            limit = pos + self.chunk_size
+            if limit >= length:
+                if not final:
+                    return pos
+                yield pos, length
+                return length
+            end = self._cut(source, kind, pos, limit)
+            yield pos, end
+            pos = self._next_start(source, kind, pos, end)
+        return pos
+
+    def _cut(self, source, kind, start: int, limit: int) -> int:
+        """Find the end of a chunk starting at ``start``."""
+        low = start + self.chunk_size // 2
+        patterns = [_WHITESPACE[kind]]
+        if self.boundary == "sentence":
+            patterns.insert(0, _SENTENCE_END[kind])
+        for pattern in patterns:
+            end = None
+            for match in pattern.finditer(source, low, limit):
+                end = match.end()
+            if end is not None:
+                return end
+        if kind is bytes:
+            # Don't split a UTF-8 sequence.
+            while limit > start + 1 and source[limit] & 0xC0 == 0x80:
+                limit -= 1
+        return limit
+
+    def _next_start(self, source, kind, start: int, end: int) -> int:
+        if not self.overlap:
+            return end
+        pos = max(end - self.overlap, start + 1)
+        # Start the overlap at a word, not mid-way through one.
+        match = _WHITESPACE[kind].search(source, pos, end)
+        if match is not None and match.end() < end:
+            return match.end()
+        if kind is bytes:
+            while pos < end and source[pos] & 0xC0 == 0x80:
+                pos += 1
+        return pos
+
+    def _token_chunks(
+        self,
+        source: Union[str, memoryview],
+        pos: int,
+        final: bool
+    ) -> Generator[Tuple[int, int], None, int]:
+        if not isinstance(source, str):
+            raise TypeError("Token boundaries need str input")
+        tokens = [(start + pos, end + pos) for start, end in self.tokenizer(source[pos:])]
+        # Where to resume once every token is used.
+        tail = len(source)
+        if not final and tokens:
+            # The last token may continue in the next read.
+            tail = tokens.pop()[0]
+        step = self.chunk_size - self.overlap
+        index = 0
+        while index < len(tokens):
+            window = tokens[index:index + self.chunk_size]
+            if len(window) < self.chunk_size and not final:
+                return window[0][0]
+            yield window[0][0], window[-1][1]
+            last = index + self.chunk_size >= len(tokens)
+            index += step
+            if last:
+                break
+        if not final and index < len(tokens):
+            return tokens[index][0]
+        return tail
+
+def _chunk_offsets(chunker: Chunker, text: str) -> List[Tuple[int, int]]:
+    return list(chunker._chunks(text, 0, final=True))
 
 class TextChunker:
-    """Class for chunking text using Chunkr."""
-    
-    def __init__(self, chunk_size: int = 1000):
+    """Class for chunking text.
+
+    Uses the native ``Chunker`` unless ``engine='chunkr'`` selects the
+    Chunkr library, which must then be installed.
+    """
+
+    def __init__(
+        self,
+        chunk_size: int = 1000,
+        overlap: int = 0,
+        boundary: str = "char",
+        tokenizer: Optional[Tokenizer] = None,
+        engine: str = "native"
+    ):
         self.chunk_size = chunk_size
-        self.chunkr = Chunkr(chunk_size=self.chunk_size)
-    
+        self.engine = engine
+        if engine == "chunkr":
+            from chunkr import Chunkr
+            self.chunkr = Chunkr(chunk_size=self.chunk_size)
+        elif engine == "native":
+            self.chunker = Chunker(chunk_size, overlap, boundary, tokenizer)
+        else:
+            raise ValueError(f"Unsupported chunking engine: {engine}")
+
     def chunk_text(self, text: str) -> list:
         """Chunk the given text into smaller pieces.
-        
+
         Args:
             text: The text to chunk.
-        
+
         Returns:
             A list of text chunks.
         """
-        return self.chunkr.chunk(text) 
\ No newline at end of file
+        if self.engine == "chunkr":
+            return self.chunkr.chunk(text)
+        return [span.text for span in self.chunker.iter_spans(text)]
+
+    def iter_chunks(self, text: Union[str, bytes, memoryview]) -> Iterator[Span]:
+        """Lazily chunk a document into offset spans."""
+        return self._native().iter_spans(text)
+
+    def iter_file(self, file: TextIO, read_size: int = 1 << 20) -> Iterator[Span]:
+        """Lazily chunk a text stream into offset spans."""
+        return self._native().iter_file(file, read_size)
+
+    def chunk_documents(self, texts: Sequence[str], processes: Optional[int] = None) -> List[List[Span]]:
+        """Chunk many documents in a process pool."""
+        return self._native().chunk_documents(texts, processes)
+
+    def _native(self) -> Chunker:
+        if self.engine != "native":
+            raise ValueError("Streaming chunking needs the native engine")
+        return self.chunker
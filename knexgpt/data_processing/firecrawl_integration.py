@@ -1,18 +1,58 @@
+import asyncio
+from typing import AsyncIterator, Iterable, List, Optional
+
 from firecrawl import Firecrawl
 
+from .web_crawler import HTTPCache, Page, WebCrawler
+
 class WebScraper:
-    """Class for web scraping using Firecrawl."""
-    
-    def __init__(self):
+    """Class for web scraping using Firecrawl.
+
+    ``crawl`` fetches whole sites directly instead, concurrently and with an
+    optional on-disk cache; see ``WebCrawler`` for the options.
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None, cache_size: int = 256 << 20, **crawler_options):
+        """Initialize the scraper.
+
+        Args:
+            cache_dir: Directory for the crawl cache, none if omitted
+            cache_size: Bytes the crawl cache may hold
+            **crawler_options: ``WebCrawler`` options such as ``per_host``
+                and ``rate``
+        """
         self.firecrawl = Firecrawl()
-    
+        cache = HTTPCache(cache_dir, cache_size) if cache_dir else None
+        self.crawler = WebCrawler(cache, **crawler_options)
+
     def scrape_url(self, url: str) -> str:
         """Scrape the content of the given URL.
-        
+
         Args:
             url: The URL to scrape.
-        
+
         Returns:
             The scraped content as a string.
         """
-        return self.firecrawl.scrape(url) 
\ No newline at end of file
+        return self.firecrawl.scrape(url)
+
+    def crawl_async(self, seeds: Iterable[str], max_pages: int = 1000, max_depth: int = 1, **options) -> AsyncIterator[Page]:
+        """Crawl from seed URLs, yielding pages as they are fetched."""
+        return self.crawler.crawl(seeds, max_pages=max_pages, max_depth=max_depth, **options)
+
+    def crawl(self, seeds: Iterable[str], max_pages: int = 1000, max_depth: int = 1, **options) -> List[Page]:
+        """Crawl from seed URLs.
+
+        Args:
+            seeds: Start URLs
+            max_pages: Most URLs to fetch
+            max_depth: Link hops to follow from the seeds
+            **options: Other ``WebCrawler.crawl`` options
+
+        Returns:
+            The fetched pages
+        """
+        async def collect() -> List[Page]:
+            return [page async for page in self.crawl_async(seeds, max_pages, max_depth, **options)]
+
+        return asyncio.run(collect())
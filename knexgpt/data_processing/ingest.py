@@ -0,0 +1,129 @@
+"""
+Bulk ingestion helpers: source discovery, file parsing and progress
+checkpoints.
+"""
+import csv
+import glob
+import json
+import os
+import threading
+from typing import Any, Dict, Iterable, List, Tuple, Union
+
+def extract_file(path: str) -> Union[dict, list]:
+    """Parse a whole file by extension: JSON, CSV rows or plain text.
+
+    Module-level so it can run in worker processes.
+
+    Args:
+        path: File to parse
+
+    Returns:
+        Parsed JSON, a list of CSV rows, or ``{"text": ...}``
+    """
+    with open(path, "r") as file:
+        if path.endswith(".json"):
+            return json.load(file)
+        elif path.endswith(".csv"):
+            reader = csv.DictReader(file)
+            return [row for row in reader]
+        else:
+            return {"text": file.read()}
+
+def resolve_sources(source: Union[str, Iterable[str]], manifest: bool = False) -> List[str]:
+    """Expand a directory, glob pattern, manifest or list into file paths.
+
+    Args:
+        source: Directory (searched recursively), glob pattern (``**``
+            matches subdirectories), manifest file or iterable of paths
+        manifest: Treat ``source`` as a manifest listing one path per line;
+            relative paths are resolved against the manifest's directory
+            and lines starting with ``#`` are ignored
+
+    Returns:
+        Sorted, de-duplicated absolute file paths
+    """
+    if not isinstance(source, str):
+        paths = list(source)
+    elif manifest:
+        base = os.path.dirname(os.path.abspath(source))
+        with open(source, "r") as file:
+            paths = [
+                os.path.join(base, line.strip())
+                for line in file
+                if line.strip() and not line.lstrip().startswith("#")
+            ]
+    elif os.path.isdir(source):
+        paths = [
+            os.path.join(directory, name)
+            for directory, _, names in os.walk(source)
+            for name in names
+        ]
+    elif any(char in source for char in "*?["):
+        paths = glob.glob(source, recursive=True)
+    else:
+        paths = [source]
+    return sorted({os.path.abspath(path) for path in paths if os.path.isfile(path)})
+
+def file_signature(path: str) -> Tuple[int, int]:
+    """Return a file's size and modification time in nanoseconds."""
+    stat = os.stat(path)
+    return stat.st_size, stat.st_mtime_ns
+
+class IngestCheckpoint:
+    """Append-only record of files already ingested.
+
+    Each line holds a file's path, size and modification time, written
+    once its data has been sent. A file is skipped on a later run only if
+    its size and modification time are unchanged, so an interrupted
+    backfill resumes where it stopped and edited files are picked up again.
+    """
+
+    def __init__(self, path: str):
+        """Load the checkpoint, creating it on first use.
+
+        Args:
+            path: Checkpoint file
+        """
+        self.path = path
+        self._done: Dict[str, Tuple[int, int]] = {}
+        self._lock = threading.Lock()
+        complete = True
+        if os.path.exists(path):
+            with open(path, "r") as file:
+                for line in file:
+                    complete = line.endswith("\n")
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # A line cut short by a crash.
+                        continue
+                    self._done[entry["path"]] = (entry["size"], entry["mtime_ns"])
+        self._file = open(path, "a")
+        if not complete:
+            self._file.write("\n")
+
+    def __contains__(self, path: str) -> bool:
+        signature = self._done.get(path)
+        if signature is None:
+            return False
+        try:
+            return file_signature(path) == signature
+        except OSError:
+            return False
+
+    def mark(self, path: str, signature: Tuple[int, int]) -> None:
+        """Record a file as ingested.
+
+        Args:
+            path: File path
+            signature: ``file_signature`` taken before the file was read
+        """
+        size, mtime_ns = signature
+        entry: Dict[str, Any] = {"path": path, "size": size, "mtime_ns": mtime_ns}
+        with self._lock:
+            self._done[path] = signature
+            self._file.write(json.dumps(entry) + "\n")
+            self._file.flush()
+
+    def close(self) -> None:
+        self._file.close()
@@ -0,0 +1,243 @@
+"""
+Persistent index of ingested sources for incremental ingestion.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Set, Tuple, Union
+
+from .ingest import extract_file
+
+class SourceState(NamedTuple):
+    size: int
+    mtime_ns: int
+    digest: str
+
+class Delta(NamedTuple):
+    """Changes to a source's records since it was last ingested."""
+
+    data: Union[dict, list]         # New and changed records, shaped like the source
+    ids: List[str]                  # Entity ids of ``data``'s records, in order
+    retracted: List[str]            # Entity ids of keyed records no longer present
+    entities: Dict[str, str]        # Every current entity id and record hash
+
+def file_digest(path: str, chunk_size: int = 1 << 20) -> str:
+    """Return the SHA-256 of a file's content, read in chunks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def record_hash(record: Any) -> str:
+    return hashlib.sha1(
+        json.dumps(record, sort_keys=True, default=str).encode("utf-8")
+    ).hexdigest()
+
+def entity_key(path: str, entity_id: str) -> str:
+    """Return the record key (or content hash) part of an entity id."""
+    return entity_id[len(path) + 1:]
+
+def _keyed(path: str, entity_id: str, digest: str) -> bool:
+    # Unkeyed records are identified by their content hash.
+    return entity_key(path, entity_id) != digest
+
+class RecordDiff:
+    """Compares a source's records with those last ingested, batch by batch.
+
+    A record's entity id is ``<path>#<key>``, where the key is the record's
+    ``key_field`` value, or its content hash when there is no key field. A
+    keyed record whose content changed keeps its id and is sent again; an
+    unkeyed one gets a new id. Only keyed records are ever retracted: an
+    unkeyed record that changed can't be told apart from one that was
+    removed, so its old id is just dropped from the index.
+    """
+
+    def __init__(self, path: str, previous: Dict[str, str], key_field: Optional[str] = None):
+        """Start a diff.
+
+        Args:
+            path: Source path
+            previous: Entity ids and record hashes from the last ingest
+            key_field: Record field holding a stable key
+        """
+        self.path = path
+        self.previous = previous
+        self.key_field = key_field
+        self.entities: Dict[str, str] = {}
+
+    def add(self, records: Iterable[Any]) -> Tuple[List[Any], List[str]]:
+        """Diff a batch of records.
+
+        Returns:
+            The batch's new and changed records, and their entity ids
+        """
+        key_field = self.key_field
+        changed = []
+        ids = []
+        for record in records:
+            digest = record_hash(record)
+            if key_field and isinstance(record, dict) and record.get(key_field) is not None:
+                entity_id = f"{self.path}#{record[key_field]}"
+            else:
+                entity_id = f"{self.path}#{digest}"
+            if entity_id in self.entities:
+                continue
+            self.entities[entity_id] = digest
+            if self.previous.get(entity_id) != digest:
+                changed.append(record)
+                ids.append(entity_id)
+        return changed, ids
+
+    def retracted(self) -> List[str]:
+        """Return the ids of keyed records not seen since the diff started."""
+        return [
+            entity_id for entity_id, digest in self.previous.items()
+            if entity_id not in self.entities and _keyed(self.path, entity_id, digest)
+        ]
+
+def diff_records(
+    path: str,
+    data: Union[dict, list],
+    previous: Dict[str, str],
+    key_field: Optional[str] = None
+) -> Delta:
+    """Compare a source's parsed records with those last ingested.
+
+    See ``RecordDiff`` for how records are identified.
+
+    Args:
+        path: Source path
+        data: Parsed source: a list of records or a single document
+        previous: Entity ids and record hashes from the last ingest
+        key_field: Record field holding a stable key
+
+    Returns:
+        The delta to send and retract, and the entities to index
+    """
+    diff = RecordDiff(path, previous, key_field)
+    changed, ids = diff.add(data if isinstance(data, list) else [data])
+    shaped: Union[dict, list] = changed
+    if not isinstance(data, list):
+        shaped = changed[0] if changed else {}
+    return Delta(shaped, ids, diff.retracted(), diff.entities)
+
+class SourceIndex:
+    """SQLite index of source files and the graph entities made from them.
+
+    Sources are compared by size and modification time first and by
+    content hash only when those differ, so unchanged files cost one
+    ``stat``. Per-record hashes let a changed source send only its new and
+    changed records.
+    """
+
+    def __init__(self, path: str):
+        """Open or create an index.
+
+        Args:
+            path: SQLite database file
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        with self._db:
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS sources ("
+                "path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, digest TEXT)"
+            )
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS entities ("
+                "path TEXT, entity_id TEXT, hash TEXT, PRIMARY KEY (path, entity_id))"
+            )
+
+    def get(self, path: str) -> Optional[SourceState]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT size, mtime_ns, digest FROM sources WHERE path = ?", (path,)
+            ).fetchone()
+        return SourceState(*row) if row else None
+
+    def entities(self, path: str) -> Dict[str, str]:
+        """Return a source's entity ids and record hashes."""
+        with self._lock:
+            return dict(self._db.execute(
+                "SELECT entity_id, hash FROM entities WHERE path = ?", (path,)
+            ))
+
+    def update(
+        self,
+        path: str,
+        signature: Tuple[int, int],
+        digest: str,
+        entities: Optional[Dict[str, str]] = None
+    ) -> None:
+        """Record a source as ingested.
+
+        Args:
+            path: Source path
+            signature: Size and modification time, as from ``file_signature``
+            digest: Content hash
+            entities: The source's entity ids and record hashes, replacing
+                the previous ones; None keeps them
+        """
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO sources VALUES (?, ?, ?, ?)",
+                (path, signature[0], signature[1], digest)
+            )
+            if entities is not None:
+                self._db.execute("DELETE FROM entities WHERE path = ?", (path,))
+                self._db.executemany(
+                    "INSERT INTO entities VALUES (?, ?, ?)",
+                    ((path, entity_id, hash) for entity_id, hash in entities.items())
+                )
+
+    def remove(self, path: str) -> List[str]:
+        """Forget a source.
+
+        Returns:
+            The ids of the keyed entities it had produced, to retract
+        """
+        with self._lock, self._db:
+            ids = [entity_id for entity_id, digest in self._db.execute(
+                "SELECT entity_id, hash FROM entities WHERE path = ?", (path,)
+            ) if _keyed(path, entity_id, digest)]
+            self._db.execute("DELETE FROM entities WHERE path = ?", (path,))
+            self._db.execute("DELETE FROM sources WHERE path = ?", (path,))
+        return ids
+
+    def keys(self) -> Set[str]:
+        """Return the record keys (or content hashes) of every indexed entity."""
+        with self._lock:
+            return {
+                entity_key(path, entity_id)
+                for path, entity_id in self._db.execute("SELECT path, entity_id FROM entities")
+            }
+
+    def missing(self) -> List[str]:
+        """Return indexed sources that no longer exist on disk."""
+        with self._lock:
+            paths = [row[0] for row in self._db.execute("SELECT path FROM sources")]
+        return [path for path in paths if not os.path.exists(path)]
+
+    def close(self) -> None:
+        self._db.close()
+
+def extract_if_changed(path: str, digest: Optional[str]) -> Tuple[str, Optional[Union[dict, list]]]:
+    """Hash a file and parse it only if its content changed.
+
+    Module-level so it can run in worker processes.
+
+    Args:
+        path: File to read
+        digest: Content hash from the last ingest, if any
+
+    Returns:
+        The current content hash, and the parsed file or None if unchanged
+    """
+    current = file_digest(path)
+    if current == digest:
+        return current, None
+    return current, extract_file(path)
@@ -0,0 +1,174 @@
+"""
+Streaming readers that split large sources into bounded batches.
+
+Each reader holds at most one batch (plus a read buffer) in memory, so
+sources of any size can be extracted.
+"""
+import csv
+from itertools import islice
+import json
+import os
+from typing import Any, Dict, Iterable, Iterator, List, TextIO
+
+def batched(records: Iterable[Any], batch_size: int) -> Iterator[List[Any]]:
+    """Group records into lists of at most ``batch_size``."""
+    records = iter(records)
+    while True:
+        batch = list(islice(records, batch_size))
+        if not batch:
+            return
+        yield batch
+
+def iter_csv(file: TextIO) -> Iterator[Dict[str, str]]:
+    """Yield CSV rows as dictionaries keyed by the header row."""
+    return iter(csv.DictReader(file))
+
+def iter_ndjson(file: TextIO) -> Iterator[Any]:
+    """Yield one value per non-blank line of newline-delimited JSON."""
+    for line in file:
+        if line.strip():
+            yield json.loads(line)
+
+def _cut_short(buffer: str, end: int) -> bool:
+    """Whether a scalar ending at ``end`` may continue past the buffer.
+
+    True unless a delimiter follows it, or something else follows it
+    further from the buffer end than a number's cut-off tail ("e+").
+    """
+    while end < len(buffer) and buffer[end] in " \t\r\n":
+        end += 1
+    if end == len(buffer):
+        return True
+    return buffer[end] not in ",]" and len(buffer) - end <= 2
+
+def iter_json_array(file: TextIO, read_size: int = 1 << 16) -> Iterator[Any]:
+    """Yield the elements of a top-level JSON array one at a time.
+
+    The file is read in ``read_size`` chunks and each element is parsed as
+    soon as it is complete. A document that isn't an array is yielded
+    whole.
+
+    Args:
+        file: Open text file
+        read_size: Characters per read
+
+    Raises:
+        json.JSONDecodeError: If the document is malformed or truncated
+    """
+    decoder = json.JSONDecoder()
+    buffer = ""
+    pos = 0
+    eof = False
+    size = read_size
+
+    def fill() -> None:
+        nonlocal buffer, pos, eof
+        chunk = file.read(size)
+        eof = not chunk
+        buffer = buffer[pos:] + chunk
+        pos = 0
+
+    def skip_whitespace() -> bool:
+        """Advance to the next token; False at the end of the file."""
+        nonlocal pos
+        while True:
+            while pos < len(buffer) and buffer[pos] in " \t\r\n":
+                pos += 1
+            if pos < len(buffer):
+                return True
+            if eof:
+                return False
+            fill()
+
+    if not skip_whitespace():
+        return
+    if buffer[pos] != "[":
+        yield json.loads(buffer[pos:] + file.read())
+        return
+    pos += 1
+    while True:
+        if not skip_whitespace():
+            raise json.JSONDecodeError("Unterminated array", buffer, pos)
+        if buffer[pos] == "]":
+            return
+        if buffer[pos] == ",":
+            pos += 1
+            continue
+        scalar = buffer[pos] not in '{["'
+        try:
+            value, end = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            end = len(buffer)
+        # An element running to the end of the buffer may be cut short, so
+        # read on before trusting it. A number can also parse early: "1."
+        # or "1.5e+" at the end of the buffer decode as 1 and 1.5.
+        if not eof and (end == len(buffer) or scalar and _cut_short(buffer, end)):
+            # Grow reads so re-parsing a large element stays linear.
+            size *= 2
+            fill()
+            continue
+        size = read_size
+        yield value
+        pos = end
+
+def iter_text_spans(file: TextIO, span_size: int = 1 << 16) -> Iterator[Dict[str, Any]]:
+    """Split text into spans of at most ``span_size`` characters.
+
+    Spans end at a line break, or failing that a space, in the second half
+    of the window, so words aren't split unless a window has no spaces.
+
+    Yields:
+        ``{"text": ..., "offset": ...}`` with the span's character offset
+    """
+    offset = 0
+    carry = ""
+    while True:
+        chunk = file.read(span_size - len(carry))
+        text = carry + chunk
+        if not chunk:
+            if text:
+                yield {"text": text, "offset": offset}
+            return
+        if len(text) < span_size:
+            carry = text
+            continue
+        cut = text.rfind("\n", span_size // 2)
+        if cut < 0:
+            cut = text.rfind(" ", span_size // 2)
+        cut = len(text) if cut < 0 else cut + 1
+        yield {"text": text[:cut], "offset": offset}
+        offset += cut
+        carry = text[cut:]
+
+def read_batches(
+    path: str,
+    batch_size: int = 1000,
+    span_size: int = 1 << 16
+) -> Iterator[List[Any]]:
+    """Stream a file as batches of records.
+
+    CSV (``.csv``), newline-delimited JSON (``.ndjson``, ``.jsonl``) and
+    JSON arrays (``.json``) yield up to ``batch_size`` records per batch.
+    Other files are read as text and yield one span per batch.
+
+    Args:
+        path: File to read
+        batch_size: Records per batch
+        span_size: Characters per text span
+
+    Returns:
+        Iterator of record lists
+    """
+    extension = os.path.splitext(path)[1].lower()
+    with open(path, "r", encoding="utf-8", newline="" if extension == ".csv" else None) as file:
+        if extension == ".csv":
+            yield from batched(iter_csv(file), batch_size)
+        elif extension in (".ndjson", ".jsonl"):
+            yield from batched(iter_ndjson(file), batch_size)
+        elif extension == ".json":
+            yield from batched(iter_json_array(file), batch_size)
+        else:
+            for span in iter_text_spans(file, span_size):
+                yield [span]
@@ -0,0 +1,443 @@
+"""
+Asynchronous web crawler with per-host limits and an on-disk HTTP cache.
+"""
+import asyncio
+from html.parser import HTMLParser
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import (
+    AsyncIterator,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Set,
+)
+from urllib.parse import urldefrag, urljoin, urlsplit
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+# Statuses worth retrying after a delay.
+RETRY_STATUSES = (429, 502, 503, 504)
+
+def header(headers: Dict[str, str], name: str) -> str:
+    """Look up a header case-insensitively, returning '' if absent."""
+    name = name.lower()
+    for key, value in headers.items():
+        if key.lower() == name:
+            return value
+    return ""
+
+class Page(NamedTuple):
+    """A fetched page."""
+
+    url: str
+    status: int
+    headers: Dict[str, str]
+    body: bytes
+    from_cache: bool = False
+    depth: int = 0
+
+    @property
+    def text(self) -> str:
+        """The body decoded with the charset from Content-Type."""
+        content_type = header(self.headers, "Content-Type")
+        charset = "utf-8"
+        for param in content_type.split(";")[1:]:
+            name, _, value = param.strip().partition("=")
+            if name.lower() == "charset" and value:
+                charset = value.strip('"')
+        try:
+            return self.body.decode(charset, errors="replace")
+        except LookupError:
+            return self.body.decode("utf-8", errors="replace")
+
+    @property
+    def is_html(self) -> bool:
+        return "html" in header(self.headers, "Content-Type").lower()
+
+class HTTPCache:
+    """Size-bounded on-disk cache of responses carrying validators.
+
+    Bodies are files named by the URL's hash; an SQLite index holds each
+    response's status, headers, ``ETag``, ``Last-Modified``, size and last
+    access time. Once the bodies exceed ``max_bytes`` the least recently
+    used responses are evicted.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = 256 << 20):
+        """Open or create a cache.
+
+        Args:
+            directory: Cache directory
+            max_bytes: Total body size to keep
+        """
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(os.path.join(directory, "index.sqlite"), check_same_thread=False)
+        with self._db:
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "url TEXT PRIMARY KEY, status INTEGER, headers TEXT, etag TEXT, "
+                "last_modified TEXT, size INTEGER, accessed REAL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)")
+
+    def _path(self, url: str) -> str:
+        return os.path.join(self.directory, hashlib.sha256(url.encode("utf-8")).hexdigest())
+
+    def validators(self, url: str) -> Dict[str, str]:
+        """Return the conditional request headers for a cached response.
+
+        Only the index is read, so no body is loaded until the server
+        answers ``304 Not Modified``.
+
+        Returns:
+            ``If-None-Match`` and ``If-Modified-Since`` headers, empty if
+            the URL isn't cached
+        """
+        with self._lock:
+            row = self._db.execute(
+                "SELECT etag, last_modified FROM responses WHERE url = ?", (url,)
+            ).fetchone()
+        headers = {}
+        if row is not None and row[0]:
+            headers["If-None-Match"] = row[0]
+        if row is not None and row[1]:
+            headers["If-Modified-Since"] = row[1]
+        return headers
+
+    def get(self, url: str) -> Optional[Page]:
+        """Return a cached response, marking it as recently used."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT status, headers FROM responses WHERE url = ?", (url,)
+            ).fetchone()
+            if row is None:
+                return None
+            try:
+                with open(self._path(url), "rb") as file:
+                    body = file.read()
+            except FileNotFoundError:
+                with self._db:
+                    self._db.execute("DELETE FROM responses WHERE url = ?", (url,))
+                return None
+            with self._db:
+                self._db.execute("UPDATE responses SET accessed = ? WHERE url = ?", (time.time(), url))
+        return Page(url, row[0], json.loads(row[1]), body, from_cache=True)
+
+    def put(self, url: str, status: int, headers: Dict[str, str], body: bytes) -> None:
+        """Store a response, evicting old ones if the cache is full."""
+        path = self._path(url)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as file:
+            file.write(body)
+        with self._lock:
+            os.replace(tmp, path)
+            with self._db:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (url, status, json.dumps(headers), header(headers, "ETag") or None,
+                     header(headers, "Last-Modified") or None, len(body), time.time())
+                )
+            self._evict()
+
+    def refresh(self, url: str, headers: Dict[str, str]) -> None:
+        """Merge headers from a ``304 Not Modified`` into a cached response."""
+        with self._lock:
+            row = self._db.execute("SELECT headers FROM responses WHERE url = ?", (url,)).fetchone()
+            if row is None:
+                return
+            merged = json.loads(row[0])
+            for name, value in headers.items():
+                for old in [old for old in merged if old.lower() == name.lower()]:
+                    del merged[old]
+                merged[name] = value
+            with self._db:
+                self._db.execute(
+                    "UPDATE responses SET headers = ?, etag = ?, last_modified = ?, accessed = ? "
+                    "WHERE url = ?",
+                    (json.dumps(merged), header(merged, "ETag") or None,
+                     header(merged, "Last-Modified") or None, time.time(), url)
+                )
+
+    def size(self) -> int:
+        """Return the total size of cached bodies."""
+        with self._lock:
+            return self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    def _evict(self) -> None:
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        evicted = []
+        for url, size in self._db.execute("SELECT url, size FROM responses ORDER BY accessed"):
+            if total <= self.max_bytes:
+                break
+            evicted.append(url)
+            total -= size
+        with self._db:
+            self._db.executemany("DELETE FROM responses WHERE url = ?", ((url,) for url in evicted))
+        for url in evicted:
+            try:
+                os.remove(self._path(url))
+            except FileNotFoundError:
+                pass
+
+    def close(self) -> None:
+        self._db.close()
+
+class _LinkParser(HTMLParser):
+    def __init__(self):
+        super().__init__()
+        self.links: List[str] = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "a":
+            for name, value in attrs:
+                if name == "href" and value:
+                    self.links.append(value)
+
+def extract_links(page: Page) -> List[str]:
+    """Return the absolute http(s) links of an HTML page, without fragments."""
+    parser = _LinkParser()
+    parser.feed(page.text)
+    links = []
+    for href in parser.links:
+        url = urldefrag(urljoin(page.url, href.strip()))[0]
+        if urlsplit(url).scheme in ("http", "https"):
+            links.append(url)
+    return links
+
+class _HostLimiter:
+    """Spaces out request starts to one host."""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.next_start = 0.0
+
+    async def wait(self) -> None:
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        start = max(now, self.next_start)
+        self.next_start = start + self.interval
+        if start > now:
+            await asyncio.sleep(start - now)
+
+    def pause(self, delay: float) -> None:
+        """Hold off later requests, e.g. for a ``Retry-After``."""
+        self.next_start = max(self.next_start, asyncio.get_running_loop().time() + delay)
+
+class WebCrawler:
+    """Concurrent crawler over a pooled ``aiohttp`` session.
+
+    The connection pool caps requests in flight overall (``concurrency``)
+    and per host (``per_host``), and ``rate`` spaces out requests to each
+    host. With a cache, pages are revalidated with ``If-None-Match`` /
+    ``If-Modified-Since`` and a ``304`` is served from disk. Statuses in
+    ``RETRY_STATUSES`` and connection errors are retried with exponential
+    backoff, honoring ``Retry-After``.
+
+    Usage::
+
+        crawler = WebCrawler(HTTPCache(".crawl-cache"), rate=2)
+        async for page in crawler.crawl(["https://example.com/"], max_depth=2):
+            ...
+    """
+
+    def __init__(
+        self,
+        cache: Optional[HTTPCache] = None,
+        concurrency: int = 16,
+        per_host: int = 4,
+        rate: Optional[float] = None,
+        timeout: float = 30.0,
+        max_retries: int = 2,
+        retry_delay: float = 0.5,
+        user_agent: str = "knexgpt-crawler/0.1"
+    ):
+        """Initialize the crawler.
+
+        Args:
+            cache: Response cache, if any
+            concurrency: Requests in flight at once
+            per_host: Requests in flight to one host at once
+            rate: Requests per second to one host, unlimited if None
+            timeout: Seconds allowed per request
+            max_retries: Retries of a failed request
+            retry_delay: Seconds before the first retry, doubled each time
+            user_agent: User-Agent header
+        """
+        self.cache = cache
+        self.concurrency = concurrency
+        self.per_host = per_host
+        self.rate = rate
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.user_agent = user_agent
+        self._hosts: Dict[str, _HostLimiter] = {}
+        self.stats = {"fetched": 0, "not_modified": 0, "retries": 0, "errors": 0, "bytes": 0}
+
+    def session(self) -> aiohttp.ClientSession:
+        """Create a session with the crawler's connection pool."""
+        return aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=self.concurrency, limit_per_host=self.per_host),
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+            headers={"User-Agent": self.user_agent}
+        )
+
+    def _limiter(self, url: str) -> _HostLimiter:
+        host = urlsplit(url).netloc
+        limiter = self._hosts.get(host)
+        if limiter is None:
+            limiter = self._hosts[host] = _HostLimiter(1 / self.rate if self.rate else 0.0)
+        return limiter
+
+    async def fetch(self, session: aiohttp.ClientSession, url: str, depth: int = 0) -> Page:
+        """Fetch a page, revalidating a cached copy if there is one.
+
+        Raises:
+            aiohttp.ClientError: If the request fails after every retry
+        """
+        loop = asyncio.get_running_loop()
+        cache = self.cache
+        headers = await loop.run_in_executor(None, cache.validators, url) if cache else {}
+        limiter = self._limiter(url)
+        attempt = 0
+        while True:
+            await limiter.wait()
+            try:
+                async with session.get(url, headers=headers) as response:
+                    if response.status == 304 and cache is not None and headers:
+                        await loop.run_in_executor(None, cache.refresh, url, dict(response.headers))
+                        cached = await loop.run_in_executor(None, cache.get, url)
+                        if cached is not None:
+                            self.stats["not_modified"] += 1
+                            return cached._replace(depth=depth)
+                        # Evicted since the validators were read; fetch it whole.
+                        headers = {}
+                        continue
+                    if response.status in RETRY_STATUSES and attempt < self.max_retries:
+                        delay = _retry_after(response.headers.get("Retry-After"))
+                        raise _Retry(delay)
+                    body = await response.read()
+                    page = Page(str(response.url), response.status, dict(response.headers), body, depth=depth)
+            except (aiohttp.ClientError, asyncio.TimeoutError, _Retry) as e:
+                if attempt >= self.max_retries:
+                    raise
+                delay = self.retry_delay * 2 ** attempt
+                if isinstance(e, _Retry) and e.delay is not None:
+                    delay = e.delay
+                limiter.pause(delay)
+                attempt += 1
+                self.stats["retries"] += 1
+                logger.warning(f"Fetching {url} failed, retrying in {delay:.2f}s: {e!r}")
+                continue
+            self.stats["fetched"] += 1
+            self.stats["bytes"] += len(body)
+            if self.cache is not None and _cacheable(page):
+                await loop.run_in_executor(None, self.cache.put, url, page.status, page.headers, body)
+            return page
+
+    async def crawl(
+        self,
+        seeds: Iterable[str],
+        max_pages: int = 1000,
+        max_depth: int = 1,
+        same_host: bool = True,
+        follow: Optional[Callable[[str], bool]] = None
+    ) -> AsyncIterator[Page]:
+        """Crawl breadth-first from seed URLs, yielding pages as they arrive.
+
+        Args:
+            seeds: Start URLs
+            max_pages: Most URLs to fetch, seeds included
+            max_depth: Link hops to follow from the seeds; 0 fetches only
+                the seeds
+            same_host: Only follow links to the seeds' hosts
+            follow: Extra predicate a link must pass to be followed
+
+        Yields:
+            Fetched pages, in completion order; failed URLs are logged
+            and counted in ``stats["errors"]``
+        """
+        seeds = [urldefrag(url)[0] for url in seeds]
+        hosts = {urlsplit(url).netloc for url in seeds}
+        seen: Set[str] = set()
+        frontier: asyncio.Queue = asyncio.Queue()
+        for url in seeds:
+            if url not in seen and len(seen) < max_pages:
+                seen.add(url)
+                frontier.put_nowait((url, 0))
+        # Bounded, so workers wait for a slow consumer.
+        results: asyncio.Queue = asyncio.Queue(maxsize=self.concurrency)
+        done = object()
+
+        async def worker(session: aiohttp.ClientSession) -> None:
+            while True:
+                url, depth = await frontier.get()
+                try:
+                    page = await self.fetch(session, url, depth)
+                    if depth < max_depth and page.status == 200 and page.is_html:
+                        for link in extract_links(page):
+                            if len(seen) >= max_pages:
+                                break
+                            if link in seen or (same_host and urlsplit(link).netloc not in hosts):
+                                continue
+                            if follow is not None and not follow(link):
+                                continue
+                            seen.add(link)
+                            frontier.put_nowait((link, depth + 1))
+                    await results.put(page)
+                except Exception as e:
+                    self.stats["errors"] += 1
+                    logger.error(f"Error crawling {url}: {e!r}")
+                finally:
+                    frontier.task_done()
+
+        async def finish() -> None:
+            await frontier.join()
+            await results.put(done)
+
+        async with self.session() as session:
+            tasks = [asyncio.create_task(worker(session)) for _ in range(self.concurrency)]
+            tasks.append(asyncio.create_task(finish()))
+            try:
+                while True:
+                    page = await results.get()
+                    if page is done:
+                        break
+                    yield page
+            finally:
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+
+class _Retry(Exception):
+    def __init__(self, delay: Optional[float]):
+        super().__init__(f"retryable status, Retry-After {delay}")
+        self.delay = delay
+
+def _retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a ``Retry-After`` given in seconds."""
+    try:
+        return max(0.0, float(value)) if value is not None else None
+    except ValueError:
+        return None
+
+def _cacheable(page: Page) -> bool:
+    if page.status != 200 or "no-store" in header(page.headers, "Cache-Control").lower():
+        return False
+    return bool(header(page.headers, "ETag") or header(page.headers, "Last-Modified"))
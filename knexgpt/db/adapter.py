@@ -2,15 +2,84 @@
 Universal adapter for graph database interactions.
 """
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List, Optional, Union
+import asyncio
+from contextlib import AsyncExitStack, asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Union
 import logging
+import re
 from urllib.parse import urlparse
 
-from neo4j import AsyncGraphDatabase, AsyncDriver
+from neo4j import AsyncGraphDatabase, AsyncDriver, Query, READ_ACCESS
+from neo4j.graph import Node, Path, Relationship
 from pydantic import BaseModel
 
+from .columnar import ColumnarResult
+from .pool import ConnectionLimiter, PoolConfig
+
 logger = logging.getLogger(__name__)
 
+# Matches ``$name`` parameter references in a Cypher statement.
+_PARAM_PATTERN = re.compile(r"\$([A-Za-z_][A-Za-z0-9_]*)")
+
+# Write clauses across Cypher and AQL, and Gremlin write steps. A clause
+# keyword isn't part of a name (``n.set``, ``:Update``, ``$delete``), a
+# map key (``{remove: 1}``) or a function call (Cypher's ``replace()``).
+_WRITE_PATTERN = re.compile(
+    r"(?<![\w.:$])(?:CREATE|MERGE|DELETE|SET|REMOVE|DROP|INSERT|UPDATE|UPSERT|REPLACE(?!\s*\())(?!\w|\s*:)"
+    r"|\.(?:addV|addE|mergeV|mergeE|drop|property)\s*\(",
+    re.IGNORECASE
+)
+
+# Procedure calls: ``CALL apoc.create.node(...)``. Subqueries (``CALL {``)
+# are checked through the clauses they contain.
+_CALL_PATTERN = re.compile(r"(?<![\w.:$])CALL\s+(?![({])([^\s(]*)", re.IGNORECASE)
+
+# Procedures known not to write; any other procedure call counts as a
+# write, since procedures like apoc.periodic.iterate run their writes from
+# string arguments.
+_READ_PROCEDURES = re.compile(
+    r"db\.(?:labels|relationshipTypes|propertyKeys|indexes|constraints|info|ping"
+    r"|schema\.\w+|index\.(?:fulltext|vector)\.query\w+)"
+    r"|dbms\.(?:components|procedures|functions|info|showCurrentUser)"
+    r"|apoc\.meta\.\w+",
+    re.IGNORECASE
+)
+
+# String literals, quoted names and comments, blanked out before looking
+# for write clauses.
+_OPAQUE_PATTERN = re.compile(
+    r"'(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\"|`[^`]*`|//[^\n]*|/\*.*?\*/",
+    re.DOTALL
+)
+
+# Summary counters reported in bulk write metadata.
+_WRITE_COUNTERS = (
+    "nodes_created",
+    "nodes_deleted",
+    "relationships_created",
+    "relationships_deleted",
+    "properties_set",
+    "labels_added",
+    "labels_removed",
+)
+
+def _export(value: Any) -> Any:
+    """Convert a driver value to plain data the way ``Record.data()`` does."""
+    if isinstance(value, Node):
+        return {key: _export(item) for key, item in value.items()}
+    if isinstance(value, Relationship):
+        return (_export(value.start_node), type(value).__name__, _export(value.end_node))
+    if isinstance(value, Path):
+        path = [_export(value.start_node)]
+        for relationship, node in zip(value.relationships, value.nodes[1:]):
+            path.extend((type(relationship).__name__, _export(node)))
+        return path
+    if isinstance(value, list):
+        return [_export(item) for item in value]
+    if isinstance(value, dict):
+        return {key: _export(item) for key, item in value.items()}
+    return value
+
 class GraphQuery(BaseModel):
     """Base model for graph queries."""
     query: str
@@ -21,9 +90,136 @@ class GraphResult(BaseModel):
     data: List[Dict[str, Any]]
     metadata: Optional[Dict[str, Any]] = None
 
+StreamItem = Union[Dict[str, Any], List[Dict[str, Any]]]
+
+async def iter_batches(
+    records: AsyncIterator[Dict[str, Any]],
+    batch_size: Optional[int] = None
+) -> AsyncIterator[StreamItem]:
+    """Re-chunk an async record iterator.
+    
+    Args:
+        records: Records to re-chunk
+        batch_size: Records per batch, or None to yield records one by one
+        
+    Yields:
+        Single records, or lists of at most ``batch_size`` records
+    """
+    if batch_size is None:
+        async for record in records:
+            yield record
+        return
+    if batch_size < 1:
+        raise ValueError("batch_size must be positive")
+    batch: List[Dict[str, Any]] = []
+    async for record in records:
+        batch.append(record)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def is_write_query(text: str) -> bool:
+    """Return whether a query may modify the graph.
+    
+    Args:
+        text: Cypher, AQL or Gremlin query text
+        
+    Returns:
+        True if the query contains a write clause or step outside string
+        literals, quoted names and comments, or calls a procedure that
+        isn't known to be read-only
+    """
+    text = _OPAQUE_PATTERN.sub(" ", text)
+    if _WRITE_PATTERN.search(text) is not None:
+        return True
+    return any(
+        not _READ_PROCEDURES.fullmatch(match.group(1))
+        for match in _CALL_PATTERN.finditer(text)
+    )
+
+async def run_bounded(
+    queries: List[GraphQuery],
+    execute: Callable[[GraphQuery], Awaitable[GraphResult]],
+    max_concurrency: int = 1,
+    timeout: Optional[float] = None,
+    fail_fast: bool = True
+) -> List[GraphResult]:
+    """Execute queries with at most ``max_concurrency`` in flight.
+    
+    Args:
+        queries: Queries to execute
+        execute: Coroutine function executing a single query
+        max_concurrency: Maximum number of queries in flight
+        timeout: Per-query timeout in seconds, or None for no limit
+        fail_fast: Raise on the first failure and cancel the remaining
+            queries. Otherwise failures are recorded as empty results
+            with an ``error`` entry in their metadata.
+        
+    Returns:
+        Query results, in input order
+    """
+    if max_concurrency < 1:
+        raise ValueError("max_concurrency must be positive")
+    results: Dict[int, GraphResult] = {}
+    pending = iter(range(len(queries)))
+    
+    async def run_one(query: GraphQuery) -> GraphResult:
+        try:
+            if timeout is None:
+                return await execute(query)
+            return await asyncio.wait_for(execute(query), timeout)
+        except Exception as e:
+            if fail_fast:
+                raise
+            logger.warning(f"Batch query failed: {e!r}")
+            return GraphResult(
+                data=[],
+                metadata={"query": query.query, "error": repr(e)}
+            )
+    
+    async def worker() -> None:
+        # Workers share one index iterator, so each query runs exactly once.
+        for index in pending:
+            results[index] = await run_one(queries[index])
+    
+    workers = [
+        asyncio.ensure_future(worker())
+        for _ in range(min(max_concurrency, len(queries)))
+    ]
+    try:
+        await asyncio.gather(*workers)
+    except BaseException:
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        raise
+    return [results[index] for index in range(len(queries))]
+
 class GraphDBAdapter(ABC):
     """Abstract base class for graph database adapters."""
     
+    # Cheap query used to open and verify pooled connections.
+    warm_up_query: str = "RETURN 1"
+    
+    @property
+    def query_language(self) -> str:
+        """Native query language, used to pick a ``QueryTranslator`` target.
+        
+        Adapters override this with a class attribute, or wrappers with a
+        property.
+        """
+        return "cypher"
+    
+    @property
+    def loop_bound(self) -> bool:
+        """Whether the driver is bound to the event loop it connected on.
+        
+        Each loop then needs its own connected instance.
+        """
+        return True
+    
     @abstractmethod
     async def connect(self) -> None:
         """Establish connection to the database."""
@@ -46,6 +242,53 @@ class GraphDBAdapter(ABC):
         """
         pass
     
+    async def execute_query_stream(
+        self,
+        query: GraphQuery,
+        batch_size: Optional[int] = None
+    ) -> AsyncIterator[StreamItem]:
+        """Execute a query and yield records as they arrive.
+        
+        Records are pulled from the database only as the caller consumes
+        them, so memory use is bounded by the batch size rather than the
+        size of the result. Backends override this; the default falls
+        back to ``execute_query`` and re-chunks the materialized result.
+        
+        Args:
+            query: Query to execute
+            batch_size: Records per yielded batch, or None to yield
+                records one by one
+            
+        Yields:
+            Single records, or lists of at most ``batch_size`` records
+        """
+        result = await self.execute_query(query)
+        
+        async def records():
+            for record in result.data:
+                yield record
+        
+        async for item in iter_batches(records(), batch_size):
+            yield item
+    
+    async def execute_query_columnar(self, query: GraphQuery) -> ColumnarResult:
+        """Execute a query into a compact column-oriented result.
+        
+        Records are streamed straight into per-column storage, so no
+        ``GraphResult`` or list of row dicts is ever built. Numeric columns
+        are packed for zero-copy NumPy export.
+        
+        Args:
+            query: Query to execute
+            
+        Returns:
+            Columnar query results
+        """
+        result = ColumnarResult((), metadata={"query": query.query})
+        async for batch in self.execute_query_stream(query, batch_size=1000):
+            result.extend_records(batch)
+        return result.compact()
+    
     @abstractmethod
     async def batch_execute(self, queries: List[GraphQuery]) -> List[GraphResult]:
         """Execute multiple queries in batch.
@@ -57,6 +300,32 @@ class GraphDBAdapter(ABC):
             List of query results
         """
         pass
+    
+    async def warm_up(self, connections: int) -> None:
+        """Open ``connections`` pooled connections ahead of traffic.
+        
+        Runs ``warm_up_query`` on that many connections at once so the
+        pool is populated before the first real query arrives.
+        
+        Args:
+            connections: Number of connections to open
+        """
+        if connections < 1:
+            return
+        await run_bounded(
+            [GraphQuery(query=self.warm_up_query)] * connections,
+            self.execute_query,
+            max_concurrency=connections
+        )
+        logger.info(f"Warmed up {connections} connections")
+    
+    def pool_stats(self) -> Dict[str, Any]:
+        """Return connection pool utilization and wait-time statistics.
+        
+        Returns:
+            Pool statistics, empty if the adapter does not track them
+        """
+        return {}
 
 class Neo4jAdapter(GraphDBAdapter):
     """Neo4j database adapter implementation."""
@@ -66,7 +335,11 @@ class Neo4jAdapter(GraphDBAdapter):
         uri: str,
         username: str,
         password: str,
-        database: str = "neo4j"
+        database: str = "neo4j",
+        bulk_chunk_size: int = 1000,
+        fetch_size: int = 1000,
+        max_concurrency: int = 8,
+        pool: Union[PoolConfig, Dict[str, Any], None] = None
     ):
         """Initialize Neo4j adapter.
         
@@ -75,11 +348,26 @@ class Neo4jAdapter(GraphDBAdapter):
             username: Database username
             password: Database password
             database: Database name
+            bulk_chunk_size: Default number of rows committed per
+                transaction by ``bulk_write``
+            fetch_size: Records fetched per network round trip when
+                streaming results
+            max_concurrency: Maximum number of sessions used to fan out
+                read-only batches
+            pool: Connection pool settings, passed through to the driver
         """
         self.uri = uri
         self.username = username
         self.password = password
         self.database = database
+        self.bulk_chunk_size = bulk_chunk_size
+        self.fetch_size = fetch_size
+        self.max_concurrency = max_concurrency
+        self.pool = PoolConfig.coerce(pool)
+        self._limiter = ConnectionLimiter(
+            self.pool.max_size,
+            self.pool.acquisition_timeout
+        )
         self._driver: Optional[AsyncDriver] = None
         
     async def connect(self) -> None:
@@ -87,13 +375,33 @@ class Neo4jAdapter(GraphDBAdapter):
         try:
             self._driver = AsyncGraphDatabase.driver(
                 self.uri,
-                auth=(self.username, self.password)
+                auth=(self.username, self.password),
+                max_connection_pool_size=self.pool.max_size,
+                connection_acquisition_timeout=self.pool.acquisition_timeout,
+                max_connection_lifetime=self.pool.max_lifetime,
+                keep_alive=self.pool.keep_alive is not None,
+                liveness_check_timeout=self.pool.keep_alive
             )
             await self._driver.verify_connectivity()
             logger.info(f"Connected to Neo4j at {self.uri}")
         except Exception as e:
             logger.error(f"Failed to connect to Neo4j: {e}")
             raise
+        await self.warm_up(self.pool.warm_up)
+    
+    def pool_stats(self) -> Dict[str, Any]:
+        """Return connection pool utilization and wait-time statistics."""
+        return self._limiter.stats()
+    
+    @asynccontextmanager
+    async def _session(self, **config):
+        """Open a session once a pool slot is free."""
+        async with self._limiter.acquire():
+            async with self._driver.session(
+                database=self.database,
+                **config
+            ) as session:
+                yield session
     
     async def disconnect(self) -> None:
         """Close Neo4j connection."""
@@ -113,7 +421,7 @@ class Neo4jAdapter(GraphDBAdapter):
         if not self._driver:
             raise RuntimeError("Not connected to database")
             
-        async with self._driver.session(database=self.database) as session:
+        async with self._session() as session:
             result = await session.run(
                 query.query,
                 parameters=query.parameters or {}
@@ -125,30 +433,265 @@ class Neo4jAdapter(GraphDBAdapter):
                 metadata={"query": query.query}
             )
     
-    async def batch_execute(self, queries: List[GraphQuery]) -> List[GraphResult]:
+    async def execute_query_stream(
+        self,
+        query: GraphQuery,
+        batch_size: Optional[int] = None
+    ) -> AsyncIterator[StreamItem]:
+        """Execute a Cypher query and yield records as they arrive.
+        
+        The driver pulls ``fetch_size`` records per round trip and only
+        requests more once the caller has consumed the buffered ones.
+        
+        Args:
+            query: Cypher query with parameters
+            batch_size: Records per yielded batch, or None to yield
+                records one by one
+            
+        Yields:
+            Single records, or lists of at most ``batch_size`` records
+        """
+        if not self._driver:
+            raise RuntimeError("Not connected to database")
+        
+        fetch_size = max(self.fetch_size, batch_size or 0)
+        async with self._session(fetch_size=fetch_size) as session:
+            result = await session.run(
+                query.query,
+                parameters=query.parameters or {}
+            )
+            
+            async def records():
+                async for record in result:
+                    yield record.data()
+            
+            async for item in iter_batches(records(), batch_size):
+                yield item
+    
+    async def execute_query_columnar(self, query: GraphQuery) -> ColumnarResult:
+        """Execute a Cypher query into a compact column-oriented result.
+        
+        Column names come from the result keys and each record's values are
+        appended positionally, skipping per-row dict construction.
+        
+        Args:
+            query: Cypher query with parameters
+            
+        Returns:
+            Columnar query results
+        """
+        if not self._driver:
+            raise RuntimeError("Not connected to database")
+        
+        async with self._session(fetch_size=self.fetch_size) as session:
+            result = await session.run(
+                query.query,
+                parameters=query.parameters or {}
+            )
+            columns = ColumnarResult(
+                await result.keys(),
+                metadata={"query": query.query}
+            )
+            async for record in result:
+                columns.append([_export(value) for value in record.values()])
+        return columns.compact()
+    
+    async def batch_execute(
+        self,
+        queries: List[GraphQuery],
+        bulk: bool = False,
+        chunk_size: Optional[int] = None,
+        max_concurrency: Optional[int] = None,
+        timeout: Optional[float] = None,
+        fail_fast: bool = True
+    ) -> List[GraphResult]:
         """Execute multiple Cypher queries in batch.
         
+        Read-only batches are fanned out across up to ``max_concurrency``
+        sessions, each running its query in a read transaction. Batches
+        containing writes run sequentially on a single session, which is
+        replaced by a fresh one, following its bookmarks, after a query
+        fails. Their timeout is enforced by the server as a transaction
+        timeout, so it never interrupts the session mid-stream.
+        
         Args:
             queries: List of Cypher queries
+            bulk: Fold queries sharing the same text into ``UNWIND`` writes
+                (see ``bulk_write``)
+            chunk_size: Rows per transaction in bulk mode
+            max_concurrency: Maximum sessions in flight for read-only
+                batches, defaults to the adapter's ``max_concurrency``
+            timeout: Per-query timeout in seconds
+            fail_fast: Raise on the first failure instead of recording it
+                in the failed result's metadata
             
         Returns:
-            List of query results
+            List of query results, in input order
         """
-        results = []
-        async with self._driver.session(database=self.database) as session:
-            for query in queries:
+        if bulk:
+            return await self.bulk_write(queries, chunk_size=chunk_size)
+        if not self._driver:
+            raise RuntimeError("Not connected to database")
+        
+        max_concurrency = max_concurrency or self.max_concurrency
+        if max_concurrency > 1 and not any(
+            is_write_query(query.query) for query in queries
+        ):
+            return await run_bounded(
+                queries,
+                self._execute_read,
+                max_concurrency=max_concurrency,
+                timeout=timeout,
+                fail_fast=fail_fast
+            )
+        
+        session = None
+        sessions = AsyncExitStack()
+        bookmarks = None
+        
+        async def execute(query: GraphQuery) -> GraphResult:
+            nonlocal session, sessions, bookmarks
+            if session is None:
+                session = await sessions.enter_async_context(self._session(bookmarks=bookmarks))
+            try:
                 result = await session.run(
-                    query.query,
+                    Query(query.query, timeout=timeout),
                     parameters=query.parameters or {}
                 )
                 records = await result.data()
-                results.append(
-                    GraphResult(
-                        data=records,
-                        metadata={"query": query.query}
+            except BaseException:
+                # The failed query may have left the session mid-stream;
+                # later queries get a fresh one that follows its writes.
+                broken, stack = session, sessions
+                session, sessions = None, AsyncExitStack()
+                try:
+                    bookmarks = await broken.last_bookmarks()
+                except Exception as e:
+                    logger.warning(f"Failed to read bookmarks after a failed query: {e!r}")
+                finally:
+                    await stack.aclose()
+                raise
+            return GraphResult(
+                data=records,
+                metadata={"query": query.query}
+            )
+        
+        try:
+            return await run_bounded(queries, execute, fail_fast=fail_fast)
+        finally:
+            await sessions.aclose()
+    
+    async def _execute_read(self, query: GraphQuery) -> GraphResult:
+        """Execute a query in a read transaction on its own session."""
+        async with self._session(default_access_mode=READ_ACCESS) as session:
+            records = await session.execute_read(
+                self._read_records, query.query, query.parameters or {}
+            )
+            return GraphResult(
+                data=records,
+                metadata={"query": query.query}
+            )
+    
+    @staticmethod
+    async def _read_records(tx, statement: str, parameters: Dict[str, Any]):
+        """Transaction function used by ``_execute_read``."""
+        result = await tx.run(statement, parameters)
+        return await result.data()
+    
+    async def bulk_write(
+        self,
+        queries: List[GraphQuery],
+        chunk_size: Optional[int] = None
+    ) -> List[GraphResult]:
+        """Execute write queries as chunked ``UNWIND`` statements.
+        
+        Queries with identical Cypher text are grouped and their parameter
+        maps folded into a single ``UNWIND $rows`` statement, so N inputs
+        cost ``ceil(N / chunk_size)`` round trips and transactions instead
+        of N. Each chunk is committed in its own managed write transaction.
+        
+        ``$name`` references in the query text are rewritten to read from
+        the current row, so the statement must not contain ``$`` inside
+        string literals.
+        
+        Args:
+            queries: Write queries to execute
+            chunk_size: Rows per transaction, defaults to ``bulk_chunk_size``
+            
+        Returns:
+            One result per input query, in input order
+        """
+        if not self._driver:
+            raise RuntimeError("Not connected to database")
+        chunk_size = chunk_size or self.bulk_chunk_size
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be positive")
+        
+        groups: Dict[str, List[int]] = {}
+        for index, query in enumerate(queries):
+            groups.setdefault(query.query, []).append(index)
+        
+        results: Dict[int, GraphResult] = {}
+        async with self._session() as session:
+            for text, indices in groups.items():
+                statement = self._unwind_statement(text)
+                for start in range(0, len(indices), chunk_size):
+                    chunk = indices[start:start + chunk_size]
+                    rows = [
+                        {**(queries[i].parameters or {}), "_idx": i}
+                        for i in chunk
+                    ]
+                    records, counters = await session.execute_write(
+                        self._run_unwind, statement, rows
                     )
-                )
-        return results
+                    per_input: Dict[int, List[Dict[str, Any]]] = {
+                        i: [] for i in chunk
+                    }
+                    for record in records:
+                        row = record.pop("_row")
+                        if record:
+                            per_input[row["_idx"]].append(record)
+                    for i in chunk:
+                        results[i] = GraphResult(
+                            data=per_input[i],
+                            metadata={
+                                "query": text,
+                                "bulk": True,
+                                "batch_size": len(chunk),
+                                "counters": counters,
+                            }
+                        )
+        logger.debug(
+            f"Bulk wrote {len(queries)} queries as {len(groups)} statements"
+        )
+        return [results[index] for index in range(len(queries))]
+    
+    @staticmethod
+    def _unwind_statement(query: str) -> str:
+        """Wrap a per-row query in an ``UNWIND`` over ``$rows``.
+        
+        The original query runs inside a ``CALL`` subquery so that each
+        returned record can be traced back to the input row it came from.
+        """
+        body = _PARAM_PATTERN.sub(r"_row.\1", query)
+        return (
+            "UNWIND $rows AS _row "
+            f"CALL {{ WITH _row {body} }} "
+            "RETURN *"
+        )
+    
+    @staticmethod
+    async def _run_unwind(tx, statement: str, rows: List[Dict[str, Any]]):
+        """Transaction function used by ``bulk_write``."""
+        result = await tx.run(statement, rows=rows)
+        records = await result.data()
+        summary = await result.consume()
+        counters = {
+            name: getattr(summary.counters, name)
+            for name in _WRITE_COUNTERS
+            if getattr(summary.counters, name)
+        }
+        return records, counters
 
 def create_adapter(
     db_url: str,
@@ -1,24 +1,52 @@
-from .neo4j_adapter import Neo4jAdapter
+from typing import Any, Dict, Optional
+
+from .adapter import GraphDBAdapter, Neo4jAdapter
 from .arangodb_adapter import ArangoDBAdapter
+from .federated_adapter import FederatedGraphAdapter
+from .memory_adapter import InMemoryGraphAdapter
 from .neptune_adapter import NeptuneAdapter
-from .adapter import GraphDBAdapter
+from .query_cache import CachedGraphAdapter
 
 
-def create_adapter(db_type: str, **kwargs) -> GraphDBAdapter:
+def create_adapter(
+    db_type: str,
+    cache: Optional[Dict[str, Any]] = None,
+    **kwargs
+) -> GraphDBAdapter:
     """Factory function to create a graph database adapter.
-    
+
     Args:
-        db_type: The type of the database ('neo4j', 'arangodb', 'neptune').
+        db_type: The type of the database ('neo4j', 'arangodb', 'neptune',
+            'memory', 'federated'). A federated adapter takes ``backends``
+            mapping backend names to adapter settings (including their
+            ``db_type``), or to lists of such settings for replicas.
+        cache: Optional ``CachedGraphAdapter`` settings (``max_size``,
+            ``ttl``). When given, the adapter is wrapped in a result cache.
         **kwargs: Additional arguments for the adapter.
-    
+
     Returns:
         An instance of GraphDBAdapter.
     """
     if db_type == 'neo4j':
-        return Neo4jAdapter(**kwargs)
+        adapter: GraphDBAdapter = Neo4jAdapter(**kwargs)
     elif db_type == 'arangodb':
-        return ArangoDBAdapter(**kwargs)
+        adapter = ArangoDBAdapter(**kwargs)
     elif db_type == 'neptune':
-        return NeptuneAdapter(**kwargs)
+        adapter = NeptuneAdapter(**kwargs)
+    elif db_type == 'memory':
+        adapter = InMemoryGraphAdapter(**kwargs)
+    elif db_type == 'federated':
+        backends = {
+            name: [
+                create_adapter(**replica)
+                for replica in (spec if isinstance(spec, list) else [spec])
+            ]
+            for name, spec in kwargs.pop('backends').items()
+        }
+        adapter = FederatedGraphAdapter(backends, **kwargs)
     else:
-        raise ValueError(f"Unsupported database type: {db_type}") 
\ No newline at end of file
+        raise ValueError(f"Unsupported database type: {db_type}")
+
+    if cache is not None:
+        return CachedGraphAdapter(adapter, **cache)
+    return adapter
@@ -1,33 +1,146 @@
-from typing import Any, Dict, List
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional, Union
 from aioarangodb import ArangoClient
-from .adapter import GraphDBAdapter, GraphQuery, GraphResult
+from .adapter import (
+    GraphDBAdapter,
+    GraphQuery,
+    GraphResult,
+    StreamItem,
+    is_write_query,
+    iter_batches,
+    run_bounded,
+)
+from .pool import ConnectionLimiter, PoolConfig
+
+logger = logging.getLogger(__name__)
 
 class ArangoDBAdapter(GraphDBAdapter):
     """ArangoDB database adapter implementation."""
     
-    def __init__(self, url: str, username: str, password: str, database: str):
-        self.client = ArangoClient(hosts=url)
-        self.db = self.client.db(database, username=username, password=password)
+    query_language = "aql"
+    
+    def __init__(
+        self,
+        url: str,
+        username: str,
+        password: str,
+        database: str,
+        max_concurrency: int = 8,
+        pool: Union[PoolConfig, Dict[str, Any], None] = None
+    ):
+        self.url = url
+        self.username = username
+        self.password = password
+        self.database = database
+        self.max_concurrency = max_concurrency
+        self.pool = PoolConfig.coerce(pool)
+        self._limiter = ConnectionLimiter(
+            self.pool.max_size,
+            self.pool.acquisition_timeout
+        )
+        self.client: Optional[ArangoClient] = None
+        self.db = None
+        self._connected_at = 0.0
     
     async def connect(self) -> None:
         """Establish connection to ArangoDB database."""
-        # Connection is established in the constructor
-        pass
+        self.client = ArangoClient(hosts=self.url)
+        self.db = self.client.db(
+            self.database,
+            username=self.username,
+            password=self.password
+        )
+        self._connected_at = time.monotonic()
+        logger.info(f"Connected to ArangoDB at {self.url}")
+        await self.warm_up(self.pool.warm_up)
     
     async def disconnect(self) -> None:
         """Close ArangoDB connection."""
-        self.client.close()
+        if self.client:
+            self.client.close()
+            self.client = None
+            self.db = None
+    
+    def pool_stats(self) -> Dict[str, Any]:
+        """Return connection pool utilization and wait-time statistics."""
+        return self._limiter.stats()
+    
+    @asynccontextmanager
+    async def _connection(self):
+        """Hold a pool slot, recycling the client once it exceeds its lifetime."""
+        if not self.client:
+            raise RuntimeError("Not connected to database")
+        if (
+            self._limiter.in_use == 0
+            and time.monotonic() - self._connected_at > self.pool.max_lifetime
+        ):
+            await self.disconnect()
+            await self.connect()
+        async with self._limiter.acquire():
+            yield self.db
     
     async def execute_query(self, query: GraphQuery) -> GraphResult:
         """Execute an AQL query."""
-        cursor = await self.db.aql.execute(query.query, bind_vars=query.parameters or {})
-        records = [record async for record in cursor]
+        async with self._connection() as db:
+            cursor = await db.aql.execute(query.query, bind_vars=query.parameters or {})
+            records = [record async for record in cursor]
         return GraphResult(data=records, metadata={"query": query.query})
     
-    async def batch_execute(self, queries: List[GraphQuery]) -> List[GraphResult]:
-        """Execute multiple AQL queries in batch."""
-        results = []
-        for query in queries:
-            result = await self.execute_query(query)
-            results.append(result)
-        return results 
\ No newline at end of file
+    async def execute_query_stream(
+        self,
+        query: GraphQuery,
+        batch_size: Optional[int] = None
+    ) -> AsyncIterator[StreamItem]:
+        """Execute an AQL query and yield records as they arrive.
+        
+        Uses a streaming cursor so the server produces results lazily and
+        the next batch is only fetched once the current one is consumed.
+        """
+        async with self._connection() as db:
+            cursor = await db.aql.execute(
+                query.query,
+                bind_vars=query.parameters or {},
+                batch_size=batch_size or 1000,
+                stream=True
+            )
+            try:
+                async for item in iter_batches(cursor, batch_size):
+                    yield item
+            finally:
+                await cursor.close(ignore_missing=True)
+    
+    async def batch_execute(
+        self,
+        queries: List[GraphQuery],
+        max_concurrency: Optional[int] = None,
+        timeout: Optional[float] = None,
+        fail_fast: bool = True
+    ) -> List[GraphResult]:
+        """Execute multiple AQL queries in batch.
+        
+        Read-only batches are dispatched concurrently over the client's
+        connection pool, with at most ``max_concurrency`` queries in
+        flight. Batches containing writes run sequentially.
+        
+        Args:
+            queries: List of AQL queries
+            max_concurrency: Maximum queries in flight, defaults to the
+                adapter's ``max_concurrency``
+            timeout: Per-query timeout in seconds
+            fail_fast: Raise on the first failure instead of recording it
+                in the failed result's metadata
+        
+        Returns:
+            List of query results, in input order
+        """
+        if any(is_write_query(query.query) for query in queries):
+            max_concurrency = 1
+        return await run_bounded(
+            queries,
+            self.execute_query,
+            max_concurrency=max_concurrency or self.max_concurrency,
+            timeout=timeout,
+            fail_fast=fail_fast
+        )
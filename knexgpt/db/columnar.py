@@ -0,0 +1,232 @@
+"""
+Compact column-oriented query results.
+"""
+from array import array
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+if TYPE_CHECKING:
+    from .adapter import GraphResult
+
+# array.array typecodes and the matching NumPy dtypes.
+_NUMPY_DTYPES = {"q": "int64", "d": "float64"}
+
+# Python types each packed typecode accepts without loss.
+_PACKED_TYPES = {"q": (int,), "d": (int, float)}
+
+class ColumnarResult:
+    """Query result stored column by column.
+
+    Column names are stored once and values are kept in one sequence per
+    column, with no per-row dicts and no validation on construction.
+    Numeric columns can be packed into typed buffers with ``compact`` and
+    then exported to NumPy without copying. Rows and dict records are
+    produced lazily on iteration.
+    """
+
+    __slots__ = ("columns", "metadata", "_data", "_index", "_length")
+
+    def __init__(
+        self,
+        columns: Sequence[str],
+        data: Optional[List[Sequence[Any]]] = None,
+        metadata: Optional[Dict[str, Any]] = None
+    ):
+        """Initialize a columnar result.
+
+        Args:
+            columns: Column names
+            data: Optional values, one sequence per column
+            metadata: Optional result metadata
+        """
+        self.columns: Tuple[str, ...] = tuple(columns)
+        self.metadata = metadata
+        self._index = {name: i for i, name in enumerate(self.columns)}
+        if data is None:
+            self._data: List[Any] = [[] for _ in self.columns]
+            self._length = 0
+        else:
+            if len(data) != len(self.columns):
+                raise ValueError("Expected one value sequence per column")
+            self._data = list(data)
+            lengths = {len(values) for values in self._data}
+            if len(lengths) > 1:
+                raise ValueError("Column lengths differ")
+            self._length = lengths.pop() if lengths else 0
+
+    @classmethod
+    def from_records(
+        cls,
+        records: Iterable[Any],
+        metadata: Optional[Dict[str, Any]] = None
+    ) -> "ColumnarResult":
+        """Build a result from dict records.
+
+        Columns are added as new keys appear; missing values are None.
+        Non-dict records are stored in a single ``value`` column.
+
+        Args:
+            records: Records to store
+            metadata: Optional result metadata
+
+        Returns:
+            Columnar result
+        """
+        result = cls((), metadata=metadata)
+        for record in records:
+            result.append_record(record)
+        return result
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return self.records()
+
+    def __repr__(self) -> str:
+        return f"ColumnarResult(columns={self.columns!r}, rows={self._length})"
+
+    def append(self, values: Sequence[Any]) -> None:
+        """Append a row given as values in column order.
+
+        Args:
+            values: Row values
+        """
+        if len(values) != len(self.columns):
+            raise ValueError(
+                f"Expected {len(self.columns)} values, got {len(values)}"
+            )
+        for i, value in enumerate(values):
+            self._append_value(i, value)
+        self._length += 1
+
+    def append_record(self, record: Any) -> None:
+        """Append a row given as a dict record.
+
+        Args:
+            record: Record to append
+        """
+        if not isinstance(record, dict):
+            record = {"value": record}
+        for name in record:
+            if name not in self._index:
+                self._add_column(name)
+        for name, i in self._index.items():
+            self._append_value(i, record.get(name))
+        self._length += 1
+
+    def extend_records(self, records: Iterable[Any]) -> None:
+        """Append several dict records.
+
+        Args:
+            records: Records to append
+        """
+        for record in records:
+            self.append_record(record)
+
+    def column(self, name: str) -> Sequence[Any]:
+        """Return the values of a column without copying.
+
+        Args:
+            name: Column name
+
+        Returns:
+            Column values, a list or a typed ``array.array``
+        """
+        try:
+            return self._data[self._index[name]]
+        except KeyError:
+            raise KeyError(f"Unknown column: {name}") from None
+
+    def rows(self) -> Iterator[Tuple[Any, ...]]:
+        """Iterate over rows as tuples in column order."""
+        return zip(*self._data)
+
+    def records(self) -> Iterator[Dict[str, Any]]:
+        """Iterate over rows as dict records, built on demand."""
+        columns = self.columns
+        for row in self.rows():
+            yield dict(zip(columns, row))
+
+    @property
+    def data(self) -> List[Dict[str, Any]]:
+        """Rows as a list of dict records, for ``GraphResult`` compatibility."""
+        return list(self.records())
+
+    def to_graph_result(self) -> "GraphResult":
+        """Convert to a row-oriented ``GraphResult``.
+
+        Returns:
+            Equivalent GraphResult
+        """
+        # Imported here because the adapters module builds columnar results.
+        from .adapter import GraphResult
+
+        return GraphResult(data=self.data, metadata=self.metadata)
+
+    def compact(self) -> "ColumnarResult":
+        """Pack purely numeric columns into typed buffers.
+
+        Integer columns become ``array('q')`` and mixed int/float columns
+        ``array('d')``. Columns holding None, bools or other types are left
+        as lists.
+
+        Returns:
+            This result, for chaining
+        """
+        for i, values in enumerate(self._data):
+            if isinstance(values, array) or not values:
+                continue
+            types = {type(value) for value in values}
+            try:
+                if types == {int}:
+                    self._data[i] = array("q", values)
+                elif types <= {int, float}:
+                    self._data[i] = array("d", values)
+            except OverflowError:
+                continue
+        return self
+
+    def to_numpy(self, name: str):
+        """Export a column as a NumPy array.
+
+        Numeric columns packed by ``compact`` are exported without copying;
+        the returned array shares memory with this result. Other columns
+        are converted.
+
+        Args:
+            name: Column name
+
+        Returns:
+            numpy.ndarray of the column values
+        """
+        try:
+            import numpy as np
+        except ImportError as e:
+            raise ImportError("NumPy is required for to_numpy()") from e
+
+        values = self.column(name)
+        if not isinstance(values, array):
+            self.compact()
+            values = self.column(name)
+        if isinstance(values, array):
+            return np.frombuffer(values, dtype=_NUMPY_DTYPES[values.typecode])
+        return np.asarray(values)
+
+    def _add_column(self, name: str) -> None:
+        self._index[name] = len(self.columns)
+        self.columns = self.columns + (name,)
+        self._data.append([None] * self._length)
+
+    def _append_value(self, i: int, value: Any) -> None:
+        values = self._data[i]
+        if isinstance(values, array):
+            if type(value) in _PACKED_TYPES[values.typecode]:
+                try:
+                    values.append(value)
+                    return
+                except (OverflowError, BufferError):
+                    pass
+            # The value doesn't fit the packed type, or the buffer is
+            # exported to NumPy and can't grow; fall back to a list.
+            values = self._data[i] = values.tolist()
+        values.append(value)
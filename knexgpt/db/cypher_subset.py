@@ -0,0 +1,495 @@
+"""
+Parser for the subset of Cypher understood by the in-memory graph engine.
+
+Supported clauses are ``MATCH``/``OPTIONAL MATCH`` with ``WHERE``,
+``UNWIND``, ``CREATE``, ``MERGE`` with ``ON CREATE``/``ON MATCH SET``,
+``SET``, ``REMOVE``, ``DELETE``/``DETACH DELETE`` and ``RETURN`` with
+``DISTINCT``, ``ORDER BY``, ``SKIP`` and ``LIMIT``. Expressions cover
+literals, parameters, property access, comparisons, boolean logic,
+arithmetic and a handful of scalar and aggregate functions.
+
+Expressions are parsed into nested tuples whose first element names the
+node type, e.g. ``("prop", ("var", "n"), "name")``.
+"""
+import re
+from typing import Any, List, NamedTuple, NoReturn, Optional, Tuple
+
+class CypherSyntaxError(ValueError):
+    """Raised for queries outside the supported Cypher subset."""
+
+class Token(NamedTuple):
+    kind: str
+    value: Any
+    start: int
+    end: int
+
+class NodePattern(NamedTuple):
+    var: Optional[str]
+    labels: Tuple[str, ...]
+    props: Optional[tuple]
+
+class RelPattern(NamedTuple):
+    var: Optional[str]
+    types: Tuple[str, ...]
+    props: Optional[tuple]
+    direction: str  # "out", "in" or "both"
+
+class PathPattern(NamedTuple):
+    nodes: Tuple[NodePattern, ...]
+    rels: Tuple[RelPattern, ...]
+
+class ReturnItem(NamedTuple):
+    expr: tuple
+    name: str
+
+AGGREGATES = frozenset({"count", "sum", "avg", "min", "max", "collect"})
+
+_TOKEN_PATTERN = re.compile(
+    r"""
+    (?P<ws>\s+)
+    |(?P<string>'(?:[^'\\]|\\.)*'|"(?:[^"\\]|\\.)*")
+    |(?P<number>\d+\.\d+|\d+)
+    |(?P<param>\$[A-Za-z_][A-Za-z0-9_]*)
+    |(?P<ident>[A-Za-z_][A-Za-z0-9_]*|`[^`]+`)
+    |(?P<symbol><>|<=|>=|\+=|!=|[-+*/%<>=(){}\[\]:,.|])
+    """,
+    re.VERBOSE,
+)
+
+_ESCAPES = {"n": "\n", "t": "\t", "r": "\r", "\\": "\\", "'": "'", '"': '"'}
+
+def _unescape(text: str) -> str:
+    return re.sub(r"\\(.)", lambda m: _ESCAPES.get(m.group(1), m.group(1)), text)
+
+def tokenize(text: str) -> List[Token]:
+    """Split a query into tokens.
+
+    Args:
+        text: Query text
+
+    Returns:
+        List of tokens, terminated by an ``eof`` token
+    """
+    tokens = []
+    pos = 0
+    while pos < len(text):
+        match = _TOKEN_PATTERN.match(text, pos)
+        if not match:
+            raise CypherSyntaxError(f"Unexpected character {text[pos]!r} at {pos}")
+        kind = match.lastgroup
+        value = match.group()
+        if kind == "string":
+            tokens.append(Token("string", _unescape(value[1:-1]), pos, match.end()))
+        elif kind == "number":
+            number = float(value) if "." in value else int(value)
+            tokens.append(Token("number", number, pos, match.end()))
+        elif kind == "param":
+            tokens.append(Token("param", value[1:], pos, match.end()))
+        elif kind == "ident":
+            tokens.append(Token("ident", value.strip("`"), pos, match.end()))
+        elif kind == "symbol":
+            tokens.append(Token("symbol", value, pos, match.end()))
+        pos = match.end()
+    tokens.append(Token("eof", None, pos, pos))
+    return tokens
+
+class Parser:
+    """Recursive-descent parser producing a list of clause tuples."""
+
+    def __init__(self, text: str):
+        self.text = text
+        self.tokens = tokenize(text)
+        self.pos = 0
+
+    # Token helpers
+
+    def peek(self, offset: int = 0) -> Token:
+        return self.tokens[min(self.pos + offset, len(self.tokens) - 1)]
+
+    def advance(self) -> Token:
+        token = self.tokens[self.pos]
+        self.pos += 1
+        return token
+
+    def at_keyword(self, *words: str, offset: int = 0) -> bool:
+        for i, word in enumerate(words):
+            token = self.peek(offset + i)
+            if token.kind != "ident" or token.value.upper() != word:
+                return False
+        return True
+
+    def accept_keyword(self, *words: str) -> bool:
+        if self.at_keyword(*words):
+            self.pos += len(words)
+            return True
+        return False
+
+    def expect_keyword(self, word: str) -> None:
+        if not self.accept_keyword(word):
+            self.error(f"Expected {word}")
+
+    def at_symbol(self, symbol: str, offset: int = 0) -> bool:
+        token = self.peek(offset)
+        return token.kind == "symbol" and token.value == symbol
+
+    def accept_symbol(self, symbol: str) -> bool:
+        if self.at_symbol(symbol):
+            self.pos += 1
+            return True
+        return False
+
+    def expect_symbol(self, symbol: str) -> None:
+        if not self.accept_symbol(symbol):
+            self.error(f"Expected {symbol!r}")
+
+    def expect_ident(self) -> str:
+        token = self.advance()
+        if token.kind != "ident":
+            self.pos -= 1
+            self.error("Expected identifier")
+        return token.value
+
+    def error(self, message: str) -> NoReturn:
+        token = self.peek()
+        raise CypherSyntaxError(
+            f"{message} at position {token.start} in query: {self.text!r}"
+        )
+
+    # Clauses
+
+    def parse(self) -> List[tuple]:
+        clauses = []
+        while self.peek().kind != "eof":
+            clauses.append(self.parse_clause())
+        if not clauses:
+            self.error("Empty query")
+        return clauses
+
+    def parse_clause(self) -> tuple:
+        if self.accept_keyword("OPTIONAL", "MATCH"):
+            return self.parse_match(optional=True)
+        if self.accept_keyword("MATCH"):
+            return self.parse_match(optional=False)
+        if self.accept_keyword("UNWIND"):
+            expr = self.parse_expr()
+            self.expect_keyword("AS")
+            return ("unwind", expr, self.expect_ident())
+        if self.accept_keyword("CREATE"):
+            return ("create", self.parse_pattern_list())
+        if self.accept_keyword("MERGE"):
+            return self.parse_merge()
+        if self.accept_keyword("SET"):
+            return ("set", self.parse_set_items())
+        if self.accept_keyword("REMOVE"):
+            return ("remove", self.parse_remove_items())
+        if self.accept_keyword("DETACH", "DELETE"):
+            return ("delete", self.parse_expr_list(), True)
+        if self.accept_keyword("DELETE"):
+            return ("delete", self.parse_expr_list(), False)
+        if self.accept_keyword("RETURN"):
+            return self.parse_return()
+        self.error("Unsupported clause")
+
+    def parse_match(self, optional: bool) -> tuple:
+        paths = self.parse_pattern_list()
+        where = self.parse_expr() if self.accept_keyword("WHERE") else None
+        return ("match", paths, where, optional)
+
+    def parse_merge(self) -> tuple:
+        path = self.parse_path()
+        on_create, on_match = [], []
+        while self.at_keyword("ON"):
+            if self.accept_keyword("ON", "CREATE", "SET"):
+                on_create.extend(self.parse_set_items())
+            elif self.accept_keyword("ON", "MATCH", "SET"):
+                on_match.extend(self.parse_set_items())
+            else:
+                self.error("Expected ON CREATE SET or ON MATCH SET")
+        return ("merge", path, tuple(on_create), tuple(on_match))
+
+    def parse_set_items(self) -> List[tuple]:
+        items = [self.parse_set_item()]
+        while self.accept_symbol(","):
+            items.append(self.parse_set_item())
+        return items
+
+    def parse_set_item(self) -> tuple:
+        var = self.expect_ident()
+        if self.accept_symbol("."):
+            key = self.expect_ident()
+            self.expect_symbol("=")
+            return ("set_prop", var, key, self.parse_expr())
+        if self.accept_symbol("+="):
+            return ("merge_props", var, self.parse_expr())
+        if self.accept_symbol("="):
+            return ("replace_props", var, self.parse_expr())
+        if self.at_symbol(":"):
+            return ("add_labels", var, self.parse_labels())
+        self.error("Unsupported SET item")
+
+    def parse_remove_items(self) -> List[tuple]:
+        items: List[tuple] = []
+        while True:
+            var = self.expect_ident()
+            if self.accept_symbol("."):
+                items.append(("remove_prop", var, self.expect_ident()))
+            else:
+                items.append(("remove_labels", var, self.parse_labels()))
+            if not self.accept_symbol(","):
+                return items
+
+    def parse_return(self) -> tuple:
+        distinct = self.accept_keyword("DISTINCT")
+        items: Optional[List[ReturnItem]]
+        if self.accept_symbol("*"):
+            items = None
+        else:
+            items = [self.parse_return_item()]
+            while self.accept_symbol(","):
+                items.append(self.parse_return_item())
+        order = []
+        if self.accept_keyword("ORDER", "BY"):
+            while True:
+                expr = self.parse_expr()
+                descending = False
+                if self.accept_keyword("DESC") or self.accept_keyword("DESCENDING"):
+                    descending = True
+                elif not self.accept_keyword("ASC"):
+                    self.accept_keyword("ASCENDING")
+                order.append((expr, descending))
+                if not self.accept_symbol(","):
+                    break
+        skip = self.parse_expr() if self.accept_keyword("SKIP") else None
+        limit = self.parse_expr() if self.accept_keyword("LIMIT") else None
+        if self.peek().kind != "eof":
+            self.error("RETURN must be the last clause")
+        return ("return", items, distinct, order, skip, limit)
+
+    def parse_return_item(self) -> ReturnItem:
+        start = self.peek().start
+        expr = self.parse_expr()
+        end = self.tokens[self.pos - 1].end
+        if self.accept_keyword("AS"):
+            return ReturnItem(expr, self.expect_ident())
+        return ReturnItem(expr, self.text[start:end])
+
+    # Patterns
+
+    def parse_pattern_list(self) -> List[PathPattern]:
+        paths = [self.parse_path()]
+        while self.accept_symbol(","):
+            paths.append(self.parse_path())
+        return paths
+
+    def parse_path(self) -> PathPattern:
+        nodes = [self.parse_node()]
+        rels = []
+        while self.at_symbol("-") or (self.at_symbol("<") and self.at_symbol("-", 1)):
+            rels.append(self.parse_rel())
+            nodes.append(self.parse_node())
+        return PathPattern(tuple(nodes), tuple(rels))
+
+    def parse_node(self) -> NodePattern:
+        self.expect_symbol("(")
+        var = None
+        if self.peek().kind == "ident":
+            var = self.advance().value
+        labels = self.parse_labels() if self.at_symbol(":") else ()
+        props = self.parse_map() if self.at_symbol("{") else None
+        self.expect_symbol(")")
+        return NodePattern(var, labels, props)
+
+    def parse_labels(self) -> Tuple[str, ...]:
+        labels = []
+        while self.accept_symbol(":"):
+            labels.append(self.expect_ident())
+        return tuple(labels)
+
+    def parse_rel(self) -> RelPattern:
+        incoming = self.accept_symbol("<")
+        self.expect_symbol("-")
+        var, props = None, None
+        types: Tuple[str, ...] = ()
+        if self.accept_symbol("["):
+            if self.peek().kind == "ident":
+                var = self.advance().value
+            if self.accept_symbol(":"):
+                types_list = [self.expect_ident()]
+                while self.accept_symbol("|"):
+                    self.accept_symbol(":")
+                    types_list.append(self.expect_ident())
+                types = tuple(types_list)
+            if self.at_symbol("{"):
+                props = self.parse_map()
+            self.expect_symbol("]")
+        self.expect_symbol("-")
+        outgoing = self.accept_symbol(">")
+        if incoming and outgoing:
+            self.error("Relationship cannot point both ways")
+        direction = "in" if incoming else "out" if outgoing else "both"
+        return RelPattern(var, types, props, direction)
+
+    # Expressions
+
+    def parse_expr_list(self) -> List[tuple]:
+        exprs = [self.parse_expr()]
+        while self.accept_symbol(","):
+            exprs.append(self.parse_expr())
+        return exprs
+
+    def parse_expr(self) -> tuple:
+        return self.parse_or()
+
+    def parse_or(self) -> tuple:
+        expr = self.parse_and()
+        while self.accept_keyword("OR"):
+            expr = ("or", expr, self.parse_and())
+        return expr
+
+    def parse_and(self) -> tuple:
+        expr = self.parse_not()
+        while self.accept_keyword("AND"):
+            expr = ("and", expr, self.parse_not())
+        return expr
+
+    def parse_not(self) -> tuple:
+        if self.accept_keyword("NOT"):
+            return ("not", self.parse_not())
+        return self.parse_comparison()
+
+    def parse_comparison(self) -> tuple:
+        expr = self.parse_additive()
+        while True:
+            token = self.peek()
+            if token.kind == "symbol" and token.value in ("=", "<>", "!=", "<", ">", "<=", ">="):
+                self.advance()
+                op = "<>" if token.value == "!=" else token.value
+                expr = ("cmp", op, expr, self.parse_additive())
+            elif self.accept_keyword("IN"):
+                expr = ("cmp", "IN", expr, self.parse_additive())
+            elif self.accept_keyword("STARTS", "WITH"):
+                expr = ("cmp", "STARTS WITH", expr, self.parse_additive())
+            elif self.accept_keyword("ENDS", "WITH"):
+                expr = ("cmp", "ENDS WITH", expr, self.parse_additive())
+            elif self.accept_keyword("CONTAINS"):
+                expr = ("cmp", "CONTAINS", expr, self.parse_additive())
+            elif self.accept_keyword("IS", "NOT", "NULL"):
+                expr = ("is_null", expr, True)
+            elif self.accept_keyword("IS", "NULL"):
+                expr = ("is_null", expr, False)
+            else:
+                return expr
+
+    def parse_additive(self) -> tuple:
+        expr = self.parse_multiplicative()
+        while self.at_symbol("+") or self.at_symbol("-"):
+            op = self.advance().value
+            expr = ("arith", op, expr, self.parse_multiplicative())
+        return expr
+
+    def parse_multiplicative(self) -> tuple:
+        expr = self.parse_unary()
+        while self.at_symbol("*") or self.at_symbol("/") or self.at_symbol("%"):
+            op = self.advance().value
+            expr = ("arith", op, expr, self.parse_unary())
+        return expr
+
+    def parse_unary(self) -> tuple:
+        if self.accept_symbol("-"):
+            return ("arith", "-", ("lit", 0), self.parse_unary())
+        return self.parse_postfix()
+
+    def parse_postfix(self) -> tuple:
+        expr = self.parse_atom()
+        while True:
+            if self.accept_symbol("."):
+                expr = ("prop", expr, self.expect_ident())
+            elif self.accept_symbol("["):
+                index = self.parse_expr()
+                self.expect_symbol("]")
+                expr = ("index", expr, index)
+            else:
+                return expr
+
+    def parse_atom(self) -> tuple:
+        token = self.peek()
+        if token.kind in ("string", "number"):
+            self.advance()
+            return ("lit", token.value)
+        if token.kind == "param":
+            self.advance()
+            return ("param", token.value)
+        if token.kind == "symbol":
+            if token.value == "(":
+                self.advance()
+                expr = self.parse_expr()
+                self.expect_symbol(")")
+                return expr
+            if token.value == "[":
+                self.advance()
+                items = []
+                if not self.at_symbol("]"):
+                    items = self.parse_expr_list()
+                self.expect_symbol("]")
+                return ("list", tuple(items))
+            if token.value == "{":
+                return self.parse_map()
+        if token.kind == "ident":
+            word = token.value.upper()
+            if word in ("TRUE", "FALSE"):
+                self.advance()
+                return ("lit", word == "TRUE")
+            if word == "NULL":
+                self.advance()
+                return ("lit", None)
+            self.advance()
+            if self.accept_symbol("("):
+                return self.parse_call(token.value.lower())
+            return ("var", token.value)
+        self.error("Unexpected token")
+
+    def parse_call(self, name: str) -> tuple:
+        if name == "count" and self.accept_symbol("*"):
+            self.expect_symbol(")")
+            return ("call", "count", (), False, True)
+        distinct = self.accept_keyword("DISTINCT")
+        args = []
+        if not self.at_symbol(")"):
+            args = self.parse_expr_list()
+        self.expect_symbol(")")
+        return ("call", name, tuple(args), distinct, False)
+
+    def parse_map(self) -> tuple:
+        self.expect_symbol("{")
+        items = []
+        if not self.at_symbol("}"):
+            while True:
+                key = self.advance()
+                if key.kind not in ("ident", "string"):
+                    self.pos -= 1
+                    self.error("Expected map key")
+                self.expect_symbol(":")
+                items.append((key.value, self.parse_expr()))
+                if not self.accept_symbol(","):
+                    break
+        self.expect_symbol("}")
+        return ("map", tuple(items))
+
+def parse(text: str) -> List[tuple]:
+    """Parse a query into clause tuples.
+
+    Args:
+        text: Cypher query text
+
+    Returns:
+        List of clauses
+    """
+    return Parser(text).parse()
+
+def is_aggregate(expr: Any) -> bool:
+    """Return whether an expression contains an aggregate function call."""
+    if not isinstance(expr, tuple):
+        return False
+    if expr and expr[0] == "call" and expr[1] in AGGREGATES:
+        return True
+    return any(is_aggregate(part) for part in expr if isinstance(part, tuple))
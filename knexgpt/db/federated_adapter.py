@@ -0,0 +1,359 @@
+"""
+Federated adapter fanning one logical query out to several graph backends.
+"""
+import asyncio
+import json
+import logging
+import time
+from typing import (
+    Any, AsyncIterator, Callable, Dict, Hashable, List, Mapping, Optional, Sequence, Set, Union
+)
+
+from .adapter import GraphDBAdapter, GraphQuery, GraphResult, StreamItem, iter_batches, run_bounded
+from .query_translator import QueryTranslator
+
+logger = logging.getLogger(__name__)
+
+def record_key(record: Dict[str, Any]) -> Hashable:
+    """Default dedupe key: the record's canonical JSON form."""
+    return json.dumps(record, sort_keys=True, default=str)
+
+class ReplicaHealth:
+    """Latency and failure tracking for one backend replica."""
+
+    __slots__ = ("latency", "requests", "failures", "down_until")
+
+    def __init__(self):
+        self.latency: Optional[float] = None  # Exponentially weighted mean
+        self.requests = 0
+        self.failures = 0
+        self.down_until = 0.0
+
+    def healthy(self, now: float) -> bool:
+        return now >= self.down_until
+
+    def observe(self, elapsed: float) -> None:
+        self.latency = elapsed if self.latency is None else 0.8 * self.latency + 0.2 * elapsed
+
+    def success(self, elapsed: float) -> None:
+        self.requests += 1
+        self.down_until = 0.0
+        self.observe(elapsed)
+
+    def failure(self, cooldown: float) -> None:
+        self.requests += 1
+        self.failures += 1
+        self.down_until = time.monotonic() + cooldown
+
+class FederatedGraphAdapter(GraphDBAdapter):
+    """Adapter that runs one SPARQL query against several backends at once.
+
+    Each backend is a list of replicas holding the same data. The query is
+    translated to every backend's native language with ``QueryTranslator``
+    and all backends are queried concurrently; records are merged and
+    deduplicated as each backend answers.
+
+    Within a backend, the request goes to the fastest healthy replica. If
+    it hasn't answered after ``hedge_after`` seconds, or fails, the next
+    replica is tried too and the first answer wins, so tail latency is set
+    by the fastest healthy replica. Failed replicas sit out ``cooldown``
+    seconds. Each backend gets its own timeout; a backend that times out
+    or fails is reported in the result metadata and doesn't fail the query
+    unless every backend does. Backends whose language SPARQL can't be
+    compiled to (such as AQL) are skipped and reported as such.
+    """
+
+    query_language = "sparql"
+
+    def __init__(
+        self,
+        backends: Mapping[str, Union[GraphDBAdapter, Sequence[GraphDBAdapter]]],
+        timeout: Optional[float] = 30.0,
+        timeouts: Optional[Dict[str, float]] = None,
+        hedge_after: Optional[float] = 0.05,
+        cooldown: float = 30.0,
+        dedupe_key: Optional[Callable[[Dict[str, Any]], Hashable]] = record_key,
+        translator: Optional[QueryTranslator] = None
+    ):
+        """Initialize the federated adapter.
+
+        Args:
+            backends: Adapters by backend name, or lists of replica adapters
+            timeout: Default per-backend timeout in seconds, or None
+            timeouts: Per-backend timeouts overriding ``timeout``
+            hedge_after: Seconds before a request is hedged to another
+                replica, or None to only fail over on errors
+            cooldown: Seconds a failed replica is skipped
+            dedupe_key: Function mapping a record to its dedupe key, or
+                None to keep duplicates
+            translator: Optional shared query translator
+        """
+        if not backends:
+            raise ValueError("At least one backend is required")
+        self.backends: Dict[str, List[GraphDBAdapter]] = {
+            name: [replicas] if isinstance(replicas, GraphDBAdapter) else list(replicas)
+            for name, replicas in backends.items()
+        }
+        for name, replicas in self.backends.items():
+            if not replicas:
+                raise ValueError(f"Backend {name!r} has no replicas")
+        self.timeout = timeout
+        self.timeouts = timeouts or {}
+        self.hedge_after = hedge_after
+        self.cooldown = cooldown
+        self.dedupe_key = dedupe_key
+        self.translator = translator or QueryTranslator()
+        self._health: Dict[int, ReplicaHealth] = {
+            id(replica): ReplicaHealth()
+            for replicas in self.backends.values()
+            for replica in replicas
+        }
+
+    @property
+    def loop_bound(self) -> bool:
+        """Whether any replica is bound to its event loop."""
+        return any(replica.loop_bound for group in self.backends.values() for replica in group)
+
+    async def connect(self) -> None:
+        """Connect all replicas.
+
+        Replicas that fail to connect are marked unhealthy; an error is
+        raised only if none connects.
+        """
+        replicas = [replica for group in self.backends.values() for replica in group]
+        results = await asyncio.gather(
+            *(replica.connect() for replica in replicas), return_exceptions=True
+        )
+        failures = 0
+        for replica, result in zip(replicas, results):
+            if isinstance(result, BaseException):
+                failures += 1
+                logger.warning(f"Failed to connect {type(replica).__name__}: {result!r}")
+                self._health[id(replica)].failure(self.cooldown)
+        if failures == len(replicas):
+            raise ConnectionError("No federated backend could connect") from results[0]
+
+    async def disconnect(self) -> None:
+        """Disconnect all replicas."""
+        await asyncio.gather(
+            *(replica.disconnect() for group in self.backends.values() for replica in group),
+            return_exceptions=True
+        )
+
+    async def execute_query(self, query: GraphQuery) -> GraphResult:
+        """Execute a SPARQL query on all backends and merge the results.
+
+        Args:
+            query: SPARQL query to execute
+
+        Returns:
+            Deduplicated records; ``metadata["backends"]`` reports each
+            backend's status, replica, latency and record count
+        """
+        report: Dict[str, Dict[str, Any]] = {}
+        data = [record async for record in self._fan_out(query, report)]
+        if not any(entry["status"] == "ok" for entry in report.values()):
+            raise RuntimeError(f"All federated backends failed: {report}")
+        return GraphResult(data=data, metadata={"backends": report})
+
+    async def execute_query_stream(
+        self,
+        query: GraphQuery,
+        batch_size: Optional[int] = None
+    ) -> AsyncIterator[StreamItem]:
+        """Stream merged records as each backend answers.
+
+        Args:
+            query: SPARQL query to execute
+            batch_size: Records per yielded batch, or None for single records
+
+        Yields:
+            Single records, or lists of at most ``batch_size`` records
+        """
+        async for item in iter_batches(self._fan_out(query, {}), batch_size):
+            yield item
+
+    async def batch_execute(
+        self,
+        queries: List[GraphQuery],
+        max_concurrency: int = 4,
+        timeout: Optional[float] = None,
+        fail_fast: bool = True
+    ) -> List[GraphResult]:
+        """Execute multiple federated queries.
+
+        Args:
+            queries: List of SPARQL queries to execute
+            max_concurrency: Maximum number of queries in flight
+            timeout: Optional per-query timeout in seconds
+            fail_fast: Raise on the first error instead of returning
+                error results
+
+        Returns:
+            List of query results, in input order
+        """
+        return await run_bounded(queries, self.execute_query, max_concurrency, timeout, fail_fast)
+
+    def pool_stats(self) -> Dict[str, Any]:
+        """Return connection pool statistics for every replica."""
+        return {
+            name: [replica.pool_stats() for replica in replicas]
+            for name, replicas in self.backends.items()
+        }
+
+    def health(self) -> Dict[str, List[Dict[str, Any]]]:
+        """Return latency and failure counters for every replica."""
+        now = time.monotonic()
+        return {
+            name: [
+                {
+                    "healthy": health.healthy(now),
+                    "latency": health.latency,
+                    "requests": health.requests,
+                    "failures": health.failures,
+                }
+                for health in (self._health[id(replica)] for replica in replicas)
+            ]
+            for name, replicas in self.backends.items()
+        }
+
+    def translate(self, query: GraphQuery, language: str) -> GraphQuery:
+        """Translate a SPARQL query for a backend language.
+
+        Args:
+            query: SPARQL query
+            language: Backend query language
+
+        Returns:
+            Query in the backend's language
+        """
+        if language == self.query_language:
+            return query
+        native = self.translator.compile(query.query, language)
+        if query.parameters:
+            native.parameters = {**(native.parameters or {}), **query.parameters}
+        return native
+
+    async def _fan_out(
+        self,
+        query: GraphQuery,
+        report: Dict[str, Dict[str, Any]]
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Query every backend concurrently, yielding new records as they arrive."""
+        tasks: Dict[asyncio.Future, str] = {}
+        for name, replicas in self.backends.items():
+            language = replicas[0].query_language
+            if language != self.query_language and not self.translator.supports(language):
+                report[name] = {"status": "skipped", "reason": f"SPARQL can't be translated to {language}"}
+                continue
+            try:
+                native = self.translate(query, language)
+            except ValueError as e:
+                report[name] = {"status": "error", "error": repr(e)}
+                continue
+            tasks[asyncio.ensure_future(self._query_backend(name, native, report))] = name
+
+        seen: Set[Hashable] = set()
+        pending = set(tasks)
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    records = task.result()
+                    if records is None:
+                        continue
+                    for record in records:
+                        if self.dedupe_key is not None:
+                            key = self.dedupe_key(record)
+                            if key in seen:
+                                continue
+                            seen.add(key)
+                        yield record
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def _query_backend(
+        self,
+        name: str,
+        query: GraphQuery,
+        report: Dict[str, Dict[str, Any]]
+    ) -> Optional[List[Dict[str, Any]]]:
+        """Run a query on one backend, recording the outcome in ``report``."""
+        start = time.monotonic()
+        entry: Dict[str, Any] = {"status": "ok"}
+        report[name] = entry
+        try:
+            result, replica, attempts = await asyncio.wait_for(
+                self._hedged(self.backends[name], query),
+                self.timeouts.get(name, self.timeout)
+            )
+        except asyncio.TimeoutError:
+            entry.update(status="timeout", latency=time.monotonic() - start)
+            logger.warning(f"Federated backend {name} timed out")
+            return None
+        except Exception as e:
+            entry.update(status="error", error=repr(e), latency=time.monotonic() - start)
+            logger.warning(f"Federated backend {name} failed: {e!r}")
+            return None
+        entry.update(
+            replica=replica,
+            hedged=attempts > 1,
+            latency=time.monotonic() - start,
+            records=len(result.data)
+        )
+        return result.data
+
+    async def _hedged(self, replicas: List[GraphDBAdapter], query: GraphQuery):
+        """Run a query on the best replica, hedging to others when slow.
+
+        Returns:
+            The first successful result, the winning replica's index and the
+            number of replicas tried
+        """
+        now = time.monotonic()
+
+        def rank(index: int):
+            health = self._health[id(replicas[index])]
+            latency = health.latency if health.latency is not None else 0.0
+            return (not health.healthy(now), latency)
+
+        order = sorted(range(len(replicas)), key=rank)
+        running: Dict[asyncio.Future, int] = {}
+        error: Optional[BaseException] = None
+        try:
+            while True:
+                if order and (not running or error is not None or self.hedge_after is not None):
+                    index = order.pop(0)
+                    running[asyncio.ensure_future(self._timed(replicas[index], query))] = index
+                    error = None
+                if not running:
+                    raise error or RuntimeError("No replica could be queried")
+                wait = self.hedge_after if order else None
+                done, _ = await asyncio.wait(
+                    set(running), timeout=wait, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    index = running.pop(task)
+                    if task.exception() is None:
+                        return task.result(), index, len(replicas) - len(order)
+                    error = task.exception()
+        finally:
+            for task in running:
+                task.cancel()
+
+    async def _timed(self, replica: GraphDBAdapter, query: GraphQuery) -> GraphResult:
+        """Execute on one replica, updating its health."""
+        health = self._health[id(replica)]
+        start = time.monotonic()
+        try:
+            result = await replica.execute_query(query)
+        except asyncio.CancelledError:
+            # Lost a hedge race; the elapsed time is a lower bound on latency.
+            health.observe(time.monotonic() - start)
+            raise
+        except Exception:
+            health.failure(self.cooldown)
+            raise
+        health.success(time.monotonic() - start)
+        return result
@@ -0,0 +1,411 @@
+"""
+Bulk loader turning extracted records into batched graph writes.
+"""
+import asyncio
+from functools import partial
+import logging
+import re
+import time
+from typing import (
+    Any,
+    AsyncIterable,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
+
+from .adapter import GraphDBAdapter, GraphQuery, GraphResult, run_bounded
+
+logger = logging.getLogger(__name__)
+
+# Graph property holding the id of an entity produced from a source record.
+ENTITY_ID_PROPERTY = "entity_id"
+
+_SCALAR_TYPES = (str, int, float, bool)
+
+class RecordMapping(NamedTuple):
+    """How records of one class map to a node and its relationships.
+
+    ``properties`` maps record fields to node properties; when None, every
+    scalar field not used for a relationship is copied as is.
+    ``relationships`` maps a record field holding one or more target keys
+    to the relationship type and target label.
+    """
+
+    label: str
+    key: str
+    properties: Optional[Dict[str, str]] = None
+    relationships: Dict[str, Tuple[str, str]] = {}
+
+def _local_name(uri: Any) -> str:
+    return re.split(r"[#/]", str(uri))[-1]
+
+def mappings_from_ontology(ontology, keys: Dict[str, str]) -> Dict[str, RecordMapping]:
+    """Derive record mappings from an ontology's classes and properties.
+
+    Datatype properties whose domain is a class become node properties,
+    read from the record field of the same name. Object properties whose
+    domain is a class and whose range is another mapped class become
+    relationships, read from the field of the same name holding the target
+    keys.
+
+    Args:
+        ontology: ``OntologyManager`` with the classes and properties
+        keys: Key field by class name, for each class to map
+
+    Returns:
+        Mapping by class name (used as the node label)
+    """
+    from rdflib.namespace import OWL, RDF, RDFS
+
+    graph = ontology.graph
+    mappings = {}
+    for class_name, key in keys.items():
+        class_uri = ontology.ns[class_name]
+        properties = {key: key}
+        relationships = {}
+        for prop in graph.subjects(RDFS.domain, class_uri):
+            name = _local_name(prop)
+            if (prop, RDF.type, OWL.DatatypeProperty) in graph:
+                properties[name] = name
+            elif (prop, RDF.type, OWL.ObjectProperty) in graph:
+                target = graph.value(prop, RDFS.range)
+                if target is not None and _local_name(target) in keys:
+                    relationships[name] = (name, _local_name(target))
+        mappings[class_name] = RecordMapping(class_name, key, properties, relationships)
+    return mappings
+
+def _quote(name: str) -> str:
+    """Quote a label, type or property name for Cypher."""
+    return "`" + name.replace("`", "``") + "`"
+
+class GraphLoader:
+    """Writes record batches to the graph as batched ``MERGE`` statements.
+
+    Records are mapped to nodes and relationships, and an in-memory index
+    of every node and relationship already written drops duplicates within
+    and across batches. Once ``batch_size * writers`` rows are staged they
+    are flushed: nodes first, one ``UNWIND ... MERGE`` statement per chunk run
+    by up to ``writers`` concurrent writers, then relationships, whose
+    endpoints therefore exist and are only matched, not merged. Failed
+    chunks are retried with exponential backoff, and rows whose chunk
+    still fails are staged again for the next flush; rows join the index
+    only once written. Relationship targets not
+    seen as records yet are created as key-only nodes and filled in when
+    their records arrive.
+
+    Usage::
+
+        loader = GraphLoader(adapter, mappings_from_ontology(ontology, {"Person": "id"}))
+        for batch in batches:
+            await loader.load(batch)
+        report = await loader.close()
+    """
+
+    def __init__(
+        self,
+        adapter: GraphDBAdapter,
+        mappings: Dict[str, RecordMapping],
+        label_field: Optional[str] = None,
+        batch_size: int = 1000,
+        writers: int = 4,
+        max_retries: int = 3,
+        retry_delay: float = 0.1
+    ):
+        """Initialize the loader.
+
+        Args:
+            adapter: Connected Cypher adapter
+            mappings: Mapping by class name
+            label_field: Record field naming each record's class; may be
+                omitted when there is a single mapping
+            batch_size: Rows per write statement
+            writers: Write statements in flight at once
+            max_retries: Retries of a failed write statement
+            retry_delay: Seconds before the first retry, doubled each time
+        """
+        if adapter.query_language != "cypher":
+            raise ValueError(f"GraphLoader needs a Cypher adapter, not {adapter.query_language}")
+        if label_field is None and len(mappings) != 1:
+            raise ValueError("label_field is required with more than one mapping")
+        for mapping in mappings.values():
+            for _, target_label in mapping.relationships.values():
+                if target_label not in mappings:
+                    raise ValueError(f"No mapping for relationship target {target_label}")
+        self.adapter = adapter
+        self.mappings = mappings
+        self.label_field = label_field
+        self.batch_size = batch_size
+        self.writers = writers
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+
+        # Properties written for each (label, key), and relationships written.
+        self._nodes: Dict[Tuple[str, Any], Dict[str, Any]] = {}
+        self._edges: Set[Tuple[str, str, Any, str, Any]] = set()
+        self._staged_nodes: Dict[str, Dict[Any, Dict[str, Any]]] = {}
+        self._staged_edges: Dict[Tuple[str, str, str], Dict[Tuple[Any, Any], Dict[str, Any]]] = {}
+        self._staged = 0
+        self._started: Optional[float] = None
+        self._elapsed = 0.0
+        self.rows = 0
+        self.skipped = 0
+        self.duplicates = 0
+        self.nodes_written = 0
+        self.relationships_written = 0
+        self.statements = 0
+        self.retries = 0
+
+    def report(self) -> Dict[str, Any]:
+        """Return throughput and write counters."""
+        elapsed = self._elapsed
+        if self._started is not None:
+            elapsed += time.monotonic() - self._started
+        return {
+            "rows": self.rows,
+            "skipped": self.skipped,
+            "duplicates": self.duplicates,
+            "nodes_written": self.nodes_written,
+            "relationships_written": self.relationships_written,
+            "statements": self.statements,
+            "retries": self.retries,
+            "seconds": elapsed,
+            "rows_per_second": self.rows / elapsed if elapsed else 0.0,
+        }
+
+    async def load(
+        self,
+        records: Union[dict, Iterable[dict]],
+        entity_ids: Optional[List[str]] = None
+    ) -> None:
+        """Stage a batch of records, flushing once enough rows wait.
+
+        Args:
+            records: A record or a batch of records
+            entity_ids: Source index entity id of each record, stored on
+                its node under ``ENTITY_ID_PROPERTY`` so the node can be
+                retracted when the record goes away
+        """
+        if self._started is None:
+            self._started = time.monotonic()
+        if isinstance(records, dict):
+            records = [records]
+        for i, record in enumerate(records):
+            self._stage(record, entity_ids[i] if entity_ids is not None else None)
+            # Enough for every writer to get a full statement.
+            if self._staged >= self.batch_size * self.writers:
+                await self.flush()
+
+    async def load_message(self, message: Dict[str, Any]) -> None:
+        """Stage the records of an extraction message's ``data``.
+
+        Entity ids sent under ``"ids"`` by incremental ingests are stored
+        on the records' nodes.
+        """
+        data = message.get("data")
+        if data:
+            await self.load(data, message.get("ids"))
+
+    async def load_batches(
+        self,
+        batches: Union[Iterable[Iterable[dict]], AsyncIterable[Iterable[dict]]]
+    ) -> Dict[str, Any]:
+        """Load every batch, flush and return the report."""
+        if hasattr(batches, "__aiter__"):
+            async for batch in batches:
+                await self.load(batch)
+        else:
+            for batch in batches:
+                await self.load(batch)
+        return await self.close()
+
+    async def close(self) -> Dict[str, Any]:
+        """Flush staged rows and return the report."""
+        await self.flush()
+        if self._started is not None:
+            self._elapsed += time.monotonic() - self._started
+            self._started = None
+        report = self.report()
+        logger.info(
+            f"Loaded {report['rows']} rows in {report['seconds']:.2f}s "
+            f"({report['rows_per_second']:.0f} rows/s, {report['retries']} retries)"
+        )
+        return report
+
+    async def flush(self) -> None:
+        """Write staged nodes, then staged relationships.
+
+        Rows of chunks that fail, and every relationship when a node chunk
+        fails, are staged again before the error is raised.
+        """
+        nodes, self._staged_nodes = self._staged_nodes, {}
+        edges, self._staged_edges = self._staged_edges, {}
+        self._staged = 0
+        writes: List[Tuple[GraphQuery, Callable[[bool], None]]] = []
+        for label, rows in nodes.items():
+            statement = (
+                f"UNWIND $rows AS row MERGE (n:{_quote(label)} {{{_quote(self._key(label))}: row.key}}) "
+                "SET n += row.props"
+            )
+            items = [{"key": k, "props": props} for k, props in rows.items()]
+            writes.extend(
+                (query, partial(self._settle_nodes, label, chunk))
+                for query, chunk in self._chunks(statement, items)
+            )
+        try:
+            await self._write(writes)
+        except BaseException:
+            for group, rows in edges.items():
+                self._settle_edges(group, list(rows.values()), False)
+            raise
+
+        writes = []
+        for group, rows in edges.items():
+            rel_type, start_label, end_label = group
+            statement = (
+                f"UNWIND $rows AS row "
+                f"MATCH (a:{_quote(start_label)} {{{_quote(self._key(start_label))}: row.start}}) "
+                f"MATCH (b:{_quote(end_label)} {{{_quote(self._key(end_label))}: row.end}}) "
+                f"MERGE (a)-[:{_quote(rel_type)}]->(b)"
+            )
+            # Chunks grouped by start node lock mostly disjoint nodes.
+            items = sorted(rows.values(), key=lambda row: str(row["start"]))
+            writes.extend(
+                (query, partial(self._settle_edges, group, chunk))
+                for query, chunk in self._chunks(statement, items)
+            )
+        await self._write(writes)
+
+    def _settle_nodes(self, label: str, rows: List[Dict[str, Any]], written: bool) -> None:
+        staged = self._staged_nodes.setdefault(label, {})
+        for row in rows:
+            key = row["key"]
+            if written:
+                self._nodes[(label, key)] = {**self._nodes.get((label, key), {}), **row["props"]}
+                continue
+            if key not in staged:
+                self._staged += 1
+            # Properties staged since take precedence.
+            staged[key] = {**row["props"], **staged.get(key, {})}
+        if written:
+            self.nodes_written += len(rows)
+
+    def _settle_edges(self, group: Tuple[str, str, str], rows: List[Dict[str, Any]], written: bool) -> None:
+        rel_type, start_label, end_label = group
+        staged = self._staged_edges.setdefault(group, {})
+        for row in rows:
+            if written:
+                self._edges.add((rel_type, start_label, row["start"], end_label, row["end"]))
+            elif (row["start"], row["end"]) not in staged:
+                staged[(row["start"], row["end"])] = row
+                self._staged += 1
+        if written:
+            self.relationships_written += len(rows)
+
+    def _key(self, label: str) -> str:
+        return self.mappings[label].key
+
+    def _chunks(
+        self,
+        statement: str,
+        rows: List[Dict[str, Any]]
+    ) -> List[Tuple[GraphQuery, List[Dict[str, Any]]]]:
+        chunks = [rows[start:start + self.batch_size] for start in range(0, len(rows), self.batch_size)]
+        return [(GraphQuery(query=statement, parameters={"rows": chunk}), chunk) for chunk in chunks]
+
+    async def _write(
+        self,
+        writes: List[Tuple[GraphQuery, Callable[[bool], None]]]
+    ) -> None:
+        """Run write statements, settling each chunk's rows as written or not."""
+        settle = {id(query): callback for query, callback in writes}
+
+        async def execute(query: GraphQuery) -> GraphResult:
+            try:
+                result = await self._execute(query)
+            except BaseException:
+                settle.pop(id(query))(False)
+                raise
+            settle.pop(id(query))(True)
+            self.statements += 1
+            return result
+
+        try:
+            if writes:
+                await run_bounded([query for query, _ in writes], execute, max_concurrency=self.writers)
+        finally:
+            # Chunks never started because another one failed.
+            for query, callback in writes:
+                if id(query) in settle:
+                    settle.pop(id(query))(False)
+
+    async def _execute(self, query: GraphQuery) -> GraphResult:
+        attempt = 0
+        while True:
+            try:
+                return await self.adapter.execute_query(query)
+            except Exception as e:
+                if attempt >= self.max_retries:
+                    raise
+                self.retries += 1
+                delay = self.retry_delay * 2 ** attempt
+                attempt += 1
+                logger.warning(f"Write failed, retrying in {delay:.2f}s: {e!r}")
+                await asyncio.sleep(delay)
+
+    def _mapping_for(self, record: Dict[str, Any]) -> Optional[RecordMapping]:
+        if self.label_field is None:
+            return next(iter(self.mappings.values()))
+        return self.mappings.get(str(record.get(self.label_field)))
+
+    def _stage(self, record: Dict[str, Any], entity_id: Optional[str] = None) -> None:
+        mapping = self._mapping_for(record) if isinstance(record, dict) else None
+        key = record.get(mapping.key) if mapping is not None else None
+        if mapping is None or key is None:
+            self.skipped += 1
+            return
+        self.rows += 1
+        if mapping.properties is None:
+            props = {
+                field: value for field, value in record.items()
+                if field not in mapping.relationships and isinstance(value, _SCALAR_TYPES)
+            }
+        else:
+            props = {
+                prop: record[field] for field, prop in mapping.properties.items()
+                if record.get(field) is not None
+            }
+        if entity_id is not None:
+            props[ENTITY_ID_PROPERTY] = entity_id
+        if not self._stage_node(mapping.label, key, props):
+            self.duplicates += 1
+        for field, (rel_type, target_label) in mapping.relationships.items():
+            targets = record.get(field)
+            if targets is None:
+                continue
+            staged = self._staged_edges.setdefault((rel_type, mapping.label, target_label), {})
+            for target in targets if isinstance(targets, list) else [targets]:
+                if (key, target) in staged or (rel_type, mapping.label, key, target_label, target) in self._edges:
+                    continue
+                self._stage_node(target_label, target, {})
+                staged[(key, target)] = {"start": key, "end": target}
+                self._staged += 1
+
+    def _stage_node(self, label: str, key: Any, props: Dict[str, Any]) -> bool:
+        """Stage a node unless it's written or staged with these properties; False if so."""
+        written = self._nodes.get((label, key))
+        staged = self._staged_nodes.setdefault(label, {})
+        pending = staged.get(key)
+        if written is not None or pending is not None:
+            if props.items() <= {**(written or {}), **(pending or {})}.items():
+                return False
+        if pending is None:
+            self._staged += 1
+        staged[key] = {**(pending or {}), **props}
+        return True
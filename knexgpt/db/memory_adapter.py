@@ -0,0 +1,1059 @@
+"""
+In-memory graph database adapter.
+
+Runs the Cypher subset parsed by ``cypher_subset`` against an in-process
+property graph with adjacency lists and hash indexes on labels and
+property values. Useful as a local engine for tests and benchmarks that
+can't reach a live database, and as a fast local cache tier.
+"""
+import asyncio
+from functools import lru_cache
+from itertools import islice
+import logging
+import os
+import pickle
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
+
+from .adapter import (
+    GraphDBAdapter,
+    GraphQuery,
+    GraphResult,
+    StreamItem,
+    iter_batches,
+    run_bounded,
+)
+from .cypher_subset import (
+    CypherSyntaxError,
+    NodePattern,
+    PathPattern,
+    RelPattern,
+    is_aggregate,
+    parse,
+)
+
+logger = logging.getLogger(__name__)
+
+_WRITE_CLAUSES = frozenset({"create", "merge", "set", "remove", "delete"})
+
+# Records handed to the event loop between cooperative yields when streaming.
+_STREAM_YIELD_EVERY = 1000
+
+class Node:
+    """A node in the in-memory graph."""
+
+    __slots__ = ("id", "labels", "props")
+
+    def __init__(self, id: int, labels: Set[str], props: Dict[str, Any]):
+        self.id = id
+        self.labels = labels
+        self.props = props
+
+    def __repr__(self) -> str:
+        return f"Node({self.id}, {sorted(self.labels)}, {self.props})"
+
+class Relationship:
+    """A directed relationship in the in-memory graph."""
+
+    __slots__ = ("id", "type", "start", "end", "props")
+
+    def __init__(self, id: int, type: str, start: int, end: int, props: Dict[str, Any]):
+        self.id = id
+        self.type = type
+        self.start = start
+        self.end = end
+        self.props = props
+
+    def __repr__(self) -> str:
+        return f"Relationship({self.id}, {self.type}, {self.start}->{self.end})"
+
+def _hashable(value: Any) -> bool:
+    try:
+        hash(value)
+    except TypeError:
+        return False
+    return True
+
+class MemoryGraph:
+    """Property graph with adjacency lists and label/property hash indexes."""
+
+    def __init__(self):
+        """Initialize an empty graph."""
+        self.nodes: Dict[int, Node] = {}
+        self.rels: Dict[int, Relationship] = {}
+        self.out_rels: Dict[int, List[int]] = {}
+        self.in_rels: Dict[int, List[int]] = {}
+        self.label_index: Dict[str, Set[int]] = {}
+        self.prop_index: Dict[Tuple[str, Any], Set[int]] = {}
+        self.type_index: Dict[str, Set[int]] = {}
+        self._next_id = 0
+
+    def _new_id(self) -> int:
+        self._next_id += 1
+        return self._next_id
+
+    # Nodes
+
+    def create_node(self, labels: Iterable[str] = (), props: Optional[Dict[str, Any]] = None) -> Node:
+        """Create a node and index it.
+
+        Args:
+            labels: Node labels
+            props: Node properties; None values are dropped
+
+        Returns:
+            The new node
+        """
+        node = Node(self._new_id(), set(), {})
+        self.nodes[node.id] = node
+        self.out_rels[node.id] = []
+        self.in_rels[node.id] = []
+        for label in labels:
+            self.add_label(node, label)
+        for key, value in (props or {}).items():
+            self.set_node_prop(node, key, value)
+        return node
+
+    def add_label(self, node: Node, label: str) -> None:
+        """Add a label to a node."""
+        node.labels.add(label)
+        self.label_index.setdefault(label, set()).add(node.id)
+
+    def remove_label(self, node: Node, label: str) -> None:
+        """Remove a label from a node."""
+        node.labels.discard(label)
+        ids = self.label_index.get(label)
+        if ids is not None:
+            ids.discard(node.id)
+
+    def set_node_prop(self, node: Node, key: str, value: Any) -> None:
+        """Set or, for None, remove a node property, keeping indexes current."""
+        self.remove_node_prop(node, key)
+        if value is None:
+            return
+        node.props[key] = value
+        if _hashable(value):
+            self.prop_index.setdefault((key, value), set()).add(node.id)
+
+    def remove_node_prop(self, node: Node, key: str) -> None:
+        """Remove a node property, keeping indexes current."""
+        if key not in node.props:
+            return
+        old = node.props.pop(key)
+        if _hashable(old):
+            ids = self.prop_index.get((key, old))
+            if ids is not None:
+                ids.discard(node.id)
+                if not ids:
+                    del self.prop_index[(key, old)]
+
+    def delete_node(self, node: Node, detach: bool = False) -> None:
+        """Delete a node.
+
+        Args:
+            node: Node to delete
+            detach: Also delete its relationships
+
+        Raises:
+            ValueError: If the node still has relationships and ``detach``
+                is False
+        """
+        if node.id not in self.nodes:
+            return
+        rel_ids = self.out_rels[node.id] + self.in_rels[node.id]
+        if rel_ids and not detach:
+            raise ValueError(
+                f"Cannot delete node {node.id}, it still has relationships"
+            )
+        for rel_id in rel_ids:
+            rel = self.rels.get(rel_id)
+            if rel is not None:
+                self.delete_rel(rel)
+        for key in list(node.props):
+            self.remove_node_prop(node, key)
+        for label in list(node.labels):
+            self.remove_label(node, label)
+        del self.nodes[node.id]
+        del self.out_rels[node.id]
+        del self.in_rels[node.id]
+
+    def find_nodes(
+        self,
+        labels: Iterable[str] = (),
+        props: Optional[Dict[str, Any]] = None
+    ) -> List[Node]:
+        """Look up candidate nodes through the label and property indexes.
+
+        The smallest matching index bucket is scanned and checked against
+        the remaining labels and properties.
+
+        Args:
+            labels: Labels the nodes must carry
+            props: Properties the nodes must have
+
+        Returns:
+            Matching nodes
+        """
+        props = props or {}
+        buckets: List[Set[int]] = []
+        for label in labels:
+            buckets.append(self.label_index.get(label, set()))
+        for key, value in props.items():
+            if _hashable(value):
+                buckets.append(self.prop_index.get((key, value), set()))
+        if buckets:
+            smallest = min(buckets, key=len)
+            candidates = list(smallest)
+        else:
+            candidates = list(self.nodes)
+        matches = []
+        for node_id in candidates:
+            node = self.nodes.get(node_id)
+            if node is None:
+                continue
+            if all(label in node.labels for label in labels) and all(
+                _values_equal(node.props.get(key), value) for key, value in props.items()
+            ):
+                matches.append(node)
+        return matches
+
+    # Relationships
+
+    def create_rel(
+        self,
+        type: str,
+        start: Node,
+        end: Node,
+        props: Optional[Dict[str, Any]] = None
+    ) -> Relationship:
+        """Create a relationship between two nodes.
+
+        Args:
+            type: Relationship type
+            start: Start node
+            end: End node
+            props: Relationship properties; None values are dropped
+
+        Returns:
+            The new relationship
+        """
+        rel = Relationship(
+            self._new_id(),
+            type,
+            start.id,
+            end.id,
+            {key: value for key, value in (props or {}).items() if value is not None},
+        )
+        self.rels[rel.id] = rel
+        self.out_rels[start.id].append(rel.id)
+        self.in_rels[end.id].append(rel.id)
+        self.type_index.setdefault(type, set()).add(rel.id)
+        return rel
+
+    def delete_rel(self, rel: Relationship) -> None:
+        """Delete a relationship."""
+        if self.rels.pop(rel.id, None) is None:
+            return
+        self.out_rels[rel.start].remove(rel.id)
+        self.in_rels[rel.end].remove(rel.id)
+        self.type_index[rel.type].discard(rel.id)
+
+    def neighbors(
+        self,
+        node_id: int,
+        direction: str,
+        types: Tuple[str, ...] = ()
+    ) -> Iterator[Tuple[Relationship, int]]:
+        """Iterate over a node's relationships and the nodes at their other end.
+
+        Args:
+            node_id: Node to expand
+            direction: "out", "in" or "both"
+            types: Relationship types to follow, or empty for all
+
+        Yields:
+            (relationship, other node id) pairs
+        """
+        if direction in ("out", "both"):
+            for rel_id in list(self.out_rels.get(node_id, ())):
+                rel = self.rels.get(rel_id)
+                if rel is not None and (not types or rel.type in types):
+                    yield rel, rel.end
+        if direction in ("in", "both"):
+            for rel_id in list(self.in_rels.get(node_id, ())):
+                rel = self.rels.get(rel_id)
+                if rel is None or (types and rel.type not in types):
+                    continue
+                # A self-loop was already reported as outgoing.
+                if direction == "both" and rel.start == rel.end:
+                    continue
+                yield rel, rel.start
+
+    # Snapshots
+
+    def save(self, path: Union[str, Path]) -> None:
+        """Write a snapshot of the graph to disk.
+
+        Only nodes and relationships are stored; indexes are rebuilt on
+        load. The file is written atomically.
+
+        Args:
+            path: Snapshot file path
+        """
+        state = {
+            "next_id": self._next_id,
+            "nodes": [(n.id, tuple(n.labels), n.props) for n in self.nodes.values()],
+            "rels": [(r.id, r.type, r.start, r.end, r.props) for r in self.rels.values()],
+        }
+        path = Path(path)
+        tmp_path = path.with_name(path.name + ".tmp")
+        with open(tmp_path, "wb") as file:
+            pickle.dump(state, file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+        logger.info(
+            f"Saved graph snapshot with {len(self.nodes)} nodes and "
+            f"{len(self.rels)} relationships to {path}"
+        )
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "MemoryGraph":
+        """Load a graph snapshot written by ``save``.
+
+        Args:
+            path: Snapshot file path
+
+        Returns:
+            The loaded graph
+        """
+        with open(path, "rb") as file:
+            state = pickle.load(file)
+        graph = cls()
+        for node_id, labels, props in state["nodes"]:
+            node = Node(node_id, set(), {})
+            graph.nodes[node_id] = node
+            graph.out_rels[node_id] = []
+            graph.in_rels[node_id] = []
+            for label in labels:
+                graph.add_label(node, label)
+            for key, value in props.items():
+                graph.set_node_prop(node, key, value)
+        for rel_id, type, start, end, props in state["rels"]:
+            rel = Relationship(rel_id, type, start, end, props)
+            graph.rels[rel_id] = rel
+            graph.out_rels[start].append(rel_id)
+            graph.in_rels[end].append(rel_id)
+            graph.type_index.setdefault(type, set()).add(rel_id)
+        graph._next_id = state["next_id"]
+        logger.info(f"Loaded graph snapshot from {path}")
+        return graph
+
+def _values_equal(left: Any, right: Any) -> bool:
+    # Cypher doesn't treat booleans as numbers.
+    if isinstance(left, bool) != isinstance(right, bool):
+        return False
+    return left == right
+
+def _freeze(value: Any) -> Any:
+    """Make a value hashable for grouping and DISTINCT."""
+    if isinstance(value, Node):
+        return ("node", value.id)
+    if isinstance(value, Relationship):
+        return ("rel", value.id)
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    if isinstance(value, dict):
+        return tuple(sorted((key, _freeze(item)) for key, item in value.items()))
+    return value
+
+def to_output(value: Any) -> Any:
+    """Convert graph elements to plain values, as the Neo4j driver does."""
+    if isinstance(value, (Node, Relationship)):
+        return dict(value.props)
+    if isinstance(value, list):
+        return [to_output(item) for item in value]
+    if isinstance(value, dict):
+        return {key: to_output(item) for key, item in value.items()}
+    return value
+
+def _sort_key(value: Any) -> Tuple[bool, Any]:
+    return (value is None, value)
+
+class CypherExecutor:
+    """Executes parsed Cypher clauses against a ``MemoryGraph``.
+
+    Each clause transforms a stream of variable bindings. Read-only
+    queries are evaluated lazily so results can be streamed; queries with
+    writes materialize the bindings after every clause, as Cypher applies
+    clauses one at a time.
+    """
+
+    def __init__(self, graph: MemoryGraph, parameters: Optional[Dict[str, Any]] = None):
+        """Initialize the executor.
+
+        Args:
+            graph: Graph to run against
+            parameters: Query parameters
+        """
+        self.graph = graph
+        self.parameters = parameters or {}
+
+    def run(self, clauses: List[tuple]) -> Iterator[Dict[str, Any]]:
+        """Execute clauses and iterate over the returned records.
+
+        Args:
+            clauses: Parsed clauses
+
+        Yields:
+            Result records
+        """
+        has_writes = any(clause[0] in _WRITE_CLAUSES for clause in clauses)
+        rows: Iterable[Dict[str, Any]] = [{}]
+        for clause in clauses:
+            rows = getattr(self, f"_{clause[0]}")(clause, rows)
+            if has_writes:
+                rows = list(rows)
+        if clauses[-1][0] != "return":
+            for _ in rows:
+                pass
+            return
+        yield from rows
+
+    # Expressions
+
+    def eval(self, expr: tuple, row: Dict[str, Any]) -> Any:
+        """Evaluate an expression against a binding."""
+        kind = expr[0]
+        if kind == "lit":
+            return expr[1]
+        if kind == "param":
+            try:
+                return self.parameters[expr[1]]
+            except KeyError:
+                raise ValueError(f"Missing parameter: ${expr[1]}") from None
+        if kind == "var":
+            try:
+                return row[expr[1]]
+            except KeyError:
+                raise CypherSyntaxError(f"Variable not defined: {expr[1]}") from None
+        if kind == "prop":
+            base = self.eval(expr[1], row)
+            if base is None:
+                return None
+            if isinstance(base, (Node, Relationship)):
+                return base.props.get(expr[2])
+            if isinstance(base, dict):
+                return base.get(expr[2])
+            raise ValueError(f"Cannot read property {expr[2]} of {base!r}")
+        if kind == "index":
+            base = self.eval(expr[1], row)
+            index = self.eval(expr[2], row)
+            if base is None or index is None:
+                return None
+            if isinstance(base, (Node, Relationship)):
+                return base.props.get(index)
+            if isinstance(base, dict):
+                return base.get(index)
+            try:
+                return base[index]
+            except IndexError:
+                return None
+        if kind == "cmp":
+            return self._compare(expr[1], self.eval(expr[2], row), self.eval(expr[3], row))
+        if kind == "and":
+            return bool(self.eval(expr[1], row)) and bool(self.eval(expr[2], row))
+        if kind == "or":
+            return bool(self.eval(expr[1], row)) or bool(self.eval(expr[2], row))
+        if kind == "not":
+            value = self.eval(expr[1], row)
+            return None if value is None else not value
+        if kind == "is_null":
+            is_null = self.eval(expr[1], row) is None
+            return not is_null if expr[2] else is_null
+        if kind == "arith":
+            return self._arith(expr[1], self.eval(expr[2], row), self.eval(expr[3], row))
+        if kind == "list":
+            return [self.eval(item, row) for item in expr[1]]
+        if kind == "map":
+            return {key: self.eval(value, row) for key, value in expr[1]}
+        if kind == "call":
+            if expr[1] in ("count", "sum", "avg", "min", "max", "collect"):
+                raise CypherSyntaxError(f"Aggregate {expr[1]}() is only allowed in RETURN")
+            return self._call(expr[1], [self.eval(arg, row) for arg in expr[2]])
+        raise CypherSyntaxError(f"Unsupported expression: {kind}")
+
+    @staticmethod
+    def _compare(op: str, left: Any, right: Any) -> Any:
+        if op == "IN":
+            if right is None:
+                return None
+            return any(_values_equal(left, item) for item in right)
+        if left is None or right is None:
+            return None
+        if op == "=":
+            return _values_equal(left, right)
+        if op == "<>":
+            return not _values_equal(left, right)
+        if op in ("STARTS WITH", "ENDS WITH", "CONTAINS"):
+            if not (isinstance(left, str) and isinstance(right, str)):
+                return None
+            if op == "STARTS WITH":
+                return left.startswith(right)
+            if op == "ENDS WITH":
+                return left.endswith(right)
+            return right in left
+        try:
+            if op == "<":
+                return left < right
+            if op == ">":
+                return left > right
+            if op == "<=":
+                return left <= right
+            return left >= right
+        except TypeError:
+            return None
+
+    @staticmethod
+    def _arith(op: str, left: Any, right: Any) -> Any:
+        if left is None or right is None:
+            return None
+        if op == "+":
+            if isinstance(left, list) and not isinstance(right, list):
+                return left + [right]
+            return left + right
+        if op == "-":
+            return left - right
+        if op == "*":
+            return left * right
+        if op == "/":
+            if isinstance(left, int) and isinstance(right, int):
+                return int(left / right)
+            return left / right
+        if isinstance(left, int) and isinstance(right, int):
+            return int(left - right * int(left / right))
+        return left % right
+
+    def _call(self, name: str, args: List[Any]) -> Any:
+        if name == "coalesce":
+            return next((arg for arg in args if arg is not None), None)
+        if len(args) != 1:
+            raise CypherSyntaxError(f"Unsupported function call: {name}()")
+        arg = args[0]
+        if arg is None:
+            return None
+        if name in ("id", "elementid"):
+            return arg.id if name == "id" else str(arg.id)
+        if name == "labels":
+            return sorted(arg.labels)
+        if name == "type":
+            return arg.type
+        if name == "properties":
+            return dict(arg.props) if isinstance(arg, (Node, Relationship)) else dict(arg)
+        if name == "keys":
+            return list(arg.props if isinstance(arg, (Node, Relationship)) else arg)
+        if name == "size":
+            return len(arg)
+        if name == "tolower":
+            return arg.lower()
+        if name == "toupper":
+            return arg.upper()
+        if name == "tostring":
+            return str(arg).lower() if isinstance(arg, bool) else str(arg)
+        if name == "tointeger":
+            try:
+                return int(float(arg))
+            except (TypeError, ValueError):
+                return None
+        if name == "tofloat":
+            try:
+                return float(arg)
+            except (TypeError, ValueError):
+                return None
+        if name == "trim":
+            return arg.strip()
+        raise CypherSyntaxError(f"Unsupported function: {name}()")
+
+    # Pattern matching
+
+    def _props(self, map_expr: Optional[tuple], row: Dict[str, Any]) -> Dict[str, Any]:
+        return self.eval(map_expr, row) if map_expr is not None else {}
+
+    @staticmethod
+    def _pattern_hints(where: Optional[tuple]) -> Tuple[Dict[str, Dict[str, tuple]], Dict[str, tuple]]:
+        """Collect ``var.prop = constant`` and ``id(var) = constant`` conjuncts.
+
+        These are used to pick index buckets when matching; the full WHERE
+        predicate is still applied afterwards.
+        """
+        props: Dict[str, Dict[str, tuple]] = {}
+        ids: Dict[str, tuple] = {}
+        stack = [where] if where is not None else []
+        while stack:
+            expr = stack.pop()
+            if expr[0] == "and":
+                stack.extend(expr[1:])
+                continue
+            if expr[0] != "cmp" or expr[1] != "=":
+                continue
+            left, right = expr[2], expr[3]
+            if left[0] in ("lit", "param"):
+                left, right = right, left
+            if right[0] not in ("lit", "param"):
+                continue
+            if left[0] == "prop" and left[1][0] == "var":
+                props.setdefault(left[1][1], {})[left[2]] = right
+            elif left[0] == "call" and left[1] == "id" and len(left[2]) == 1 and left[2][0][0] == "var":
+                ids[left[2][0][1]] = right
+        return props, ids
+
+    def _node_matches(self, pattern: NodePattern, node: Node, row: Dict[str, Any]) -> bool:
+        if pattern.var is not None and pattern.var in row and row[pattern.var] is not node:
+            return False
+        if not all(label in node.labels for label in pattern.labels):
+            return False
+        return all(
+            _values_equal(node.props.get(key), value)
+            for key, value in self._props(pattern.props, row).items()
+        )
+
+    def _node_candidates(
+        self,
+        pattern: NodePattern,
+        row: Dict[str, Any],
+        hints: Tuple[Dict[str, Dict[str, tuple]], Dict[str, tuple]]
+    ) -> Iterable[Node]:
+        if pattern.var is not None and pattern.var in row:
+            node = row[pattern.var]
+            if isinstance(node, Node) and node.id in self.graph.nodes and self._node_matches(pattern, node, row):
+                return [node]
+            return []
+        prop_hints, id_hints = hints
+        if pattern.var in id_hints:
+            node = self.graph.nodes.get(self.eval(id_hints[pattern.var], row))
+            if node is not None and self._node_matches(pattern, node, row):
+                return [node]
+            return []
+        props = self._props(pattern.props, row)
+        if pattern.var is not None:
+            for key, value_expr in prop_hints.get(pattern.var, {}).items():
+                props.setdefault(key, self.eval(value_expr, row))
+        return self.graph.find_nodes(pattern.labels, props)
+
+    def _rel_matches(self, pattern: RelPattern, rel: Relationship, row: Dict[str, Any]) -> bool:
+        if pattern.var is not None and pattern.var in row and row[pattern.var] is not rel:
+            return False
+        return all(
+            _values_equal(rel.props.get(key), value)
+            for key, value in self._props(pattern.props, row).items()
+        )
+
+    @staticmethod
+    def _bind(row: Dict[str, Any], var: Optional[str], value: Any) -> Dict[str, Any]:
+        if var is None:
+            return row
+        bound = dict(row)
+        bound[var] = value
+        return bound
+
+    def _match_path(
+        self,
+        path: PathPattern,
+        row: Dict[str, Any],
+        used: frozenset,
+        hints=({}, {})
+    ) -> Iterator[Tuple[Dict[str, Any], frozenset]]:
+        first = path.nodes[0]
+        for node in self._node_candidates(first, row, hints):
+            if node.id not in self.graph.nodes:
+                continue
+            yield from self._extend(path, 0, node, self._bind(row, first.var, node), used)
+
+    def _extend(
+        self,
+        path: PathPattern,
+        step: int,
+        node: Node,
+        row: Dict[str, Any],
+        used: frozenset
+    ) -> Iterator[Tuple[Dict[str, Any], frozenset]]:
+        if step == len(path.rels):
+            yield row, used
+            return
+        rel_pattern = path.rels[step]
+        node_pattern = path.nodes[step + 1]
+        for rel, other_id in self.graph.neighbors(node.id, rel_pattern.direction, rel_pattern.types):
+            # A relationship is traversed at most once per pattern.
+            if rel.id in used or not self._rel_matches(rel_pattern, rel, row):
+                continue
+            other = self.graph.nodes.get(other_id)
+            if other is None or not self._node_matches(node_pattern, other, row):
+                continue
+            bound = self._bind(self._bind(row, rel_pattern.var, rel), node_pattern.var, other)
+            yield from self._extend(path, step + 1, other, bound, used | {rel.id})
+
+    def _match_paths(
+        self,
+        paths: List[PathPattern],
+        index: int,
+        row: Dict[str, Any],
+        used: frozenset,
+        hints
+    ) -> Iterator[Dict[str, Any]]:
+        if index == len(paths):
+            yield row
+            return
+        for bound, bound_used in self._match_path(paths[index], row, used, hints):
+            yield from self._match_paths(paths, index + 1, bound, bound_used, hints)
+
+    @staticmethod
+    def _pattern_vars(paths: Iterable[PathPattern]) -> List[str]:
+        names = []
+        for path in paths:
+            for element in path.nodes + path.rels:
+                if element.var is not None and element.var not in names:
+                    names.append(element.var)
+        return names
+
+    # Clauses
+
+    def _match(self, clause: tuple, rows: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        _, paths, where, optional = clause
+        hints = self._pattern_hints(where)
+        names = self._pattern_vars(paths)
+        for row in rows:
+            found = False
+            for bound in self._match_paths(paths, 0, row, frozenset(), hints):
+                if where is None or self.eval(where, bound):
+                    found = True
+                    yield bound
+            if optional and not found:
+                yield {**{name: None for name in names}, **row}
+
+    def _unwind(self, clause: tuple, rows: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        _, expr, alias = clause
+        for row in rows:
+            value = self.eval(expr, row)
+            if value is None:
+                continue
+            for item in value if isinstance(value, list) else [value]:
+                yield self._bind(row, alias, item)
+
+    def _create_path(self, path: PathPattern, row: Dict[str, Any]) -> Dict[str, Any]:
+        nodes = []
+        for pattern in path.nodes:
+            if pattern.var is not None and pattern.var in row:
+                nodes.append(row[pattern.var])
+                continue
+            node = self.graph.create_node(pattern.labels, self._props(pattern.props, row))
+            row = self._bind(row, pattern.var, node)
+            nodes.append(node)
+        for i, rel_pattern in enumerate(path.rels):
+            if len(rel_pattern.types) != 1:
+                raise CypherSyntaxError("Created relationships need exactly one type")
+            start, end = nodes[i], nodes[i + 1]
+            if rel_pattern.direction == "in":
+                start, end = end, start
+            rel = self.graph.create_rel(rel_pattern.types[0], start, end, self._props(rel_pattern.props, row))
+            row = self._bind(row, rel_pattern.var, rel)
+        return row
+
+    def _create(self, clause: tuple, rows: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        for row in rows:
+            for path in clause[1]:
+                row = self._create_path(path, row)
+            yield row
+
+    def _merge(self, clause: tuple, rows: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        _, path, on_create, on_match = clause
+        for row in rows:
+            matches = [bound for bound, _ in self._match_path(path, row, frozenset())]
+            if matches:
+                for bound in matches:
+                    self._apply_set_items(on_match, bound)
+                    yield bound
+            else:
+                bound = self._create_path(path, row)
+                self._apply_set_items(on_create, bound)
+                yield bound
+
+    def _apply_set_items(self, items: Iterable[tuple], row: Dict[str, Any]) -> None:
+        for item in items:
+            kind, var = item[0], item[1]
+            target = row.get(var)
+            if target is None:
+                continue
+            if kind == "set_prop":
+                self._set_prop(target, item[2], self.eval(item[3], row))
+            elif kind in ("merge_props", "replace_props"):
+                props = self.eval(item[2], row)
+                if isinstance(props, (Node, Relationship)):
+                    props = dict(props.props)
+                if kind == "replace_props":
+                    for key in list(target.props):
+                        if key not in props:
+                            self._set_prop(target, key, None)
+                for key, value in props.items():
+                    self._set_prop(target, key, value)
+            elif kind == "add_labels":
+                for label in item[2]:
+                    self.graph.add_label(target, label)
+            elif kind == "remove_prop":
+                self._set_prop(target, item[2], None)
+            elif kind == "remove_labels":
+                for label in item[2]:
+                    self.graph.remove_label(target, label)
+
+    def _set_prop(self, target: Union[Node, Relationship], key: str, value: Any) -> None:
+        if isinstance(target, Node):
+            self.graph.set_node_prop(target, key, value)
+        elif value is None:
+            target.props.pop(key, None)
+        else:
+            target.props[key] = value
+
+    def _set(self, clause: tuple, rows: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        for row in rows:
+            self._apply_set_items(clause[1], row)
+            yield row
+
+    _remove = _set
+
+    def _delete(self, clause: tuple, rows: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        _, exprs, detach = clause
+        for row in rows:
+            for expr in exprs:
+                target = self.eval(expr, row)
+                if isinstance(target, Node):
+                    self.graph.delete_node(target, detach=detach)
+                elif isinstance(target, Relationship):
+                    self.graph.delete_rel(target)
+                elif target is not None:
+                    raise ValueError(f"Cannot delete {target!r}")
+            yield row
+
+    def _return(self, clause: tuple, rows: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        _, items, distinct, order, skip, limit = clause
+        records: Iterable[Dict[str, Any]]
+        if items is not None and any(is_aggregate(item.expr) for item in items):
+            records = self._aggregate(items, rows)
+            scopes = None
+        else:
+            records, scopes = self._project(items, rows, keep_scope=bool(order))
+
+        if order:
+            records = self._order(list(records), scopes, items, order)
+        if distinct:
+            records = self._distinct(records)
+        start = self.eval(skip, {}) if skip is not None else 0
+        stop = start + self.eval(limit, {}) if limit is not None else None
+        for record in islice(records, start, stop):
+            yield {key: to_output(value) for key, value in record.items()}
+
+    def _project(self, items, rows, keep_scope: bool):
+        scopes: List[Dict[str, Any]] = []
+
+        def records():
+            for row in rows:
+                if items is None:
+                    record = dict(row)
+                else:
+                    record = {item.name: self.eval(item.expr, row) for item in items}
+                if keep_scope:
+                    scopes.append(row)
+                yield record
+
+        return records(), scopes
+
+    def _aggregate(self, items, rows) -> List[Dict[str, Any]]:
+        keys = [item for item in items if not is_aggregate(item.expr)]
+        aggregates = [item for item in items if is_aggregate(item.expr)]
+        for item in aggregates:
+            if item.expr[0] != "call":
+                raise CypherSyntaxError("Aggregates must be top-level RETURN items")
+        groups: Dict[Any, Tuple[Dict[str, Any], List[Dict[str, Any]]]] = {}
+        for row in rows:
+            values = {item.name: self.eval(item.expr, row) for item in keys}
+            group_key = tuple(_freeze(values[item.name]) for item in keys)
+            if group_key not in groups:
+                groups[group_key] = (values, [])
+            groups[group_key][1].append(row)
+        if not groups and not keys:
+            groups[()] = ({}, [])
+        records = []
+        for values, group_rows in groups.values():
+            record = dict(values)
+            for item in aggregates:
+                record[item.name] = self._aggregate_value(item.expr, group_rows)
+            records.append({item.name: record[item.name] for item in items})
+        return records
+
+    def _aggregate_value(self, expr: tuple, rows: List[Dict[str, Any]]) -> Any:
+        _, name, args, distinct, star = expr
+        if star:
+            return len(rows)
+        values = [self.eval(args[0], row) for row in rows]
+        values = [value for value in values if value is not None]
+        if distinct:
+            seen: Dict[Any, Any] = {}
+            for value in values:
+                seen.setdefault(_freeze(value), value)
+            values = list(seen.values())
+        if name == "count":
+            return len(values)
+        if name == "collect":
+            return values
+        if not values:
+            return None
+        if name == "sum":
+            return sum(values)
+        if name == "avg":
+            return sum(values) / len(values)
+        if name == "min":
+            return min(values)
+        return max(values)
+
+    def _order(self, records, scopes, items, order) -> List[Dict[str, Any]]:
+        names = {item.expr: item.name for item in items or ()}
+        decorated = []
+        for i, record in enumerate(records):
+            scope = {**scopes[i], **record} if scopes else record
+            key = []
+            for expr, _ in order:
+                if expr in names:
+                    key.append(record[names[expr]])
+                else:
+                    key.append(self.eval(expr, scope))
+            decorated.append((key, record))
+        # Stable sorts applied from the last key to the first.
+        for position in reversed(range(len(order))):
+            descending = order[position][1]
+            try:
+                decorated.sort(key=lambda pair: _sort_key(pair[0][position]), reverse=descending)
+            except TypeError:
+                decorated.sort(key=lambda pair: _sort_key(repr(pair[0][position])), reverse=descending)
+        return [record for _, record in decorated]
+
+    @staticmethod
+    def _distinct(records: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        seen = set()
+        for record in records:
+            key = _freeze(record)
+            if key not in seen:
+                seen.add(key)
+                yield record
+
+@lru_cache(maxsize=1024)
+def _parse_cached(text: str) -> Tuple[tuple, ...]:
+    return tuple(parse(text))
+
+class InMemoryGraphAdapter(GraphDBAdapter):
+    """Graph adapter backed by an in-process ``MemoryGraph``.
+
+    Understands the Cypher subset described in ``cypher_subset``, which
+    covers the queries emitted by ``QueryTranslator.translate_to_cypher``.
+    The graph can optionally be loaded from and saved to a snapshot file.
+    """
+
+    loop_bound = False
+
+    def __init__(
+        self,
+        snapshot_path: Optional[Union[str, Path]] = None,
+        autosave: bool = False,
+        graph: Optional[MemoryGraph] = None
+    ):
+        """Initialize the in-memory adapter.
+
+        Args:
+            snapshot_path: Optional snapshot loaded on ``connect`` if present
+            autosave: Save a snapshot to ``snapshot_path`` on ``disconnect``
+            graph: Optional existing graph to serve
+        """
+        self.snapshot_path = Path(snapshot_path) if snapshot_path else None
+        self.autosave = autosave
+        self.graph = graph or MemoryGraph()
+
+    async def connect(self) -> None:
+        """Load the snapshot, if one is configured and exists."""
+        if self.snapshot_path and self.snapshot_path.exists():
+            self.graph = MemoryGraph.load(self.snapshot_path)
+
+    async def disconnect(self) -> None:
+        """Save a snapshot if autosave is enabled."""
+        if self.autosave and self.snapshot_path:
+            self.save()
+
+    def save(self, path: Optional[Union[str, Path]] = None) -> None:
+        """Write a snapshot of the graph.
+
+        Args:
+            path: Snapshot file, defaults to ``snapshot_path``
+        """
+        path = path or self.snapshot_path
+        if path is None:
+            raise ValueError("No snapshot path configured")
+        self.graph.save(path)
+
+    def load(self, path: Optional[Union[str, Path]] = None) -> None:
+        """Replace the graph with a snapshot.
+
+        Args:
+            path: Snapshot file, defaults to ``snapshot_path``
+        """
+        path = path or self.snapshot_path
+        if path is None:
+            raise ValueError("No snapshot path configured")
+        self.graph = MemoryGraph.load(path)
+
+    def _run(self, query: GraphQuery) -> Iterator[Dict[str, Any]]:
+        executor = CypherExecutor(self.graph, query.parameters)
+        return executor.run(list(_parse_cached(query.query)))
+
+    async def execute_query(self, query: GraphQuery) -> GraphResult:
+        """Execute a Cypher query against the in-memory graph."""
+        records = list(self._run(query))
+        return GraphResult(data=records, metadata={"query": query.query})
+
+    async def execute_query_stream(
+        self,
+        query: GraphQuery,
+        batch_size: Optional[int] = None
+    ) -> AsyncIterator[StreamItem]:
+        """Execute a Cypher query and yield records as they are matched.
+
+        Read-only queries without ``ORDER BY`` or aggregation are evaluated
+        lazily, so only the records being consumed are held in memory.
+        """
+        records = self._run(query)
+
+        async def cooperative():
+            for count, record in enumerate(records, 1):
+                yield record
+                if count % _STREAM_YIELD_EVERY == 0:
+                    await asyncio.sleep(0)
+
+        async for item in iter_batches(cooperative(), batch_size):
+            yield item
+
+    async def batch_execute(
+        self,
+        queries: List[GraphQuery],
+        timeout: Optional[float] = None,
+        fail_fast: bool = True
+    ) -> List[GraphResult]:
+        """Execute multiple Cypher queries in order.
+
+        Args:
+            queries: List of Cypher queries
+            timeout: Per-query timeout in seconds
+            fail_fast: Raise on the first failure instead of recording it
+                in the failed result's metadata
+
+        Returns:
+            List of query results, in input order
+        """
+        return await run_bounded(
+            queries,
+            self.execute_query,
+            timeout=timeout,
+            fail_fast=fail_fast
+        )
@@ -1,32 +1,168 @@
-from typing import Any, Dict, List
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional, Union
 from gremlin_python.driver import client
-from .adapter import GraphDBAdapter, GraphQuery, GraphResult
+from .adapter import (
+    GraphDBAdapter,
+    GraphQuery,
+    GraphResult,
+    StreamItem,
+    is_write_query,
+    iter_batches,
+    run_bounded,
+)
+from .pool import ConnectionLimiter, PoolConfig
+
+logger = logging.getLogger(__name__)
 
 class NeptuneAdapter(GraphDBAdapter):
     """AWS Neptune database adapter implementation."""
     
-    def __init__(self, endpoint: str, port: int, database: str):
-        self.client = client.Client(f'wss://{endpoint}:{port}/gremlin', 'g')
+    warm_up_query = "g.inject(1)"
+    query_language = "gremlin"
+    
+    def __init__(
+        self,
+        endpoint: str,
+        port: int,
+        database: str,
+        max_concurrency: int = 8,
+        pool: Union[PoolConfig, Dict[str, Any], None] = None
+    ):
+        self.url = f'wss://{endpoint}:{port}/gremlin'
+        self.max_concurrency = max_concurrency
+        self.pool = PoolConfig.coerce(pool)
+        self._limiter = ConnectionLimiter(
+            self.pool.max_size,
+            self.pool.acquisition_timeout
+        )
+        self.client: Optional[client.Client] = None
+        self._connected_at = 0.0
     
     async def connect(self) -> None:
         """Establish connection to AWS Neptune database."""
-        # Connection is established in the constructor
-        pass
+        transport_kwargs = {}
+        if self.pool.keep_alive is not None:
+            transport_kwargs["heartbeat"] = self.pool.keep_alive
+        self.client = client.Client(
+            self.url,
+            'g',
+            pool_size=self.pool.max_size,
+            max_workers=self.pool.max_size,
+            **transport_kwargs
+        )
+        self._connected_at = time.monotonic()
+        logger.info(f"Connected to Neptune at {self.url}")
+        await self.warm_up(self.pool.warm_up)
     
     async def disconnect(self) -> None:
         """Close AWS Neptune connection."""
-        self.client.close()
+        if self.client:
+            self.client.close()
+            self.client = None
+    
+    def pool_stats(self) -> Dict[str, Any]:
+        """Return connection pool utilization and wait-time statistics."""
+        return self._limiter.stats()
+    
+    @asynccontextmanager
+    async def _connection(self):
+        """Hold a pool slot, recycling the client once it exceeds its lifetime."""
+        if not self.client:
+            raise RuntimeError("Not connected to database")
+        if (
+            self._limiter.in_use == 0
+            and time.monotonic() - self._connected_at > self.pool.max_lifetime
+        ):
+            await self.disconnect()
+            await self.connect()
+        async with self._limiter.acquire():
+            yield self.client
     
     async def execute_query(self, query: GraphQuery) -> GraphResult:
         """Execute a Gremlin query."""
-        result_set = await self.client.submitAsync(query.query)
-        records = await result_set.all()
+        async with self._connection() as gremlin:
+            # submitAsync() and all() return concurrent futures, not coroutines.
+            result_set = await asyncio.wrap_future(
+                gremlin.submitAsync(query.query, bindings=query.parameters)
+            )
+            records = await asyncio.wrap_future(result_set.all())
         return GraphResult(data=records, metadata={"query": query.query})
     
-    async def batch_execute(self, queries: List[GraphQuery]) -> List[GraphResult]:
-        """Execute multiple Gremlin queries in batch."""
-        results = []
-        for query in queries:
-            result = await self.execute_query(query)
-            results.append(result)
-        return results 
\ No newline at end of file
+    async def execute_query_stream(
+        self,
+        query: GraphQuery,
+        batch_size: Optional[int] = None
+    ) -> AsyncIterator[StreamItem]:
+        """Execute a Gremlin query and yield records as they arrive.
+        
+        The server streams results in chunks of ``batchSize``; each chunk
+        is handed on as soon as it is received instead of waiting for the
+        whole result set.
+        
+        Unlike the Neo4j adapter this stream has no backpressure: the
+        gremlin_python driver reads every chunk off the websocket into its
+        result set as fast as the server sends it, however slowly the
+        caller consumes them, so the whole result may end up buffered in
+        memory. Bound large results in the traversal itself, e.g. by
+        paging with ``range()`` steps.
+        """
+        request_options = {"batchSize": batch_size} if batch_size else None
+        loop = asyncio.get_running_loop()
+        async with self._connection() as gremlin:
+            result_set = await asyncio.wrap_future(
+                gremlin.submitAsync(
+                    query.query,
+                    bindings=query.parameters,
+                    request_options=request_options
+                )
+            )
+            
+            async def records():
+                while True:
+                    # ResultSet.one() blocks until the next chunk arrives;
+                    # later chunks keep queueing up in the driver meanwhile.
+                    chunk = await loop.run_in_executor(None, result_set.one)
+                    if not chunk:
+                        return
+                    for record in chunk:
+                        yield record
+            
+            async for item in iter_batches(records(), batch_size):
+                yield item
+    
+    async def batch_execute(
+        self,
+        queries: List[GraphQuery],
+        max_concurrency: Optional[int] = None,
+        timeout: Optional[float] = None,
+        fail_fast: bool = True
+    ) -> List[GraphResult]:
+        """Execute multiple Gremlin queries in batch.
+        
+        Read-only batches are dispatched concurrently over the client's
+        websocket pool, with at most ``max_concurrency`` queries in
+        flight. Batches containing writes run sequentially.
+        
+        Args:
+            queries: List of Gremlin queries
+            max_concurrency: Maximum queries in flight, defaults to the
+                adapter's ``max_concurrency``
+            timeout: Per-query timeout in seconds
+            fail_fast: Raise on the first failure instead of recording it
+                in the failed result's metadata
+        
+        Returns:
+            List of query results, in input order
+        """
+        if any(is_write_query(query.query) for query in queries):
+            max_concurrency = 1
+        return await run_bounded(
+            queries,
+            self.execute_query,
+            max_concurrency=max_concurrency or self.max_concurrency,
+            timeout=timeout,
+            fail_fast=fail_fast
+        )
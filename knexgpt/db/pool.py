@@ -0,0 +1,127 @@
+"""
+Connection pool settings and accounting shared by the graph adapters.
+"""
+import asyncio
+from contextlib import asynccontextmanager
+import logging
+import time
+from typing import Any, AsyncIterator, Dict, Optional, Union
+
+from pydantic import BaseModel
+
+logger = logging.getLogger(__name__)
+
+class PoolConfig(BaseModel):
+    """Connection pool tuning for a graph database adapter."""
+    max_size: int = 50
+    acquisition_timeout: float = 60.0
+    max_lifetime: float = 3600.0
+    keep_alive: Optional[float] = 30.0
+    warm_up: int = 0
+
+    @classmethod
+    def coerce(cls, value: Union["PoolConfig", Dict[str, Any], None]) -> "PoolConfig":
+        """Build a config from a model, a dict of settings or None.
+
+        Args:
+            value: Pool settings
+
+        Returns:
+            Pool configuration
+        """
+        if value is None:
+            return cls()
+        if isinstance(value, PoolConfig):
+            return value
+        return cls(**value)
+
+class PoolTimeoutError(TimeoutError):
+    """Raised when no connection becomes free within the acquisition timeout."""
+
+class ConnectionLimiter:
+    """Bounds the connections an adapter holds and records pool statistics.
+
+    Every query acquires a slot for as long as it holds a connection, so
+    the number of open sockets can never exceed ``max_size`` no matter
+    how many callers are waiting.
+    """
+
+    def __init__(self, max_size: int, acquisition_timeout: Optional[float] = None):
+        """Initialize the limiter.
+
+        Args:
+            max_size: Maximum number of connections in use at once
+            acquisition_timeout: Seconds to wait for a free connection, or
+                None to wait indefinitely
+        """
+        if max_size < 1:
+            raise ValueError("max_size must be positive")
+        self.max_size = max_size
+        self.acquisition_timeout = acquisition_timeout
+        self.in_use = 0
+        self.waiting = 0
+        self.acquired = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        # Semaphores are bound to the loop they are first used on.
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_size)
+            self._loop = loop
+            self.in_use = 0
+        return self._semaphore
+
+    @asynccontextmanager
+    async def acquire(self) -> AsyncIterator[None]:
+        """Hold a connection slot for the duration of the block.
+
+        Raises:
+            PoolTimeoutError: If no slot frees up within the acquisition
+                timeout
+        """
+        semaphore = self._get_semaphore()
+        started = time.monotonic()
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(semaphore.acquire(), self.acquisition_timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise PoolTimeoutError(
+                f"No connection available after {self.acquisition_timeout}s "
+                f"({self.in_use}/{self.max_size} in use)"
+            )
+        finally:
+            self.waiting -= 1
+        waited = time.monotonic() - started
+        self.acquired += 1
+        self.total_wait += waited
+        self.max_wait = max(self.max_wait, waited)
+        self.in_use += 1
+        try:
+            yield
+        finally:
+            self.in_use -= 1
+            semaphore.release()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return pool utilization and wait-time statistics.
+
+        Returns:
+            Pool size, connections in use, waiters, acquisitions, timeouts
+            and wait times in seconds
+        """
+        return {
+            "max_size": self.max_size,
+            "in_use": self.in_use,
+            "waiting": self.waiting,
+            "utilization": self.in_use / self.max_size,
+            "acquired": self.acquired,
+            "timeouts": self.timeouts,
+            "avg_wait": self.total_wait / self.acquired if self.acquired else 0.0,
+            "max_wait": self.max_wait,
+        }
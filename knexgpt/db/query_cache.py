@@ -0,0 +1,365 @@
+"""
+Query result caching for graph database adapters.
+"""
+from collections import OrderedDict
+import json
+import logging
+import re
+import time
+from typing import Any, AsyncIterator, Dict, FrozenSet, List, Optional, Tuple
+
+from .adapter import (
+    GraphDBAdapter,
+    GraphQuery,
+    GraphResult,
+    StreamItem,
+    is_write_query,
+)
+
+logger = logging.getLogger(__name__)
+
+# Labels, relationship types and collections a query touches, by query
+# language.
+_LABEL_PATTERNS = {
+    # Cypher node labels and relationship types: (n:Person), [:KNOWS|LIKES]
+    "cypher": re.compile(r"[(\[]\s*\w*\s*(:\s*(?:`[^`]+`|\w+)(?:\s*[:|&]\s*:?\s*(?:`[^`]+`|\w+))*)"),
+    # AQL collections: FOR d IN docs, INSERT {...} INTO docs
+    "aql": re.compile(r"\b(?:IN|INTO)\s+([A-Za-z_]\w*)\b(?!\s*\()", re.IGNORECASE),
+    # Gremlin labels: hasLabel('Person'), addV('Person'), outE('knows')
+    "gremlin": re.compile(r"\.(?:hasLabel|addV|addE|outE|inE|bothE)\s*\(\s*['\"](\w+)['\"]"),
+}
+
+# Patterns that may reach nodes or relationships of any label, making a
+# query's labels unknown.
+_UNLABELLED_PATTERNS = {
+    # Cypher node and relationship patterns without a label or type: (n),
+    # (n {id: 1}), [r], -->
+    "cypher": re.compile(
+        r"(?<![\w`])\(\s*\w*\s*(?:\{|\))|\[\s*\w*\s*(?:\{|\]|\*)|\)\s*<?--\s*>?\s*\("
+    ),
+    # AQL graph traversals
+    "aql": re.compile(r"\b(?:OUTBOUND|INBOUND|ANY|GRAPH)\b", re.IGNORECASE),
+    # Gremlin steps moving to adjacent vertices
+    "gremlin": re.compile(r"\.(?:out|in|both|outV|inV|bothV|otherV)\s*\("),
+}
+
+_LABEL_NAME = re.compile(r"`[^`]+`|\w+")
+
+_WHITESPACE = re.compile(r"\s+")
+
+def normalize_query(text: str) -> str:
+    """Collapse whitespace so formatting differences share a cache entry.
+
+    Args:
+        text: Query text
+
+    Returns:
+        Normalized query text
+    """
+    return _WHITESPACE.sub(" ", text).strip()
+
+def query_labels(text: str, query_language: str = "cypher") -> FrozenSet[str]:
+    """Extract the labels, relationship types and collections in a query.
+
+    Args:
+        text: Query text
+        query_language: Language of the query: 'cypher', 'aql' or
+            'gremlin'; other languages have no detectable labels
+
+    Returns:
+        Set of names, empty if none could be detected or the query has a
+        node or relationship pattern that may match any label
+    """
+    pattern = _LABEL_PATTERNS.get(query_language)
+    unlabelled = _UNLABELLED_PATTERNS.get(query_language)
+    if pattern is None or unlabelled is None or unlabelled.search(text):
+        return frozenset()
+    labels = set()
+    for match in pattern.finditer(text):
+        for name in _LABEL_NAME.findall(match.group(1)):
+            labels.add(name.strip("`"))
+    return frozenset(labels)
+
+class QueryCache:
+    """LRU cache of query results with a TTL and label-based invalidation."""
+
+    def __init__(self, max_size: int = 1024, ttl: Optional[float] = 300.0):
+        """Initialize the cache.
+
+        Args:
+            max_size: Maximum number of cached results
+            ttl: Seconds a result stays valid, or None for no expiry
+        """
+        if max_size < 1:
+            raise ValueError("max_size must be positive")
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[float, FrozenSet[str], GraphResult]]" = (
+            OrderedDict()
+        )
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def make_key(query: GraphQuery) -> str:
+        """Build a cache key from normalized query text and parameters.
+
+        Args:
+            query: Query to key
+
+        Returns:
+            Cache key
+        """
+        parameters = json.dumps(
+            query.parameters or {}, sort_keys=True, default=repr
+        )
+        return f"{normalize_query(query.query)}\x00{parameters}"
+
+    def get(self, key: str) -> Optional[GraphResult]:
+        """Look up a cached result, refreshing its LRU position.
+
+        Args:
+            key: Cache key
+
+        Returns:
+            Copy of the cached result, or None on a miss
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, _, result = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            self.expirations += 1
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return result.model_copy(deep=True)
+
+    def put(self, key: str, labels: FrozenSet[str], result: GraphResult) -> None:
+        """Store a result, evicting the least recently used entries if full.
+
+        Args:
+            key: Cache key
+            labels: Labels the query touches
+            result: Result to store; a copy is kept, so the caller may
+                modify it
+        """
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else float("inf")
+        self._entries[key] = (expires_at, labels, result.model_copy(deep=True))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, labels: FrozenSet[str] = frozenset()) -> int:
+        """Drop entries that may be affected by a write.
+
+        Entries sharing a label with the write are dropped, as are entries
+        whose labels are unknown. A write with no detectable labels clears
+        the whole cache.
+
+        Args:
+            labels: Labels touched by the write
+
+        Returns:
+            Number of entries dropped
+        """
+        self.generation += 1
+        if not labels:
+            dropped = len(self._entries)
+            self._entries.clear()
+        else:
+            stale = [
+                key
+                for key, (_, entry_labels, _) in self._entries.items()
+                if not entry_labels or entry_labels & labels
+            ]
+            for key in stale:
+                del self._entries[key]
+            dropped = len(stale)
+        self.invalidations += dropped
+        return dropped
+
+    def clear(self) -> None:
+        """Drop all entries."""
+        self.invalidate()
+
+    def stats(self) -> Dict[str, int]:
+        """Return cache counters.
+
+        Returns:
+            Size, hit, miss, eviction, expiration and invalidation counts
+        """
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+        }
+
+class CachedGraphAdapter(GraphDBAdapter):
+    """Adapter wrapper that caches read query results.
+
+    Works with any ``GraphDBAdapter``. Reads are served from a ``QueryCache``
+    keyed on normalized query text and parameters; queries classified as
+    writes bypass the cache and invalidate entries sharing their labels.
+    """
+
+    def __init__(
+        self,
+        adapter: GraphDBAdapter,
+        max_size: int = 1024,
+        ttl: Optional[float] = 300.0
+    ):
+        """Initialize the caching wrapper.
+
+        Args:
+            adapter: Adapter to wrap
+            max_size: Maximum number of cached results
+            ttl: Seconds a result stays valid, or None for no expiry
+        """
+        self.adapter = adapter
+        self.cache = QueryCache(max_size=max_size, ttl=ttl)
+
+    @property
+    def query_language(self) -> str:
+        """Query language of the wrapped adapter."""
+        return self.adapter.query_language
+
+    @property
+    def loop_bound(self) -> bool:
+        """Whether the wrapped adapter is bound to its event loop."""
+        return self.adapter.loop_bound
+
+    async def connect(self) -> None:
+        """Connect the wrapped adapter."""
+        await self.adapter.connect()
+
+    async def disconnect(self) -> None:
+        """Disconnect the wrapped adapter and drop cached results."""
+        self.cache.clear()
+        await self.adapter.disconnect()
+
+    async def execute_query(self, query: GraphQuery) -> GraphResult:
+        """Execute a query, serving reads from the cache when possible.
+
+        Args:
+            query: Query to execute
+
+        Returns:
+            Query results
+        """
+        if is_write_query(query.query):
+            result = await self.adapter.execute_query(query)
+            self._invalidate_for(query)
+            return result
+
+        key = self.cache.make_key(query)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+
+        generation = self.cache.generation
+        result = await self.adapter.execute_query(query)
+        # Don't store a result that raced with a write.
+        if generation == self.cache.generation:
+            self.cache.put(key, query_labels(query.query, self.query_language), result)
+        return result
+
+    async def execute_query_stream(
+        self,
+        query: GraphQuery,
+        batch_size: Optional[int] = None
+    ) -> AsyncIterator[StreamItem]:
+        """Stream a query from the wrapped adapter without caching.
+
+        Args:
+            query: Query to execute
+            batch_size: Records per yielded batch, or None for single records
+
+        Yields:
+            Single records, or lists of at most ``batch_size`` records
+        """
+        try:
+            async for item in self.adapter.execute_query_stream(query, batch_size):
+                yield item
+        finally:
+            if is_write_query(query.query):
+                self._invalidate_for(query)
+
+    async def batch_execute(
+        self,
+        queries: List[GraphQuery],
+        **kwargs
+    ) -> List[GraphResult]:
+        """Execute a batch, serving cached reads and batching the rest.
+
+        Batches containing writes are passed through unchanged so their
+        ordering semantics are preserved.
+
+        Args:
+            queries: List of queries to execute
+            **kwargs: Batch options forwarded to the wrapped adapter
+
+        Returns:
+            List of query results
+        """
+        writes = [query for query in queries if is_write_query(query.query)]
+        if writes:
+            written = await self.adapter.batch_execute(queries, **kwargs)
+            for query in writes:
+                self._invalidate_for(query)
+            return written
+
+        results: List[Optional[GraphResult]] = [None] * len(queries)
+        keys = [self.cache.make_key(query) for query in queries]
+        missing: Dict[str, List[int]] = {}
+        for index, key in enumerate(keys):
+            if key in missing:
+                missing[key].append(index)
+                continue
+            cached = self.cache.get(key)
+            if cached is not None:
+                results[index] = cached
+            else:
+                missing[key] = [index]
+
+        if missing:
+            generation = self.cache.generation
+            fetched = await self.adapter.batch_execute(
+                [queries[indices[0]] for indices in missing.values()],
+                **kwargs
+            )
+            store = generation == self.cache.generation
+            for (key, indices), result in zip(missing.items(), fetched):
+                results[indices[0]] = result
+                # Duplicates get their own copies, like cache hits.
+                for index in indices[1:]:
+                    results[index] = result.model_copy(deep=True)
+                failed = result.metadata and "error" in result.metadata
+                if store and not failed:
+                    labels = query_labels(queries[indices[0]].query, self.query_language)
+                    self.cache.put(key, labels, result)
+        return [result for result in results if result is not None]
+
+    def stats(self) -> Dict[str, int]:
+        """Return cache counters."""
+        return self.cache.stats()
+
+    def pool_stats(self) -> Dict[str, Any]:
+        """Return the wrapped adapter's connection pool statistics."""
+        return self.adapter.pool_stats()
+
+    def _invalidate_for(self, query: GraphQuery) -> None:
+        """Invalidate entries that a write query may have changed."""
+        dropped = self.cache.invalidate(query_labels(query.query, self.query_language))
+        logger.debug(f"Write invalidated {dropped} cached results")
@@ -1,42 +1,758 @@
-from typing import Optional
+"""
+SPARQL to Cypher/Gremlin compiler.
+
+SPARQL ``SELECT`` queries are parsed into a basic graph pattern (a list of
+triple patterns) plus filters and solution modifiers, then mapped onto the
+property graph model:
+
+- ``?s a ex:Person`` becomes a node label,
+- a triple whose object is a literal, or a variable used nowhere else as a
+  node, becomes a node property,
+- any other triple becomes a relationship,
+- IRIs in subject or object position match nodes by their ``uri`` property.
+
+Every literal is lifted into a query parameter. Compiled templates are
+cached on the query's shape (its tokens with literals blanked out), so
+repeated queries that differ only in constants skip translation and reuse
+the database's execution plan.
+"""
+from collections import OrderedDict
+import re
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple, Union
+
+from .adapter import GraphQuery
+
+RDF_TYPE = "http://www.w3.org/1999/02/22-rdf-syntax-ns#type"
+
+# Languages SPARQL can be compiled to.
+TARGET_LANGUAGES = ("cypher", "gremlin")
+
+class SPARQLSyntaxError(ValueError):
+    """Raised for SPARQL queries outside the supported subset."""
+
+class Var(NamedTuple):
+    name: str
+
+class IRI(NamedTuple):
+    value: str
+
+class Literal(NamedTuple):
+    slot: int  # Position among the query's literals
+
+Term = Union[Var, IRI, Literal]
+
+class Triple(NamedTuple):
+    subject: Term
+    predicate: Union[Var, IRI]
+    object: Term
+
+class SelectQuery(NamedTuple):
+    variables: Optional[List[str]]  # None for SELECT *
+    distinct: bool
+    triples: List[Triple]
+    filters: List[tuple]
+    order: List[Tuple[tuple, bool]]
+    limit: Optional[Literal]
+    offset: Optional[Literal]
+
+class CompiledTemplate(NamedTuple):
+    """A translated query whose literal values are filled in per call."""
+    query: str
+    slots: Dict[str, int]  # parameter name -> literal slot
+    constants: Dict[str, Any]
+
+_TOKEN_PATTERN = re.compile(
+    r"""
+    (?P<ws>\s+|\#[^\n]*)
+    |(?P<iri><[^<>"{}|^`\\\s]*>)
+    |(?P<string>"(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*')
+    |(?P<number>[+-]?(?:\d+\.\d*|\.\d+|\d+)(?:[eE][+-]?\d+)?)
+    |(?P<var>[?$][A-Za-z_][A-Za-z0-9_]*)
+    |(?P<pname>(?:[A-Za-z][\w-]*)?:(?:[\w-](?:[\w.-]*[\w-])?)?)
+    |(?P<word>[A-Za-z_][A-Za-z0-9_]*)
+    |(?P<langtag>@[A-Za-z]+(?:-[A-Za-z0-9]+)*)
+    |(?P<symbol>\^\^|&&|\|\||!=|<=|>=|[{}().;,*=<>!])
+    """,
+    re.VERBOSE,
+)
+
+_IDENTIFIER = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+class _Token(NamedTuple):
+    kind: str
+    value: Any
+
+def _tokenize(text: str) -> List[_Token]:
+    tokens = []
+    pos = 0
+    while pos < len(text):
+        match = _TOKEN_PATTERN.match(text, pos)
+        if not match:
+            raise SPARQLSyntaxError(f"Unexpected character {text[pos]!r} at {pos}")
+        kind = match.lastgroup
+        value: Any = match.group()
+        pos = match.end()
+        if kind is None or kind == "ws":
+            continue
+        if kind == "string":
+            value = re.sub(r"\\(.)", lambda m: {"n": "\n", "t": "\t"}.get(m.group(1), m.group(1)), value[1:-1])
+        elif kind == "number":
+            value = float(value) if any(c in value for c in ".eE") else int(value)
+        elif kind == "iri":
+            value = value[1:-1]
+        elif kind == "var":
+            value = value[1:]
+        tokens.append(_Token(kind, value))
+    return tokens
+
+def _is_literal(token: _Token) -> bool:
+    return token.kind in ("string", "number") or (
+        token.kind == "word" and token.value.lower() in ("true", "false")
+    )
+
+def _literal_values(tokens: List[_Token]) -> List[Any]:
+    """Return the query's literal values in slot order.
+
+    Slots are numbered in token order, which is the order the parser meets
+    them, so a cached template can be filled without parsing again.
+    """
+    values = []
+    for i, token in enumerate(tokens):
+        if not _is_literal(token):
+            continue
+        if token.kind == "word":
+            values.append(token.value.lower() == "true")
+            continue
+        value = token.value
+        if (
+            token.kind == "string"
+            and i + 2 < len(tokens)
+            and tokens[i + 1] == _Token("symbol", "^^")
+        ):
+            datatype = _local_name(tokens[i + 2].value)
+            if datatype in ("integer", "int", "long", "short", "nonNegativeInteger", "positiveInteger"):
+                value = int(value)
+            elif datatype in ("decimal", "double", "float"):
+                value = float(value)
+            elif datatype == "boolean":
+                value = value == "true"
+        values.append(value)
+    return values
+
+class _Parser:
+    """Parses the supported SPARQL ``SELECT`` subset."""
+
+    def __init__(self, tokens: List[_Token]):
+        self.tokens = tokens
+        self.pos = 0
+        self.prefixes: Dict[str, str] = {}
+        self.slots = 0
+
+    def peek(self, offset: int = 0) -> Optional[_Token]:
+        index = self.pos + offset
+        return self.tokens[index] if index < len(self.tokens) else None
+
+    def advance(self) -> _Token:
+        token = self.peek()
+        if token is None:
+            raise SPARQLSyntaxError("Unexpected end of query")
+        self.pos += 1
+        return token
+
+    def at_word(self, word: str) -> bool:
+        token = self.peek()
+        return token is not None and token.kind == "word" and token.value.upper() == word
+
+    def accept_word(self, word: str) -> bool:
+        if self.at_word(word):
+            self.pos += 1
+            return True
+        return False
+
+    def expect_word(self, word: str) -> None:
+        if not self.accept_word(word):
+            raise SPARQLSyntaxError(f"Expected {word}")
+
+    def at_symbol(self, symbol: str) -> bool:
+        token = self.peek()
+        return token is not None and token.kind == "symbol" and token.value == symbol
+
+    def at_kind(self, kind: str) -> bool:
+        token = self.peek()
+        return token is not None and token.kind == kind
+
+    def accept_symbol(self, symbol: str) -> bool:
+        if self.at_symbol(symbol):
+            self.pos += 1
+            return True
+        return False
+
+    def expect_symbol(self, symbol: str) -> None:
+        if not self.accept_symbol(symbol):
+            raise SPARQLSyntaxError(f"Expected {symbol!r}")
+
+    def parse(self) -> SelectQuery:
+        while self.accept_word("PREFIX"):
+            name = self.advance()
+            iri = self.advance()
+            if name.kind != "pname" or not name.value.endswith(":") or iri.kind != "iri":
+                raise SPARQLSyntaxError("Malformed PREFIX declaration")
+            self.prefixes[name.value[:-1]] = iri.value
+        self.expect_word("SELECT")
+        distinct = self.accept_word("DISTINCT") or self.accept_word("REDUCED")
+        variables: Optional[List[str]]
+        if self.accept_symbol("*"):
+            variables = None
+        else:
+            variables = []
+            while self.at_kind("var"):
+                variables.append(self.advance().value)
+            if not variables:
+                raise SPARQLSyntaxError("SELECT needs variables or *")
+        self.accept_word("WHERE")
+        self.expect_symbol("{")
+        triples, filters = self.parse_group()
+        order = []
+        if self.accept_word("ORDER"):
+            self.expect_word("BY")
+            while True:
+                if self.at_word("ASC") or self.at_word("DESC"):
+                    descending = self.advance().value.upper() == "DESC"
+                    self.expect_symbol("(")
+                    expr = self.parse_expr()
+                    self.expect_symbol(")")
+                elif self.at_kind("var"):
+                    descending = False
+                    expr = ("var", self.advance().value)
+                else:
+                    break
+                order.append((expr, descending))
+            if not order:
+                raise SPARQLSyntaxError("ORDER BY needs at least one condition")
+        limit = offset = None
+        while self.at_word("LIMIT") or self.at_word("OFFSET"):
+            word = self.advance().value.upper()
+            token = self.peek()
+            if token is None or token.kind != "number":
+                raise SPARQLSyntaxError(f"{word} needs a number")
+            self.pos += 1
+            literal = self.literal()
+            if word == "LIMIT":
+                limit = literal
+            else:
+                offset = literal
+        token = self.peek()
+        if token is not None:
+            raise SPARQLSyntaxError(f"Unexpected token {token.value!r}")
+        return SelectQuery(variables, distinct, triples, filters, order, limit, offset)
+
+    def literal(self) -> Literal:
+        self.slots += 1
+        return Literal(self.slots - 1)
+
+    def parse_group(self) -> Tuple[List[Triple], List[tuple]]:
+        triples: List[Triple] = []
+        filters: List[tuple] = []
+        while not self.accept_symbol("}"):
+            if self.accept_word("FILTER"):
+                self.expect_symbol("(")
+                filters.append(self.parse_expr())
+                self.expect_symbol(")")
+                self.accept_symbol(".")
+                continue
+            subject = self.parse_term()
+            while True:
+                predicate = self.parse_predicate()
+                while True:
+                    triples.append(Triple(subject, predicate, self.parse_term()))
+                    if not self.accept_symbol(","):
+                        break
+                if not self.accept_symbol(";") or self.at_symbol(".") or self.at_symbol("}"):
+                    break
+            if not self.accept_symbol(".") and not self.at_symbol("}"):
+                raise SPARQLSyntaxError("Expected '.' or '}' after triple")
+        if not triples:
+            raise SPARQLSyntaxError("WHERE clause has no triple patterns")
+        return triples, filters
+
+    def parse_predicate(self) -> Union[Var, IRI]:
+        token = self.peek()
+        if token is not None and token.kind == "word" and token.value == "a":
+            self.pos += 1
+            return IRI(RDF_TYPE)
+        term = self.parse_term()
+        if isinstance(term, Literal):
+            raise SPARQLSyntaxError("Predicates must be IRIs or variables")
+        return term
+
+    def parse_term(self) -> Term:
+        token = self.advance()
+        if token.kind == "var":
+            return Var(token.value)
+        if token.kind == "iri":
+            return IRI(token.value)
+        if token.kind == "pname":
+            return IRI(self.expand(token.value))
+        if _is_literal(token):
+            literal = self.literal()
+            if token.kind == "string":
+                # Datatypes are applied by _literal_values; language tags are dropped.
+                if self.accept_symbol("^^"):
+                    if self.advance().kind not in ("iri", "pname"):
+                        raise SPARQLSyntaxError("Expected a datatype IRI after '^^'")
+                elif self.at_kind("langtag"):
+                    self.pos += 1
+            return literal
+        raise SPARQLSyntaxError(f"Unexpected term {token.value!r}")
+
+    def expand(self, pname: str) -> str:
+        prefix, _, local = pname.partition(":")
+        if prefix not in self.prefixes:
+            raise SPARQLSyntaxError(f"Undeclared prefix: {prefix}")
+        return self.prefixes[prefix] + local
+
+    # FILTER expressions
+
+    def parse_expr(self) -> tuple:
+        expr = self.parse_and()
+        while self.accept_symbol("||"):
+            expr = ("or", expr, self.parse_and())
+        return expr
+
+    def parse_and(self) -> tuple:
+        expr = self.parse_unary()
+        while self.accept_symbol("&&"):
+            expr = ("and", expr, self.parse_unary())
+        return expr
+
+    def parse_unary(self) -> tuple:
+        if self.accept_symbol("!"):
+            return ("not", self.parse_unary())
+        left = self.parse_primary()
+        token = self.peek()
+        if token is not None and token.kind == "symbol" and token.value in ("=", "!=", "<", ">", "<=", ">="):
+            self.pos += 1
+            return ("cmp", token.value, left, self.parse_primary())
+        return left
+
+    def parse_primary(self) -> tuple:
+        if self.accept_symbol("("):
+            expr = self.parse_expr()
+            self.expect_symbol(")")
+            return expr
+        token = self.peek()
+        if token is not None and token.kind == "word" and token.value.upper() in (
+            "CONTAINS", "STRSTARTS", "STRENDS", "BOUND"
+        ):
+            name = self.advance().value.upper()
+            self.expect_symbol("(")
+            args = [self.parse_expr()]
+            while self.accept_symbol(","):
+                args.append(self.parse_expr())
+            self.expect_symbol(")")
+            return ("call", name, tuple(args))
+        term = self.parse_term()
+        if isinstance(term, Var):
+            return ("var", term.name)
+        if isinstance(term, Literal):
+            return ("lit", term.slot)
+        return ("iri", term.value)
+
+def _local_name(iri: str) -> str:
+    for separator in ("#", "/", ":"):
+        if separator in iri:
+            iri = iri.rsplit(separator, 1)[1]
+    return iri
+
+def _cypher_name(name: str) -> str:
+    return name if _IDENTIFIER.match(name) else "`" + name.replace("`", "``") + "`"
+
+def _gremlin_string(value: str) -> str:
+    return "'" + value.replace("\\", "\\\\").replace("'", "\\'") + "'"
+
+class _GraphShape:
+    """Classifies the triples of a BGP onto nodes, labels, properties and edges."""
+
+    def __init__(self, query: SelectQuery, iri_property: str):
+        self.iri_property = iri_property
+        self.labels: Dict[str, List[str]] = {}
+        self.node_iris: Dict[str, str] = {}
+        self.properties: List[Tuple[str, str, Union[Var, Literal]]] = []  # (node, key, object)
+        self.edges: List[Tuple[str, Union[Var, IRI], str]] = []  # (start, predicate, end)
+        self.node_order: List[str] = []
+        self.iri_nodes: Dict[str, str] = {}
+
+        node_vars = set()
+        for triple in query.triples:
+            if isinstance(triple.subject, Var):
+                node_vars.add(triple.subject.name)
+            if self._is_type(triple.predicate) or isinstance(triple.predicate, Var):
+                if isinstance(triple.object, Var):
+                    node_vars.add(triple.object.name)
+
+        for triple in query.triples:
+            subject = self.node(triple.subject)
+            predicate, obj = triple.predicate, triple.object
+            if self._is_type(predicate):
+                if not isinstance(obj, IRI):
+                    raise SPARQLSyntaxError("rdf:type objects must be IRIs")
+                self.labels.setdefault(subject, []).append(_local_name(obj.value))
+            elif isinstance(obj, Literal) and isinstance(predicate, IRI):
+                self.properties.append((subject, _local_name(predicate.value), obj))
+            elif isinstance(obj, Var) and obj.name not in node_vars and isinstance(predicate, IRI):
+                self.properties.append((subject, _local_name(predicate.value), obj))
+            elif isinstance(obj, Literal):
+                raise SPARQLSyntaxError("Variable predicates with literal objects are unsupported")
+            else:
+                self.edges.append((subject, predicate, self.node(obj)))
+
+        # Variables bound to a property value, and the expression reading it.
+        self.value_vars: Dict[str, Tuple[str, str]] = {}
+        for node, key, obj in self.properties:
+            if isinstance(obj, Var) and obj.name not in self.value_vars:
+                self.value_vars[obj.name] = (node, key)
+        self.edge_vars = {
+            predicate.name for _, predicate, _ in self.edges if isinstance(predicate, Var)
+        }
+
+    @staticmethod
+    def _is_type(term: Term) -> bool:
+        return isinstance(term, IRI) and term.value == RDF_TYPE
+
+    def node(self, term: Term) -> str:
+        if isinstance(term, Var):
+            name = term.name
+        elif isinstance(term, IRI):
+            if term.value not in self.iri_nodes:
+                self.iri_nodes[term.value] = f"_n{len(self.iri_nodes)}"
+                self.node_iris[self.iri_nodes[term.value]] = term.value
+            name = self.iri_nodes[term.value]
+        else:
+            raise SPARQLSyntaxError("Literals can't be used as subjects")
+        if name not in self.node_order:
+            self.node_order.append(name)
+        return name
+
+    def all_vars(self) -> List[str]:
+        names = [name for name in self.node_order if not name.startswith("_n")]
+        for _, predicate, _ in self.edges:
+            if isinstance(predicate, Var) and predicate.name not in names:
+                names.append(predicate.name)
+        for name in self.value_vars:
+            if name not in names:
+                names.append(name)
+        return names
+
+class _CypherEmitter:
+    """Emits parameterized Cypher for a parsed query."""
+
+    def __init__(self, query: SelectQuery, shape: _GraphShape):
+        self.query = query
+        self.shape = shape
+        self.slots: Dict[str, int] = {}
+        self.constants: Dict[str, Any] = {}
+
+    def literal(self, literal: Literal) -> str:
+        name = f"p{literal.slot}"
+        self.slots[name] = literal.slot
+        return f"${name}"
+
+    def constant(self, value: Any) -> str:
+        name = f"c{len(self.constants)}"
+        self.constants[name] = value
+        return f"${name}"
+
+    def emit(self) -> CompiledTemplate:
+        shape = self.shape
+        inline: Dict[str, List[str]] = {}
+        conditions: List[str] = []
+        for node, iri in shape.node_iris.items():
+            inline.setdefault(node, []).append(
+                f"{_cypher_name(shape.iri_property)}: {self.constant(iri)}"
+            )
+        for node, key, obj in shape.properties:
+            if isinstance(obj, Literal):
+                inline.setdefault(node, []).append(f"{_cypher_name(key)}: {self.literal(obj)}")
+            else:
+                source_node, source_key = shape.value_vars[obj.name]
+                expr = f"{node}.{_cypher_name(key)}"
+                if (source_node, source_key) == (node, key):
+                    conditions.append(f"{expr} IS NOT NULL")
+                else:
+                    conditions.append(f"{expr} = {source_node}.{_cypher_name(source_key)}")
+
+        def node_pattern(name: str, first_use: bool) -> str:
+            if not first_use:
+                return f"({name})"
+            labels = "".join(f":{_cypher_name(label)}" for label in shape.labels.get(name, []))
+            props = inline.get(name)
+            body = f"{name}{labels}"
+            if props:
+                body += " {" + ", ".join(props) + "}"
+            return f"({body})"
+
+        seen = set()
+        parts = []
+        for start, predicate, end in shape.edges:
+            left = node_pattern(start, start not in seen)
+            seen.add(start)
+            right = node_pattern(end, end not in seen)
+            seen.add(end)
+            if isinstance(predicate, Var):
+                rel = f"[{predicate.name}]"
+            else:
+                rel = f"[:{_cypher_name(_local_name(predicate.value))}]"
+            parts.append(f"{left}-{rel}->{right}")
+        for name in shape.node_order:
+            if name not in seen:
+                parts.append(node_pattern(name, True))
+                seen.add(name)
+
+        text = "MATCH " + ", ".join(parts)
+        for condition in self.query.filters:
+            conditions.append(self.expr(condition))
+        if conditions:
+            text += " WHERE " + " AND ".join(conditions)
+
+        variables = self.query.variables or shape.all_vars()
+        items = [self.projection(name) for name in variables]
+        text += " RETURN " + ("DISTINCT " if self.query.distinct else "") + ", ".join(items)
+        if self.query.order:
+            keys = [
+                self.expr(expr) + (" DESC" if descending else "")
+                for expr, descending in self.query.order
+            ]
+            text += " ORDER BY " + ", ".join(keys)
+        if self.query.offset is not None:
+            text += f" SKIP {self.literal(self.query.offset)}"
+        if self.query.limit is not None:
+            text += f" LIMIT {self.literal(self.query.limit)}"
+        return CompiledTemplate(text, self.slots, self.constants)
+
+    def var_expr(self, name: str) -> str:
+        shape = self.shape
+        if name in shape.value_vars:
+            node, key = shape.value_vars[name]
+            return f"{node}.{_cypher_name(key)}"
+        if name in shape.edge_vars:
+            return f"type({name})"
+        if name in shape.node_order:
+            return name
+        raise SPARQLSyntaxError(f"Unbound variable: ?{name}")
+
+    def projection(self, name: str) -> str:
+        expr = self.var_expr(name)
+        return name if expr == name else f"{expr} AS {name}"
+
+    def expr(self, expr: tuple) -> str:
+        kind = expr[0]
+        if kind == "var":
+            return self.var_expr(expr[1])
+        if kind == "lit":
+            return self.literal(Literal(expr[1]))
+        if kind == "iri":
+            return self.constant(expr[1])
+        if kind == "and":
+            return f"({self.expr(expr[1])} AND {self.expr(expr[2])})"
+        if kind == "or":
+            return f"({self.expr(expr[1])} OR {self.expr(expr[2])})"
+        if kind == "not":
+            return f"NOT ({self.expr(expr[1])})"
+        if kind == "cmp":
+            op = "<>" if expr[1] == "!=" else expr[1]
+            return f"{self.expr(expr[2])} {op} {self.expr(expr[3])}"
+        if kind == "call":
+            name, args = expr[1], [self.expr(arg) for arg in expr[2]]
+            if name == "BOUND":
+                return f"{args[0]} IS NOT NULL"
+            op = {"CONTAINS": "CONTAINS", "STRSTARTS": "STARTS WITH", "STRENDS": "ENDS WITH"}[name]
+            return f"{args[0]} {op} {args[1]}"
+        raise SPARQLSyntaxError(f"Unsupported FILTER expression: {kind}")
+
+class _GremlinEmitter(_CypherEmitter):
+    """Emits a parameterized Gremlin ``match()`` traversal for a parsed query.
+
+    Literals become script bindings. FILTERs must be conjunctions of
+    comparisons between a variable and a literal or another variable.
+    """
+
+    _PREDICATES = {"=": "eq", "!=": "neq", "<": "lt", ">": "gt", "<=": "lte", ">=": "gte"}
+
+    def literal(self, literal: Literal) -> str:
+        name = f"p{literal.slot}"
+        self.slots[name] = literal.slot
+        return name
+
+    def constant(self, value: Any) -> str:
+        name = f"c{len(self.constants)}"
+        self.constants[name] = value
+        return name
+
+    def emit(self) -> CompiledTemplate:
+        shape = self.shape
+        steps = []
+        for name in shape.node_order:
+            for label in shape.labels.get(name, []):
+                steps.append(f"__.as('{name}').hasLabel({_gremlin_string(label)})")
+        for name, iri in shape.node_iris.items():
+            steps.append(
+                f"__.as('{name}').has({_gremlin_string(shape.iri_property)}, {self.constant(iri)})"
+            )
+        for node, key, obj in shape.properties:
+            if isinstance(obj, Literal):
+                steps.append(f"__.as('{node}').has({_gremlin_string(key)}, {self.literal(obj)})")
+            else:
+                steps.append(f"__.as('{node}').values({_gremlin_string(key)}).as('{obj.name}')")
+        for start, predicate, end in shape.edges:
+            if isinstance(predicate, Var):
+                steps.append(f"__.as('{start}').outE().as('{predicate.name}').inV().as('{end}')")
+            else:
+                label = _gremlin_string(_local_name(predicate.value))
+                steps.append(f"__.as('{start}').out({label}).as('{end}')")
+        for expr in self.query.filters:
+            steps.extend(self.filter_steps(expr))
+        if not steps:
+            steps.append(f"__.as('{shape.node_order[0]}')")
+
+        text = "g.V().match(" + ", ".join(steps) + ")"
+        if self.query.order:
+            raise SPARQLSyntaxError("ORDER BY is not supported for Gremlin")
+        variables = self.query.variables or shape.all_vars()
+        for name in variables:
+            if name not in shape.node_order and name not in shape.value_vars and name not in shape.edge_vars:
+                raise SPARQLSyntaxError(f"Unbound variable: ?{name}")
+        selected = ", ".join(f"'{name}'" for name in variables)
+        text += f".select({selected})"
+        modulators = []
+        for name in variables:
+            if name in shape.edge_vars:
+                modulators.append(".by(__.label())")
+            elif name in shape.value_vars:
+                modulators.append(".by()")
+            else:
+                modulators.append(".by(__.valueMap(true))")
+        if len(variables) > 1:
+            text += "".join(modulators)
+        elif modulators[0] != ".by()":
+            text += modulators[0].replace(".by(", ".map(", 1)
+        if self.query.distinct:
+            text += ".dedup()"
+        if self.query.offset is not None:
+            text += f".skip({self.literal(self.query.offset)})"
+        if self.query.limit is not None:
+            text += f".limit({self.literal(self.query.limit)})"
+        return CompiledTemplate(text, self.slots, self.constants)
+
+    def filter_steps(self, expr: tuple) -> List[str]:
+        if expr[0] == "and":
+            return self.filter_steps(expr[1]) + self.filter_steps(expr[2])
+        if expr[0] != "cmp":
+            raise SPARQLSyntaxError("Gremlin FILTERs must be conjunctions of comparisons")
+        op, left, right = expr[1], expr[2], expr[3]
+        if left[0] != "var":
+            left, right = right, left
+            op = {"<": ">", ">": "<", "<=": ">=", ">=": "<="}.get(op, op)
+        if left[0] != "var":
+            raise SPARQLSyntaxError("FILTER comparisons need a variable")
+        predicate = self._PREDICATES[op]
+        if right[0] == "var":
+            return [f"__.as('{left[1]}').where({predicate}('{right[1]}'))"]
+        value = self.literal(Literal(right[1])) if right[0] == "lit" else self.constant(right[1])
+        return [f"__.as('{left[1]}').is({predicate}({value}))"]
 
 class QueryTranslator:
     """Translates SPARQL queries to Cypher/Gremlin."""
-    
-    def translate(self, sparql_query: str, target_language: str) -> Optional[str]:
+
+    def __init__(self, cache_size: int = 256, iri_property: str = "uri"):
+        """Initialize the translator.
+
+        Args:
+            cache_size: Maximum number of compiled templates to keep
+            iri_property: Node property holding an IRI-identified node's IRI
+        """
+        self.cache_size = cache_size
+        self.iri_property = iri_property
+        self._templates: "OrderedDict[tuple, CompiledTemplate]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def compile(self, sparql_query: str, target_language: str) -> GraphQuery:
+        """Compile a SPARQL query into a parameterized graph query.
+
+        Args:
+            sparql_query: The SPARQL query to translate.
+            target_language: The target query language ('cypher' or 'gremlin').
+
+        Returns:
+            Query text with every literal lifted into its parameters.
+
+        Raises:
+            SPARQLSyntaxError: If the query is outside the supported subset.
+            ValueError: If the target language is unsupported.
+        """
+        if not self.supports(target_language):
+            raise ValueError(f"Unsupported target language: {target_language}")
+        tokens = _tokenize(sparql_query)
+        shape = (target_language,) + tuple(
+            (token.kind, None) if _is_literal(token) else token for token in tokens
+        )
+        template = self._templates.get(shape)
+        if template is None:
+            self.misses += 1
+            template = self._compile(tokens, target_language)
+            self._templates[shape] = template
+            while len(self._templates) > self.cache_size:
+                self._templates.popitem(last=False)
+        else:
+            self.hits += 1
+            self._templates.move_to_end(shape)
+
+        values = _literal_values(tokens) if template.slots else []
+        parameters = dict(template.constants)
+        for name, slot in template.slots.items():
+            parameters[name] = values[slot]
+        return GraphQuery(query=template.query, parameters=parameters or None)
+
+    @staticmethod
+    def supports(target_language: str) -> bool:
+        """Return whether SPARQL can be compiled to ``target_language``."""
+        return target_language in TARGET_LANGUAGES
+
+    def _compile(self, tokens: List[_Token], target_language: str) -> CompiledTemplate:
+        parsed = _Parser(tokens).parse()
+        shape = _GraphShape(parsed, self.iri_property)
+        if target_language == "cypher":
+            return _CypherEmitter(parsed, shape).emit()
+        return _GremlinEmitter(parsed, shape).emit()
+
+    def cache_stats(self) -> Dict[str, int]:
+        """Return compiled-template cache counters."""
+        return {"size": len(self._templates), "hits": self.hits, "misses": self.misses}
+
+    def translate(self, sparql_query: str, target_language: str) -> Optional[GraphQuery]:
         """Translate a SPARQL query to the target language.
-        
+
+        Like ``compile``, but returns None instead of raising.
+
         Args:
             sparql_query: The SPARQL query to translate.
             target_language: The target query language ('cypher' or 'gremlin').
-        
+
         Returns:
-            The translated query or None if translation is not possible.
+            The translated query and its parameters, or None if the query
+            or target language isn't supported.
         """
-        if target_language == 'cypher':
-            return self.translate_to_cypher(sparql_query)
-        elif target_language == 'gremlin':
-            return self.translate_to_gremlin(sparql_query)
-        return None
-    
-    def translate_to_cypher(self, sparql_query: str) -> str:
-        """Translate SPARQL to Cypher."""
-        # Basic translation logic for SELECT and WHERE
-        if "SELECT" in sparql_query and "WHERE" in sparql_query:
-            # Extract the variable and pattern
-            variable = sparql_query.split("SELECT")[1].split("WHERE")[0].strip()
-            pattern = sparql_query.split("WHERE")[1].strip().strip("{}")
-            # Translate to Cypher
-            return f"MATCH {pattern} RETURN {variable}"
-        return "MATCH (n) RETURN n"
-    
-    def translate_to_gremlin(self, sparql_query: str) -> str:
-        """Translate SPARQL to Gremlin."""
-        # Basic translation logic for SELECT and WHERE
-        if "SELECT" in sparql_query and "WHERE" in sparql_query:
-            # Extract the variable and pattern
-            variable = sparql_query.split("SELECT")[1].split("WHERE")[0].strip()
-            pattern = sparql_query.split("WHERE")[1].strip().strip("{}")
-            # Translate to Gremlin
-            return f"g.V().has('{pattern}').values('{variable}')"
-        return "g.V()" 
\ No newline at end of file
+        if not self.supports(target_language):
+            return None
+        try:
+            return self.compile(sparql_query, target_language)
+        except SPARQLSyntaxError:
+            return None
+
+    def translate_to_cypher(self, sparql_query: str) -> GraphQuery:
+        """Translate SPARQL to parameterized Cypher; see ``compile``."""
+        return self.compile(sparql_query, "cypher")
+
+    def translate_to_gremlin(self, sparql_query: str) -> GraphQuery:
+        """Translate SPARQL to parameterized Gremlin; see ``compile``."""
+        return self.compile(sparql_query, "gremlin")
@@ -0,0 +1,260 @@
+"""
+Process-wide registry of shared graph database adapters.
+"""
+import asyncio
+from concurrent.futures import Future
+import hashlib
+import json
+import logging
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from .adapter import GraphDBAdapter
+from .adapter_factory import create_adapter
+
+logger = logging.getLogger(__name__)
+
+class AdapterRegistry:
+    """Shares one adapter, and so one connection pool, per database config.
+
+    Agents that ask for the same ``db_type`` and settings get the same
+    adapter instance instead of each opening their own pool. Adapters are
+    reference counted and disconnected when the last user releases them.
+
+    Drivers are bound to the event loop they were created on, so a
+    ``loop_bound`` adapter used from several loops gets one connected
+    instance per loop: the registered instance serves the first loop and
+    copies built from the same settings serve the others. Instances whose
+    loop has closed are disconnected on the next ``connect``.
+    """
+
+    def __init__(self):
+        """Initialize an empty registry."""
+        self._adapters: Dict[str, GraphDBAdapter] = {}
+        self._configs: Dict[str, Tuple[str, Dict[str, Any]]] = {}
+        self._refs: Dict[str, int] = {}
+        self._keys: Dict[int, str] = {}
+        # Connected instance per (key, loop); the loop is None for adapters
+        # that aren't loop bound. The future resolves once connected.
+        self._bound: Dict[Tuple[str, Optional[asyncio.AbstractEventLoop]], GraphDBAdapter] = {}
+        self._connecting: Dict[Tuple[str, Optional[asyncio.AbstractEventLoop]], Future] = {}
+        self._mutex = threading.Lock()
+
+    @staticmethod
+    def _make_key(db_type: str, kwargs: Dict[str, Any]) -> str:
+        # Hash the settings so credentials never show up in keys or stats.
+        config = json.dumps(kwargs, sort_keys=True, default=repr)
+        digest = hashlib.sha256(config.encode("utf-8")).hexdigest()[:16]
+        return f"{db_type}:{digest}"
+
+    def get(self, db_type: str, **kwargs) -> GraphDBAdapter:
+        """Return the shared adapter for a configuration, creating it if needed.
+
+        Args:
+            db_type: The type of the database ('neo4j', 'arangodb', 'neptune')
+            **kwargs: Arguments for ``create_adapter``
+
+        Returns:
+            Shared adapter instance. Call ``connect`` before use, run
+            queries on the adapter it returns and ``release`` when done.
+        """
+        key = self._make_key(db_type, kwargs)
+        with self._mutex:
+            adapter = self._adapters.get(key)
+            if adapter is None:
+                adapter = create_adapter(db_type, **kwargs)
+                self._adapters[key] = adapter
+                self._configs[key] = (db_type, kwargs)
+                self._keys[id(adapter)] = key
+                self._refs[key] = 0
+                logger.info(f"Registered shared {db_type} adapter")
+            self._refs[key] += 1
+        return adapter
+
+    async def connect(self, adapter: GraphDBAdapter) -> GraphDBAdapter:
+        """Connect a shared adapter once per event loop.
+
+        Concurrent callers wait for the first connection attempt instead of
+        opening their own.
+
+        Args:
+            adapter: Adapter returned by ``get``
+
+        Returns:
+            The connected instance to use on the running loop
+        """
+        loop = asyncio.get_running_loop()
+        with self._mutex:
+            key = self._keys.get(id(adapter))
+            if key is None:
+                raise ValueError("Adapter is not registered; get it from the registry again")
+            slot = (key, loop if adapter.loop_bound else None)
+            connected = self._bound.get(slot)
+            if connected is not None and slot not in self._connecting:
+                return connected
+            pending = self._connecting.get(slot)
+            if pending is None:
+                stale = self._pop_stale(key)
+                in_use = {id(bound) for (bound_key, _), bound in self._bound.items() if bound_key == key}
+                if id(adapter) in in_use:
+                    db_type, kwargs = self._configs[key]
+                    instance = create_adapter(db_type, **kwargs)
+                else:
+                    instance = adapter
+                self._bound[slot] = instance
+                future: Future = Future()
+                self._connecting[slot] = future
+        if pending is not None:
+            return await asyncio.wrap_future(pending)
+        for old_loop, old in stale:
+            await self._disconnect(old, old_loop)
+        try:
+            await instance.connect()
+        except BaseException as e:
+            with self._mutex:
+                if self._connecting.get(slot) is future:
+                    self._bound.pop(slot, None)
+                    del self._connecting[slot]
+            if not future.done():
+                future.set_exception(e)
+            raise
+        with self._mutex:
+            released = self._connecting.get(slot) is not future
+            if not released:
+                del self._connecting[slot]
+        if released:
+            # Waiters already got the error from ``release``.
+            await self._disconnect(instance, slot[1])
+            raise RuntimeError("Adapter was released while connecting")
+        future.set_result(instance)
+        return instance
+
+    async def release_loop(self) -> None:
+        """Disconnect every instance bound to the running loop.
+
+        Call before closing a loop that used shared adapters.
+        """
+        loop = asyncio.get_running_loop()
+        with self._mutex:
+            slots = [slot for slot in self._bound if slot[1] is loop and slot not in self._connecting]
+            instances = [self._bound.pop(slot) for slot in slots]
+        for instance in instances:
+            await self._disconnect(instance, loop)
+
+    async def release(self, adapter: GraphDBAdapter) -> None:
+        """Drop a reference, disconnecting the adapter when it was the last.
+
+        Args:
+            adapter: Adapter returned by ``get``
+        """
+        with self._mutex:
+            key = self._keys.get(id(adapter))
+            if key is None:
+                return
+            self._refs[key] -= 1
+            if self._refs[key] > 0:
+                return
+            # Forgotten in the same critical section, so a concurrent
+            # ``get`` registers a new adapter instead of reusing this one.
+            bound, connecting = self._forget(key)
+        await self._close(bound, connecting)
+
+    async def close_all(self) -> None:
+        """Disconnect and forget every shared adapter."""
+        with self._mutex:
+            forgotten = [self._forget(key) for key in list(self._adapters)]
+        for bound, connecting in forgotten:
+            await self._close(bound, connecting)
+
+    def _pop_stale(self, key: str) -> List[Tuple[asyncio.AbstractEventLoop, GraphDBAdapter]]:
+        """Forget instances of ``key`` whose loop has closed; call under the mutex."""
+        stale = []
+        for slot in list(self._bound):
+            bound_key, loop = slot
+            if bound_key == key and loop is not None and loop.is_closed():
+                stale.append((loop, self._bound.pop(slot)))
+        return stale
+
+    async def _disconnect(
+        self,
+        instance: GraphDBAdapter,
+        loop: Optional[asyncio.AbstractEventLoop]
+    ) -> None:
+        """Disconnect an instance, on its own loop if that loop is running elsewhere."""
+        try:
+            if loop is not None and loop.is_running() and loop is not asyncio.get_running_loop():
+                await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(instance.disconnect(), loop))
+            else:
+                await instance.disconnect()
+        except Exception as e:
+            logger.warning(f"Failed to disconnect {type(instance).__name__}: {e!r}")
+
+    def _forget(
+        self,
+        key: str
+    ) -> Tuple[List[Tuple[Optional[asyncio.AbstractEventLoop], GraphDBAdapter]], List[Future]]:
+        """Forget an adapter and its instances; call under the mutex.
+
+        Returns:
+            The instances with their loops, and the futures of connections
+            still in progress
+        """
+        adapter = self._adapters.pop(key)
+        self._configs.pop(key, None)
+        self._keys.pop(id(adapter), None)
+        self._refs.pop(key, None)
+        slots = [slot for slot in self._bound if slot[0] == key]
+        connecting = [self._connecting.pop(slot) for slot in slots if slot in self._connecting]
+        # Instances still connecting are disconnected by their owner.
+        bound = [(slot[1], self._bound.pop(slot)) for slot in slots]
+        return bound, connecting
+
+    async def _close(
+        self,
+        bound: List[Tuple[Optional[asyncio.AbstractEventLoop], GraphDBAdapter]],
+        connecting: List[Future]
+    ) -> None:
+        for future in connecting:
+            if not future.done():
+                future.set_exception(RuntimeError("Adapter was released while connecting"))
+        for loop, instance in bound:
+            await self._disconnect(instance, loop)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Return pool statistics for every shared adapter.
+
+        Returns:
+            Mapping of adapter configuration key to reference count, number
+            of connected instances and each instance's pool statistics
+        """
+        with self._mutex:
+            instances = {
+                key: [
+                    instance for slot, instance in self._bound.items()
+                    if slot[0] == key and slot not in self._connecting
+                ]
+                for key in self._adapters
+            }
+            refs = dict(self._refs)
+        return {
+            key: {
+                "refs": refs[key],
+                "instances": len(bound),
+                "pools": [instance.pool_stats() for instance in bound],
+            }
+            for key, bound in instances.items()
+        }
+
+registry = AdapterRegistry()
+
+def get_shared_adapter(db_type: str, **kwargs) -> GraphDBAdapter:
+    """Return the process-wide shared adapter for a configuration.
+
+    Args:
+        db_type: The type of the database ('neo4j', 'arangodb', 'neptune')
+        **kwargs: Arguments for ``create_adapter``
+
+    Returns:
+        Shared adapter instance
+    """
+    return registry.get(db_type, **kwargs)
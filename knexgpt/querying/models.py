@@ -0,0 +1,114 @@
+"""
+Lazily loaded Hugging Face pipelines.
+"""
+import logging
+import threading
+import time
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+class LazyPipeline:
+    """A ``transformers.pipeline`` built on first use, exactly once.
+
+    ``transformers`` (and ``torch``) are only imported when the pipeline is
+    first needed, so importing a module that holds one stays cheap. Calls
+    from several threads while the model loads wait for the same load. A
+    failed load is re-raised to callers until ``retry_delay`` seconds have
+    passed, then retried; the delay doubles with each consecutive failure,
+    up to ``max_retry_delay``.
+    """
+
+    def __init__(
+        self,
+        task: str,
+        model: str,
+        retry_delay: float = 5.0,
+        max_retry_delay: float = 300.0,
+        **kwargs
+    ):
+        """Describe the pipeline to build.
+
+        Args:
+            task: Pipeline task, e.g. 'text-generation'
+            model: Model name or path
+            retry_delay: Seconds before a failed load is retried
+            max_retry_delay: Longest delay between retries
+            **kwargs: Other ``transformers.pipeline`` arguments
+        """
+        self.task = task
+        self.model = model
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self.kwargs = kwargs
+        self._pipeline = None
+        self._error: Optional[BaseException] = None
+        self._retry_at = 0.0
+        self._lock = threading.Lock()
+        self._loading = False
+        self.failures = 0
+        self.load_seconds: Optional[float] = None
+
+    @property
+    def state(self) -> str:
+        """'not_loaded', 'loading', 'ready' or 'failed'."""
+        if self._pipeline is not None:
+            return "ready"
+        if self._loading:
+            return "loading"
+        return "failed" if self._error is not None else "not_loaded"
+
+    def retry_in(self) -> float:
+        """Seconds until a failed load may be retried; 0 if it may now."""
+        if self._error is None:
+            return 0.0
+        return max(0.0, self._retry_at - time.monotonic())
+
+    def status(self) -> Dict[str, Any]:
+        """Return the load state, load time and error for health checks."""
+        status: Dict[str, Any] = {"model": self.model, "state": self.state}
+        if self.load_seconds is not None:
+            status["load_seconds"] = round(self.load_seconds, 3)
+        if self._error is not None:
+            status["error"] = repr(self._error)
+            status["failures"] = self.failures
+            status["retry_in"] = round(self.retry_in(), 1)
+        return status
+
+    def load(self):
+        """Build the pipeline if needed and return it.
+
+        Raises:
+            Exception: Whatever building the pipeline raised
+        """
+        if self._pipeline is not None:
+            return self._pipeline
+        with self._lock:
+            if self._pipeline is None and self.retry_in() == 0:
+                self._loading = True
+                start = time.perf_counter()
+                try:
+                    from transformers import pipeline
+                    self._pipeline = pipeline(self.task, model=self.model, **self.kwargs)
+                    self._error = None
+                    self.failures = 0
+                except Exception as e:
+                    self._error = e
+                    self.failures += 1
+                    delay = min(self.retry_delay * 2 ** (self.failures - 1), self.max_retry_delay)
+                    self._retry_at = time.monotonic() + delay
+                    logger.error(
+                        f"Error loading model {self.model} (attempt {self.failures}), "
+                        f"retrying in {delay:.0f}s: {e!r}"
+                    )
+                finally:
+                    self._loading = False
+                    self.load_seconds = time.perf_counter() - start
+                if self._pipeline is not None:
+                    logger.info(f"Loaded model {self.model} in {self.load_seconds:.1f}s")
+            if self._pipeline is None:
+                raise self._error
+            return self._pipeline
+
+    def __call__(self, *args, **kwargs):
+        return self.load()(*args, **kwargs)
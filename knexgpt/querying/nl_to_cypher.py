@@ -1,10 +1,15 @@
-from transformers import pipeline
+from .models import LazyPipeline
 
 class NLToCypher:
     """Class for translating natural language to Cypher."""
     
     def __init__(self):
-        self.translator = pipeline('translation', model='Helsinki-NLP/opus-mt-en-cy')
+        # Loaded on first use, or by load().
+        self.translator = LazyPipeline('translation', model='Helsinki-NLP/opus-mt-en-cy')
+    
+    def load(self) -> None:
+        """Load the model now rather than on first use."""
+        self.translator.load()
     
     def translate(self, nl_query: str) -> str:
         """Translate a natural language query to Cypher.
@@ -1,10 +1,15 @@
-from transformers import pipeline
+from .models import LazyPipeline
 
 class RAG:
     """Class for Retrieval-Augmented Generation."""
     
     def __init__(self):
-        self.generator = pipeline('text-generation', model='gpt-2')
+        # Loaded on first use, or by load().
+        self.generator = LazyPipeline('text-generation', model='gpt-2')
+    
+    def load(self) -> None:
+        """Load the model now rather than on first use."""
+        self.generator.load()
     
     def generate_response(self, context: str, query: str) -> str:
         """Generate a response using RAG.
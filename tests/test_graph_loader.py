@@ -0,0 +1,43 @@
+import asyncio
+
+import pytest
+
+from knexgpt.db.adapter import GraphQuery
+from knexgpt.db.graph_loader import GraphLoader, RecordMapping
+from knexgpt.db.memory_adapter import InMemoryGraphAdapter
+
+class FlakyAdapter(InMemoryGraphAdapter):
+    def __init__(self, failures):
+        super().__init__()
+        self.failures = failures
+
+    async def execute_query(self, query):
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("connection reset")
+        return await super().execute_query(query)
+
+PERSON = RecordMapping("Person", "id", relationships={"knows": ("KNOWS", "Person")})
+
+def test_failed_flush_restages_rows():
+    async def run():
+        adapter = FlakyAdapter(failures=1)
+        await adapter.connect()
+        loader = GraphLoader(adapter, {"Person": PERSON}, max_retries=0)
+        await loader.load([{"id": 1, "name": "Ada", "knows": [2]}, {"id": 2, "name": "Grace"}])
+        with pytest.raises(ConnectionError):
+            await loader.flush()
+        assert loader.nodes_written == 0
+        assert loader.relationships_written == 0
+
+        # Reloading the same records must not be skipped as duplicates.
+        await loader.load([{"id": 1, "name": "Ada", "knows": [2]}])
+        report = await loader.close()
+        assert report["nodes_written"] == 2
+        assert report["relationships_written"] == 1
+        result = await adapter.execute_query(GraphQuery(
+            query="MATCH (a:Person)-[:KNOWS]->(b:Person) RETURN a.name AS a, b.name AS b"
+        ))
+        return result.data
+
+    assert asyncio.run(run()) == [{"a": "Ada", "b": "Grace"}]
@@ -0,0 +1,97 @@
+import asyncio
+import json
+
+import pytest
+
+from knexgpt.agents.data_enrichment import DataEnrichmentAgent
+from knexgpt.agents.data_extraction import DataExtractionAgent
+from knexgpt.communication.message_queue import pipeline_mode
+from knexgpt.db.adapter import GraphQuery
+from knexgpt.db.graph_loader import ENTITY_ID_PROPERTY, RecordMapping
+from knexgpt.db.registry import registry
+
+class Capture:
+    def __init__(self):
+        self.messages = []
+
+    def send_message(self, message):
+        self.messages.append(message)
+
+PERSON = RecordMapping("Person", "id", relationships={"knows": ("KNOWS", "Person")})
+
+@pytest.fixture
+def agent(tmp_path):
+    # A config of its own, so the shared adapter starts empty.
+    db_config = {"snapshot_path": str(tmp_path / "graph.json")}
+    with pipeline_mode("fused"):
+        agent = DataExtractionAgent("memory", db_config)
+        agent.enricher = DataEnrichmentAgent("memory", db_config, {"Person": PERSON})
+    agent.mq_client = Capture()
+    agent.enricher.mq_client = Capture()
+    yield agent
+    agent.enricher.stop_loop()
+    agent.run_coroutine(registry.release(agent.adapter))
+
+def ingest(agent, tmp_path, key_field="id"):
+    stats = agent.ingest(
+        str(tmp_path / "data" / "*.json"),
+        workers=1,
+        index=str(tmp_path / "index.db"),
+        key_field=key_field
+    )
+    messages, agent.mq_client.messages = agent.mq_client.messages, []
+    for message in messages:
+        agent.enricher.handle_message(message)
+    return stats
+
+def people(agent):
+    result = agent.run_coroutine(agent._execute(GraphQuery(
+        query=f"MATCH (n:Person) RETURN n.id AS id, n.{ENTITY_ID_PROPERTY} AS entity_id ORDER BY id"
+    )))
+    return [(row["id"], row["entity_id"]) for row in result.data]
+
+def write(path, records):
+    path.write_text(json.dumps(records))
+
+@pytest.mark.parametrize("streamed", [False, True])
+def test_reingest_retracts_removed_records(agent, tmp_path, streamed):
+    if streamed:
+        agent.stream_threshold = 0
+        agent.batch_size = 1
+    data = tmp_path / "data"
+    data.mkdir()
+    people_file = data / "people.json"
+    write(people_file, [{"id": 1, "name": "Ada"}, {"id": 2, "name": "Alan"}, {"id": 3, "name": "Grace"}])
+    write(data / "other.json", [{"id": 10, "name": "Edsger"}])
+
+    stats = ingest(agent, tmp_path)
+    assert stats["sent"] == 2
+    assert people(agent) == [
+        (1, f"{people_file}#1"),
+        (2, f"{people_file}#2"),
+        (3, f"{people_file}#3"),
+        (10, f"{data / 'other.json'}#10"),
+    ]
+
+    write(people_file, [{"id": 1, "name": "Ada"}, {"id": 3, "name": "Grace Hopper"}])
+    (data / "other.json").unlink()
+
+    stats = ingest(agent, tmp_path)
+    assert stats["retracted"] == 2
+    assert people(agent) == [(1, f"{people_file}#1"), (3, f"{people_file}#3")]
+
+def test_reingest_without_key_field_keeps_edited_nodes(agent, tmp_path):
+    data = tmp_path / "data"
+    data.mkdir()
+    people_file = data / "people.json"
+    write(people_file, [{"id": 1, "name": "Ada", "knows": [3]}, {"id": 3, "name": "Grace"}])
+    ingest(agent, tmp_path, key_field=None)
+
+    # Grace gets a new content-hash id; her node must not be deleted.
+    write(people_file, [{"id": 1, "name": "Ada", "knows": [3]}, {"id": 3, "name": "Grace Hopper"}])
+    stats = ingest(agent, tmp_path, key_field=None)
+    assert stats["retracted"] == 0
+    result = agent.run_coroutine(agent._execute(GraphQuery(
+        query="MATCH (a:Person)-[:KNOWS]->(b:Person) RETURN a.name AS a, b.name AS b"
+    )))
+    assert result.data == [{"a": "Ada", "b": "Grace Hopper"}]
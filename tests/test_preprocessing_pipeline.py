@@ -0,0 +1,20 @@
+import pytest
+
+from knexgpt.data_processing.preprocessing_pipeline import PreprocessingPipeline, RemoveStopwords
+
+@pytest.mark.parametrize("text, expected", [
+    ("the cat is fine the", "cat fine"),
+    ("cat the the", "cat"),
+    ("the the", ""),
+    ("theory is the best", "theory best"),
+])
+def test_remove_stopwords(text, expected):
+    stage = RemoveStopwords(["the", "is"])
+    assert stage.process({"text": text}) == {"text": expected}
+
+def test_parallel_stage_matches_serial():
+    records = [{"text": f"the record {n} is the"} for n in range(40)]
+    serial = PreprocessingPipeline([RemoveStopwords(["the", "is"])]).process_batch(records)
+    with PreprocessingPipeline([RemoveStopwords(["the", "is"])], processes=2, min_parallel=10) as pipeline:
+        assert pipeline.process_batch(records) == serial
+    assert serial[3] == {"text": "record 3"}
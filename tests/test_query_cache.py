@@ -0,0 +1,106 @@
+import asyncio
+
+import pytest
+
+from knexgpt.db.adapter import GraphDBAdapter, GraphQuery, GraphResult, is_write_query
+from knexgpt.db.query_cache import CachedGraphAdapter, query_labels
+
+WRITES = [
+    "CREATE (n:Person {name: $name})",
+    "MATCH (n) DETACH DELETE n",
+    "MERGE (a)-[:KNOWS]->(b) ON CREATE SET a.t = 1",
+    "FOR d IN users UPDATE d WITH {a: 1} IN users",
+    "g.V(1).drop()",
+    "CALL apoc.create.node(['Person'], {name: $n})",
+    "CALL apoc.merge.node(['Person'], {id: 1}) YIELD node RETURN node",
+    'CALL apoc.periodic.iterate("MATCH (n) RETURN n", "DETACH DELETE n", {})',
+    "call `my.proc`()",
+    "MATCH (n) CALL custom.write(n) RETURN n",
+]
+
+READS = [
+    "MATCH (n) RETURN replace(n.name, 'a', 'b')",
+    "MATCH (n:Update) RETURN n.set",
+    "MATCH (n {name: 'create'}) RETURN n",
+    "CALL db.labels()",
+    "CALL db.schema.visualization()",
+    "CALL db.index.fulltext.queryNodes('names', 'Ada') YIELD node RETURN node",
+    "CALL { MATCH (n) RETURN n } RETURN n",
+    "MATCH (n) RETURN n.recall",
+]
+
+@pytest.mark.parametrize("query", WRITES)
+def test_is_write_query_detects_writes(query):
+    assert is_write_query(query)
+
+@pytest.mark.parametrize("query", READS)
+def test_is_write_query_passes_reads(query):
+    assert not is_write_query(query)
+
+class CountingAdapter(GraphDBAdapter):
+    def __init__(self):
+        self.executed = []
+
+    async def connect(self):
+        pass
+
+    async def disconnect(self):
+        pass
+
+    async def execute_query(self, query):
+        self.executed.append(query.query)
+        return GraphResult(data=[{"n": len(self.executed)}])
+
+    async def batch_execute(self, queries, **kwargs):
+        return [await self.execute_query(query) for query in queries]
+
+def test_cached_adapter_runs_procedure_writes_every_time():
+    adapter = CountingAdapter()
+    cached = CachedGraphAdapter(adapter)
+    query = GraphQuery(query="CALL apoc.create.node(['Person'], {name: $n})", parameters={"n": "Ada"})
+
+    async def run():
+        await cached.execute_query(query)
+        await cached.execute_query(query)
+
+    asyncio.run(run())
+    assert len(adapter.executed) == 2
+
+@pytest.mark.parametrize("query, language, labels", [
+    ("MATCH (n:Person)-[:KNOWS|LIKES]->(m:Person) RETURN m", "cypher", {"Person", "KNOWS", "LIKES"}),
+    ("MATCH (n:`Big Co`:Company) RETURN n", "cypher", {"Big Co", "Company"}),
+    ("MATCH (n) WHERE n.name IN n.tags SET n.seen = true", "cypher", set()),
+    ("MATCH (a:Person)-[r]->(b:Person) DELETE r", "cypher", set()),
+    ("FOR d IN users FILTER d.age IN [1, 2] RETURN d", "aql", {"users"}),
+    ("FOR v IN 1..2 OUTBOUND 'users/1' knows RETURN v", "aql", set()),
+    ("g.V().hasLabel('Person').outE('knows')", "gremlin", {"Person", "knows"}),
+    ("g.V().hasLabel('Person').out('knows')", "gremlin", set()),
+])
+def test_query_labels(query, language, labels):
+    assert query_labels(query, language) == labels
+
+def test_unlabelled_write_clears_cache():
+    adapter = CountingAdapter()
+    cached = CachedGraphAdapter(adapter)
+    read = GraphQuery(query="MATCH (n:Person) RETURN n.name")
+
+    async def run():
+        await cached.execute_query(read)
+        await cached.execute_query(GraphQuery(query="MATCH (n) WHERE n.name IN n.tags SET n.seen = true"))
+        await cached.execute_query(read)
+
+    asyncio.run(run())
+    assert adapter.executed.count(read.query) == 2
+
+def test_cached_results_are_copies():
+    cached = CachedGraphAdapter(CountingAdapter())
+    read = GraphQuery(query="MATCH (n:Person) RETURN n.name")
+
+    async def run():
+        first = await cached.execute_query(read)
+        first.data.append({"n": "mutated"})
+        second = await cached.execute_query(read)
+        second.data.clear()
+        return await cached.execute_query(read)
+
+    assert asyncio.run(run()).data == [{"n": 1}]
@@ -0,0 +1,49 @@
+import asyncio
+
+import pytest
+
+from knexgpt.db.memory_adapter import InMemoryGraphAdapter
+from knexgpt.db.registry import AdapterRegistry
+
+def test_get_after_last_release_registers_a_new_adapter(tmp_path):
+    registry = AdapterRegistry()
+    config = {"snapshot_path": str(tmp_path / "graph.json")}
+
+    async def run():
+        adapter = registry.get("memory", **config)
+        await registry.connect(adapter)
+        await registry.release(adapter)
+        fresh = registry.get("memory", **config)
+        assert fresh is not adapter
+        assert await registry.connect(fresh) is fresh
+        with pytest.raises(ValueError):
+            await registry.connect(adapter)
+        assert registry.stats()[registry._keys[id(fresh)]]["instances"] == 1
+
+    asyncio.run(run())
+
+def test_release_fails_pending_connections(tmp_path, monkeypatch):
+    registry = AdapterRegistry()
+
+    async def run():
+        started, proceed = asyncio.Event(), asyncio.Event()
+
+        async def slow_connect(self):
+            started.set()
+            await proceed.wait()
+
+        monkeypatch.setattr(InMemoryGraphAdapter, "connect", slow_connect)
+        adapter = registry.get("memory", snapshot_path=str(tmp_path / "graph.json"))
+        owner = asyncio.ensure_future(registry.connect(adapter))
+        await started.wait()
+        waiter = asyncio.ensure_future(registry.connect(adapter))
+        await asyncio.sleep(0)
+        await registry.release(adapter)
+        with pytest.raises(RuntimeError):
+            await asyncio.wait_for(waiter, 1)
+        proceed.set()
+        with pytest.raises(RuntimeError):
+            await owner
+        assert registry.stats() == {}
+
+    asyncio.run(run())
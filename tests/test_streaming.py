@@ -0,0 +1,34 @@
+import io
+import json
+
+import pytest
+
+from knexgpt.data_processing.streaming import iter_json_array
+
+DOCUMENTS = [
+    '["' + "x" * 65529 + '", 1.5, 2]',
+    '[1.5, -2.25e+10, 3E-2, 0.125, 10, -0.0, 6.02e23]',
+    '[ 1.5 ,\n 2.75 , {"a": [1.5, 2e-3]}, "s", true, null, false, 12345.678 ]',
+    '{"not": "an array", "n": 1.5}',
+    '[]',
+]
+
+@pytest.mark.parametrize("document", DOCUMENTS, ids=range(len(DOCUMENTS)))
+@pytest.mark.parametrize("read_size", list(range(1, 24)) + [64, 1 << 16])
+def test_iter_json_array_matches_json_loads(document, read_size):
+    expected = json.loads(document)
+    if not isinstance(expected, list):
+        expected = [expected]
+    assert list(iter_json_array(io.StringIO(document), read_size)) == expected
+
+def test_iter_json_array_float_at_read_boundary():
+    # "1." falls at the end of the first 64K read.
+    document = '["' + "x" * 65529 + '", 1.5, 2]'
+    assert list(iter_json_array(io.StringIO(document)))[1:] == [1.5, 2]
+
+@pytest.mark.parametrize("read_size", [1, 3, 7, 1 << 16])
+def test_iter_json_array_rejects_malformed(read_size):
+    with pytest.raises(json.JSONDecodeError):
+        list(iter_json_array(io.StringIO("[1.5, 1.x, 2]"), read_size))
+    with pytest.raises(json.JSONDecodeError):
+        list(iter_json_array(io.StringIO("[1.5, 2"), read_size))
@@ -0,0 +1,104 @@
+import asyncio
+import itertools
+import time
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from knexgpt.data_processing.web_crawler import HTTPCache, WebCrawler
+
+async def serve(routes):
+    app = web.Application()
+    app.add_routes(routes)
+    server = TestServer(app)
+    await server.start_server()
+    return server
+
+def test_cached_page_is_revalidated_with_etag(tmp_path):
+    conditional = []
+
+    async def page(request):
+        conditional.append(request.headers.get("If-None-Match"))
+        if request.headers.get("If-None-Match") == '"v1"':
+            return web.Response(status=304, headers={"ETag": '"v1"'})
+        return web.Response(text="<p>hello</p>", content_type="text/html", headers={"ETag": '"v1"'})
+
+    async def run():
+        server = await serve([web.get("/", page)])
+        crawler = WebCrawler(HTTPCache(str(tmp_path)))
+        try:
+            async with crawler.session() as session:
+                first = await crawler.fetch(session, str(server.make_url("/")))
+                second = await crawler.fetch(session, str(server.make_url("/")))
+        finally:
+            await server.close()
+        return first, second, crawler.stats
+
+    first, second, stats = asyncio.run(run())
+    assert conditional == [None, '"v1"']
+    assert not first.from_cache and second.from_cache
+    assert second.body == b"<p>hello</p>"
+    assert stats["not_modified"] == 1
+
+def test_cache_evicts_least_recently_used(tmp_path, monkeypatch):
+    clock = itertools.count()
+    monkeypatch.setattr(time, "time", lambda: float(next(clock)))
+    cache = HTTPCache(str(tmp_path), max_bytes=10)
+    cache.put("http://a/", 200, {"ETag": "a"}, b"aaaa")
+    cache.put("http://b/", 200, {"ETag": "b"}, b"bbbb")
+    assert cache.get("http://a/") is not None
+    cache.put("http://c/", 200, {"ETag": "c"}, b"cccc")
+    assert cache.get("http://b/") is None
+    assert cache.validators("http://b/") == {}
+    assert cache.validators("http://a/") == {"If-None-Match": "a"}
+    assert cache.size() == 8
+
+def test_retry_after_is_honored():
+    attempts = []
+
+    async def flaky(request):
+        attempts.append(time.monotonic())
+        if len(attempts) == 1:
+            return web.Response(status=503, headers={"Retry-After": "0.2"})
+        return web.Response(text="ok")
+
+    async def run():
+        server = await serve([web.get("/", flaky)])
+        # A backoff far longer than Retry-After, so the test shows which won.
+        crawler = WebCrawler(retry_delay=30)
+        try:
+            async with crawler.session() as session:
+                page = await crawler.fetch(session, str(server.make_url("/")))
+        finally:
+            await server.close()
+        return page, crawler.stats
+
+    page, stats = asyncio.run(run())
+    assert page.status == 200
+    assert stats["retries"] == 1
+    assert 0.2 <= attempts[1] - attempts[0] < 5
+
+def test_requests_per_host_are_limited():
+    in_flight = []
+    peak = []
+
+    async def slow(request):
+        in_flight.append(1)
+        peak.append(len(in_flight))
+        await asyncio.sleep(0.05)
+        in_flight.pop()
+        return web.Response(text="ok")
+
+    async def run():
+        server = await serve([web.get("/{n}", slow)])
+        crawler = WebCrawler(per_host=2)
+        try:
+            async with crawler.session() as session:
+                await asyncio.gather(*(
+                    crawler.fetch(session, str(server.make_url(f"/{n}"))) for n in range(6)
+                ))
+        finally:
+            await server.close()
+
+    asyncio.run(run())
+    assert max(peak) == 2